@@ -1,128 +1,193 @@
 """
 Stage 1 Pipeline - Complete Data Processing & Feature Engineering
 ==================================================================
-This script runs ALL Stage 1 tasks sequentially:
+This script runs ALL Stage 1 tasks as one in-process pipeline:
 1. Data Loading & Merging
 2. Missing Value Handling
 3. Outlier Detection & Analysis
 4. Feature Engineering (Time, Lag, Encoding, Normalization)
 5. Exploratory Data Analysis (EDA)
 
+Steps pass DataFrames in memory (see pipeline_engine.py). The outlier and
+EDA plots run in parallel with feature engineering, and only the final
+datasets are written unless --materialize-all is given. Datasets are
+written as Parquet (typed, compressed, column-selectable; see data_io.py);
+--format csv or --csv-export also write CSV for external tools.
+
+Step outputs are cached by content hash (see pipeline_cache.py): a re-run
+only executes steps whose code, inputs or upstream steps changed.
+
+--feature-workers N computes the lag features of step 1.3.2 on partitions of
+stores in N worker processes (see partitioned_executor.py; same output).
+
 IMPORTANT: Must be run from the project root directory.
+Usage: python stage1/Stage1_pipline_runner.py [--materialize-all] [--workers 3] [--no-cache]
+                                              [--format parquet|csv] [--csv-export]
+                                              [--feature-workers N]
 """
 
+import argparse
 import os
 import sys
+import time
 
 # Get the stage1 directory path
 stage1_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, stage1_dir)
+
+import step_1_1_data_loading_merging as step_1_1
+import step_1_2_missing_values as step_1_2
+import step_1_3_outlier_detection as step_1_3
+import step_1_3_1_time_features as step_1_3_1
+import step_1_3_2_lag_features as step_1_3_2
+import step_1_3_3_encode_categorical as step_1_3_3
+import step_1_3_4_normalize_features_final as step_1_3_4
+import step_1_4_eda_analysis as step_1_4
+from data_io import DATA_FORMATS, DEFAULT_FORMAT, dataset_path
+from pipeline_cache import StepCache
+from partitioned_executor import WORKERS_ENV
+from pipeline_engine import Pipeline, PipelineError, Step
+
+PROCESSED_DIR = 'stage1/processed_data'
+
+STEPS = [
+    Step('1.1', step_1_1.run, outputs=('train_merged', 'test_merged'),
+         description='Data Loading & Merging',
+         sources=(step_1_1.TRAIN_PATH, step_1_1.TEST_PATH, step_1_1.STORES_PATH, step_1_1.FEATURES_PATH)),
+    Step('1.2', step_1_2.run, inputs=('train_merged', 'test_merged'),
+         outputs=('train_cleaned', 'test_cleaned'), description='Handling Missing Values'),
+    Step('1.3', step_1_3.run, inputs=('train_cleaned',),
+         description='Outlier Detection & Analysis', optional=True, isolated=True,
+         files=('stage1/visualizations/Stage1.3',)),
+    Step('1.3.1', step_1_3_1.run, inputs=('train_cleaned', 'test_cleaned'),
+         outputs=('train_time_features', 'test_time_features'), description='Time-Based Features'),
+    Step('1.3.2', step_1_3_2.run, inputs=('train_time_features', 'test_time_features'),
+         outputs=('train_lag_features', 'test_lag_features'), description='Lag & Rolling Features'),
+    Step('1.3.3', step_1_3_3.run, inputs=('train_lag_features', 'test_lag_features'),
+         outputs=('train_encoded', 'test_encoded'), description='Categorical Encoding'),
+    Step('1.3.4', step_1_3_4.run, inputs=('train_encoded', 'test_encoded'),
+         outputs=('train_final', 'test_final', 'normalization_params', 'feature_pipeline'),
+         description='Feature Normalization (Final)'),
+    Step('1.4', step_1_4.run, inputs=('train_cleaned',),
+         description='Exploratory Data Analysis (EDA)', optional=True, isolated=True,
+         files=('stage1/visualizations/Stage1.4',)),
+]
+STEPS_BY_NAME = {step.name: step for step in STEPS}
+
+# Where each artifact is written (the files the standalone step scripts use);
+# datasets get a .parquet or .csv suffix, see artifact_paths()
+ARTIFACT_PATHS = {
+    'train_merged': f'{PROCESSED_DIR}/Stage1.1/train_merged',
+    'test_merged': f'{PROCESSED_DIR}/Stage1.1/test_merged',
+    'train_cleaned': f'{PROCESSED_DIR}/Stage1.2/train_cleaned_step2',
+    'test_cleaned': f'{PROCESSED_DIR}/Stage1.2/test_cleaned_step2',
+    'train_time_features': f'{PROCESSED_DIR}/Stage1.3.1/train_time_features',
+    'test_time_features': f'{PROCESSED_DIR}/Stage1.3.1/test_time_features',
+    'train_lag_features': f'{PROCESSED_DIR}/Stage1.3.2/train_lag_features',
+    'test_lag_features': f'{PROCESSED_DIR}/Stage1.3.2/test_lag_features',
+    'train_encoded': f'{PROCESSED_DIR}/Stage1.3.3/train_encoded',
+    'test_encoded': f'{PROCESSED_DIR}/Stage1.3.3/test_encoded',
+    'train_final': f'{PROCESSED_DIR}/Stage1.3.4_Final/train_final',
+    'test_final': f'{PROCESSED_DIR}/Stage1.3.4_Final/test_final',
+    'normalization_params': f'{PROCESSED_DIR}/Stage1.3.4_Final/normalization_params.json',
+    'feature_pipeline': f'{PROCESSED_DIR}/Stage1.3.4_Final/feature_pipeline.json',
+}
+
+# Always written: the inputs of Stage 2 and model training
+FINAL_ARTIFACTS = ('train_final', 'test_final', 'normalization_params', 'feature_pipeline')
+
+
+def artifact_paths(names, fmt=DEFAULT_FORMAT, csv_export=False):
+    """
+    {artifact: paths} to materialize.
+
+    Parameters:
+    -----------
+    names : iterable of str
+        Artifacts to write
+    fmt : str
+        Dataset format ('parquet' or 'csv')
+    csv_export : bool
+        Also write a CSV copy of every dataset
+    """
+    paths = {}
+    for name in names:
+        path = ARTIFACT_PATHS[name]
+        if path.endswith('.json'):
+            paths[name] = (path,)
+        else:
+            formats = [fmt] + (['csv'] if csv_export and fmt != 'csv' else [])
+            paths[name] = tuple(dataset_path(path, f) for f in formats)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--materialize-all', action='store_true',
+                        help='also write every intermediate dataset (Stage1.1 ... Stage1.3.3)')
+    parser.add_argument('--workers', type=int, default=3, help='steps run concurrently')
+    parser.add_argument('--no-cache', action='store_true', help='run every step and leave the step cache untouched')
+    parser.add_argument('--format', choices=DATA_FORMATS, default=DEFAULT_FORMAT, help='dataset file format')
+    parser.add_argument('--csv-export', action='store_true', help='also write a CSV copy of every dataset')
+    parser.add_argument('--feature-workers', type=int,
+                        help=f'processes computing per-Store features (default ${WORKERS_ENV} or 1)')
+    args = parser.parse_args()
+    if args.feature_workers is not None:
+        os.environ[WORKERS_ENV] = str(args.feature_workers)
+
+    print("="*70)
+    print("STAGE 1 COMPLETE PIPELINE - DATA PROCESSING & FEATURE ENGINEERING")
+    print("="*70)
+    print("\nPipeline Flow:")
+    print("  [1.1] Data Loading → [1.2] Missing Values ─┬→ [1.3] Outliers (parallel)")
+    print("                                             ├→ [1.4] EDA (parallel)")
+    print("  → [1.3.1] Time Features → [1.3.2] Lag Features")
+    print("  → [1.3.3] Encoding → [1.3.4] Normalization\n")
+    print("="*70)
+
+    materialize = artifact_paths(ARTIFACT_PATHS if args.materialize_all else FINAL_ARTIFACTS,
+                                 fmt=args.format, csv_export=args.csv_export)
+    start = time.perf_counter()
+    try:
+        result = Pipeline(STEPS).run(materialize=materialize, keep=(), max_workers=args.workers,
+                                     cache=None if args.no_cache else StepCache())
+    except PipelineError as e:
+        print(f"\n❌ ERROR: {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    # Final summary
+    print("\n" + "="*70)
+    print("🎉 STAGE 1 PIPELINE COMPLETED SUCCESSFULLY! 🎉")
+    print("="*70)
+    print("\n⏱️  Step timings:")
+    for name, seconds in result['timings'].items():
+        print(f"   [{name:<5}] {STEPS_BY_NAME[name].description:<36} {seconds:6.1f}s")
+    for name in result['cached']:
+        print(f"   [{name:<5}] {STEPS_BY_NAME[name].description:<36} cached")
+    print(f"   Total wall time: {elapsed:.1f}s")
+    if not args.no_cache:
+        print(f"   Cache: {len(result['cached'])} of {len(STEPS)} steps reused")
+    for name in result['failed'] + result['skipped']:
+        print(f"   ⚠️  [{name}] did not complete (optional)")
+
+    print("\n📊 Final Outputs:")
+    if args.materialize_all:
+        print("\n   Intermediate datasets: stage1/processed_data/Stage1.1 ... Stage1.3.3/")
+    print("\n   Feature-Engineered Data:")
+    print("   stage1/processed_data/Stage1.3.4_Final/")
+    print(f"   ├─ train_final.{args.format} (421,570 rows × 49 features)")
+    print(f"   ├─ test_final.{args.format} (115,064 rows × 31 features)")
+    print("   ├─ normalization_params.json")
+    print("   └─ feature_pipeline.json (fitted FeaturePipeline, saved with trained models)")
+    print("\n   Visualizations:")
+    print("   stage1/visualizations/")
+    print("   ├─ Stage1.3/ (4 outlier analysis plots)")
+    print("   └─ Stage1.4/ (10 EDA visualization plots)")
+    print("\n" + "="*70)
+    print("✅ Ready for Stage 2 (Advanced Analysis & Feature Engineering)!")
+    print("="*70)
 
-print("="*70)
-print("STAGE 1 COMPLETE PIPELINE - DATA PROCESSING & FEATURE ENGINEERING")
-print("="*70)
-print("\nPipeline Flow:")
-print("  [1.1] Data Loading → [1.2] Missing Values → [1.3] Outliers")
-print("  → [1.3.1] Time Features → [1.3.2] Lag Features")
-print("  → [1.3.3] Encoding → [1.3.4] Normalization → [1.4] EDA\n")
-print("="*70)
-
-# Step 1.1: Data Loading & Merging
-print("\n[1/7] STEP 1.1: DATA LOADING & MERGING")
-print("-" * 50)
-exit_code = os.system(f"{sys.executable} {os.path.join(stage1_dir, 'step_1_1_data_loading_merging.py')}")
-if exit_code != 0:
-    print(f"\n❌ ERROR: Step 1.1 failed with exit code {exit_code}")
-    sys.exit(1)
-print("✅ Step 1.1 completed successfully!\n")
-
-# Step 1.2: Missing Values
-print("\n[2/7] STEP 1.2: HANDLING MISSING VALUES")
-print("-" * 50)
-exit_code = os.system(f"{sys.executable} {os.path.join(stage1_dir, 'step_1_2_missing_values.py')}")
-if exit_code != 0:
-    print(f"\n❌ ERROR: Step 1.2 failed with exit code {exit_code}")
-    sys.exit(1)
-print("✅ Step 1.2 completed successfully!\n")
-
-# Step 1.3: Outlier Detection (Optional - creates visualizations)
-print("\n[3/7] STEP 1.3: OUTLIER DETECTION & ANALYSIS")
-print("-" * 50)
-exit_code = os.system(f"{sys.executable} {os.path.join(stage1_dir, 'step_1_3_outlier_detection.py')}")
-if exit_code != 0:
-    print(f"\n⚠️  WARNING: Step 1.3 failed with exit code {exit_code}")
-    print("Continuing with pipeline (outlier detection is optional)...\n")
-else:
-    print("✅ Step 1.3 completed successfully!\n")
-
-# Step 1.3.1: Time-based features
-print("\n[4/7] STEP 1.3.1: TIME-BASED FEATURES")
-print("-" * 50)
-exit_code = os.system(f"{sys.executable} {os.path.join(stage1_dir, 'step_1_3_1_time_features.py')}")
-if exit_code != 0:
-    print(f"\n❌ ERROR: Step 1.3.1 failed with exit code {exit_code}")
-    sys.exit(1)
-print("✅ Step 1.3.1 completed successfully!\n")
-
-# Step 1.3.2: Lag features
-print("\n[5/7] STEP 1.3.2: LAG & ROLLING FEATURES")
-print("-" * 50)
-exit_code = os.system(f"{sys.executable} {os.path.join(stage1_dir, 'step_1_3_2_lag_features.py')}")
-if exit_code != 0:
-    print(f"\n❌ ERROR: Step 1.3.2 failed with exit code {exit_code}")
-    sys.exit(1)
-print("✅ Step 1.3.2 completed successfully!\n")
-
-# Step 1.3.3: Categorical encoding
-print("\n[6/7] STEP 1.3.3: CATEGORICAL ENCODING")
-print("-" * 50)
-exit_code = os.system(f"{sys.executable} {os.path.join(stage1_dir, 'step_1_3_3_encode_categorical.py')}")
-if exit_code != 0:
-    print(f"\n❌ ERROR: Step 1.3.3 failed with exit code {exit_code}")
-    sys.exit(1)
-print("✅ Step 1.3.3 completed successfully!\n")
-
-# Step 1.3.4: Normalization
-print("\n[7/7] STEP 1.3.4: FEATURE NORMALIZATION (FINAL)")
-print("-" * 50)
-exit_code = os.system(f"{sys.executable} {os.path.join(stage1_dir, 'step_1_3_4_normalize_features_final.py')}")
-if exit_code != 0:
-    print(f"\n❌ ERROR: Step 1.3.4 failed with exit code {exit_code}")
-    sys.exit(1)
-print("✅ Step 1.3.4 completed successfully!\n")
-
-# Step 1.4: EDA Analysis (Optional - creates visualizations)
-print("\n[BONUS] STEP 1.4: EXPLORATORY DATA ANALYSIS (EDA)")
-print("-" * 50)
-exit_code = os.system(f"{sys.executable} {os.path.join(stage1_dir, 'step_1_4_eda_analysis.py')}")
-if exit_code != 0:
-    print(f"\n⚠️  WARNING: Step 1.4 failed with exit code {exit_code}")
-    print("Continuing (EDA is optional for visualization purposes)...\n")
-else:
-    print("✅ Step 1.4 completed successfully!\n")
-
-# Final summary
-print("\n" + "="*70)
-print("🎉 STAGE 1 PIPELINE COMPLETED SUCCESSFULLY! 🎉")
-print("="*70)
-print("\n📊 Final Outputs:")
-print("\n1. Merged Data:")
-print("   stage1/processed_data/Stage1.1/")
-print("   ├─ train_merged.csv")
-print("   └─ test_merged.csv")
-print("\n2. Cleaned Data:")
-print("   stage1/processed_data/Stage1.2/")
-print("   ├─ train_cleaned_step2.csv")
-print("   └─ test_cleaned_step2.csv")
-print("\n3. Feature-Engineered Data:")
-print("   stage1/processed_data/Stage1.3.4_Final/")
-print("   ├─ train_final.csv (421,570 rows × 49 features)")
-print("   ├─ test_final.csv (115,064 rows × 31 features)")
-print("   └─ normalization_params.json")
-print("\n4. Visualizations:")
-print("   stage1/visualizations/")
-print("   ├─ Stage1.3/ (4 outlier analysis plots)")
-print("   └─ Stage1.4/ (10 EDA visualization plots)")
-print("\n" + "="*70)
-print("✅ Ready for Stage 2 (Advanced Analysis & Feature Engineering)!")
-print("="*70)
 
+if __name__ == "__main__":
+    main()
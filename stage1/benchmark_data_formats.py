@@ -0,0 +1,115 @@
+"""
+Benchmark: CSV vs Parquet for every processed dataset
+======================================================
+For each Stage 1 intermediate and final dataset and the Stage 2 enhanced
+features, writes the same DataFrame as CSV and as Parquet (data_io.py) and
+reports write time, full read time, projected read time (the four columns
+the serving history uses) and disk footprint. Also checks that the Parquet
+round trip returns identical data and dtypes.
+
+Datasets are taken from whatever exists on disk; write them all first with
+    python stage1/Stage1_pipline_runner.py --materialize-all
+    python stage2/Stage2_pipline_runner.py
+
+IMPORTANT: Must be run from the project root directory.
+Usage: python stage1/benchmark_data_formats.py [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+stage1_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, stage1_dir)
+
+from data_io import DATA_FORMATS, dataset_exists, read_dataset, write_dataset
+from Stage1_pipline_runner import ARTIFACT_PATHS
+
+ENHANCED_DIR = 'stage2/outputs/enhanced_features'
+DATASETS = {
+    **{name: path for name, path in ARTIFACT_PATHS.items() if not path.endswith('.json')},
+    'train_enhanced': f'{ENHANCED_DIR}/train_enhanced',
+    'test_enhanced': f'{ENHANCED_DIR}/test_enhanced',
+}
+
+# Column projection benchmarked: what the predictor's lag history reads
+PROJECTED_COLUMNS = ['Store', 'Dept', 'Date', 'Weekly_Sales']
+
+
+def best_time(func, repeat):
+    """Fastest of ``repeat`` calls of ``func``, in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(df, tmp, repeat):
+    """{format: {'write', 'read', 'projected', 'size'}} for one DataFrame."""
+    results = {}
+    columns = [c for c in PROJECTED_COLUMNS if c in df.columns]
+    for fmt in DATA_FORMATS:
+        path = os.path.join(tmp, f'data.{fmt}')
+        write = best_time(lambda: write_dataset(df, path), repeat)
+        read = best_time(lambda: read_dataset(path), repeat)
+        projected = best_time(lambda: read_dataset(path, columns=columns), repeat)
+        results[fmt] = {'write': write, 'read': read, 'projected': projected, 'size': os.path.getsize(path)}
+    return results
+
+
+def roundtrip_identical(df, tmp):
+    """True if a Parquet round trip returns the same values and dtypes."""
+    path = write_dataset(df, os.path.join(tmp, 'check.parquet'))
+    back = read_dataset(path)
+    return list(back.dtypes) == list(df.dtypes) and back.equals(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help='timing repetitions (the best is reported)')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK: PROCESSED DATA FORMATS (CSV VS PARQUET)")
+    print("=" * 70)
+
+    totals = {fmt: {'write': 0.0, 'read': 0.0, 'projected': 0.0, 'size': 0} for fmt in DATA_FORMATS}
+    print(f"\n{'dataset':<22}{'format':<9}{'write (s)':>10}{'read (s)':>10}"
+          f"{'4 cols (s)':>11}{'size (MB)':>11}")
+    print("-" * 70)
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, path in DATASETS.items():
+            if not dataset_exists(path):
+                print(f"{name:<22}(not on disk, skipped)")
+                continue
+            df = read_dataset(path)
+            results = measure(df, tmp, args.repeat)
+            for fmt, r in results.items():
+                label = name if fmt == DATA_FORMATS[0] else ''
+                print(f"{label:<22}{fmt:<9}{r['write']:>10.2f}{r['read']:>10.2f}"
+                      f"{r['projected']:>11.2f}{r['size'] / 1e6:>11.1f}")
+                for key in totals[fmt]:
+                    totals[fmt][key] += r[key]
+            if not roundtrip_identical(df, tmp):
+                print(f"{'':<22}⚠️  Parquet round trip changed values or dtypes")
+
+    print("-" * 70)
+    for fmt, t in totals.items():
+        print(f"{'total':<22}{fmt:<9}{t['write']:>10.2f}{t['read']:>10.2f}"
+              f"{t['projected']:>11.2f}{t['size'] / 1e6:>11.1f}")
+
+    csv, parquet = totals['csv'], totals['parquet']
+    if parquet['size']:
+        print(f"\nParquet vs CSV: write {csv['write'] / parquet['write']:.1f}x faster, "
+              f"read {csv['read'] / parquet['read']:.1f}x faster, "
+              f"4-column read {csv['projected'] / parquet['projected']:.1f}x faster, "
+              f"{csv['size'] / parquet['size']:.1f}x smaller on disk")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark: peak memory of model training and Stage 2 feature engineering
+=========================================================================
+Runs each workload in a fresh interpreter and reports its peak resident set
+size (ru_maxrss) and wall time:
+- stage3 Best_model.train_best_random_forest on the Stage 1 training data
+- stage2/step_2_2_feature_engineering.py
+
+Also reports the in-memory size of the final training frame as loaded
+(data_schema.py dtypes) and with pandas' default 64-bit dtypes.
+
+IMPORTANT: Must be run from the project root directory.
+Usage: python stage1/benchmark_memory.py [--trees 100] [--skip-training]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+stage1_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(stage1_dir)
+ml_dir = os.path.join(project_root, 'stage3', 'ML_models')
+sys.path.insert(0, stage1_dir)
+
+from data_io import read_dataset
+from data_schema import FLAG_PREFIXES
+
+TRAIN_FINAL = os.path.join(stage1_dir, 'processed_data', 'Stage1.3.4_Final', 'train_final')
+
+# Child programs: run the workload, then print the peak RSS as JSON
+TRAINING = """
+import contextlib, io, json, resource, sys
+sys.path.insert(0, {ml_dir!r})
+import Config
+Config.RANDOM_FOREST_PARAMS['n_estimators'] = {trees}
+import Best_model
+with contextlib.redirect_stdout(io.StringIO()):
+    Best_model.train_best_random_forest(Best_model.data)
+print(json.dumps({{'peak_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+FEATURES = """
+import contextlib, io, json, resource, runpy
+with contextlib.redirect_stdout(io.StringIO()):
+    runpy.run_path({script!r}, run_name='__main__')
+print(json.dumps({{'peak_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+
+def peak_rss(program, cwd):
+    """Run ``program`` in a new interpreter; returns (peak RSS in MB, wall seconds)."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', program], cwd=cwd, check=True,
+                            capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    return json.loads(result.stdout.strip().splitlines()[-1])['peak_kb'] / 1024, elapsed
+
+
+def frame_mb(df):
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+def wide_dtypes(df):
+    """``df`` with the dtypes pandas infers from CSV: int64 (0/1 flags too), float64 and object."""
+    wide = {}
+    for column, dtype in df.dtypes.items():
+        if dtype.kind in 'iu' or (dtype.kind == 'b' and column.startswith(FLAG_PREFIXES)):
+            wide[column] = 'int64'
+        elif dtype.kind == 'f':
+            wide[column] = 'float64'
+        elif str(dtype) == 'category':
+            wide[column] = 'object'
+    return df.astype(wide)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trees', type=int, default=100, help='Random Forest size (the production config uses 100)')
+    parser.add_argument('--skip-training', action='store_true', help='only run the Stage 2 feature script')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK: PEAK MEMORY (TRAINING AND STAGE 2 FEATURES)")
+    print("=" * 70)
+
+    train = read_dataset(TRAIN_FINAL)
+    print(f"\ntrain_final in memory: {frame_mb(train):,.1f} MB as loaded, "
+          f"{frame_mb(wide_dtypes(train)):,.1f} MB with 64-bit dtypes ({train.shape[0]:,} x {train.shape[1]})")
+    del train
+
+    workloads = []
+    if not args.skip_training:
+        workloads.append((f'train_best_random_forest ({args.trees} trees)',
+                          TRAINING.format(ml_dir=ml_dir, trees=args.trees), ml_dir))
+    workloads.append(('step_2_2_feature_engineering.py',
+                      FEATURES.format(script=os.path.join(project_root, 'stage2', 'step_2_2_feature_engineering.py')),
+                      project_root))
+
+    print(f"\n{'workload':<44}{'peak RSS (MB)':>14}{'wall (s)':>12}")
+    print("-" * 70)
+    for name, program, cwd in workloads:
+        peak, elapsed = peak_rss(program, cwd)
+        print(f"{name:<44}{peak:>14,.0f}{elapsed:>12.1f}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark: step 1.3.4 normalization, column passes vs running moments
+======================================================================
+Times fitting and applying the z-score normalization of step 1.3.4 on the
+real encoded datasets, and the memory it allocates (tracemalloc peak):
+- previous: pandas mean() and std() per feature, then a copy of each frame
+  z-scored in float64 and narrowed to float32 afterwards
+- running moments: one pass of Normalization.RunningMoments, then each
+  feature written as float32 in place of the original column
+
+Also merges per-Store partial moments (as the streaming pipeline does per
+partition) and reports how far their statistics are from the single pass,
+and checks the final datasets of both ways are identical.
+
+IMPORTANT: Must be run from the project root directory.
+Usage: python stage1/benchmark_normalization.py [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+stage1_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, stage1_dir)
+sys.path.insert(0, os.path.join(os.path.dirname(stage1_dir), 'stage3', 'ML_models'))
+
+from data_io import read_dataset
+from data_schema import apply_schema
+from Feature_Pipeline import CONTINUOUS_FEATURES, FeaturePipeline
+from Normalization import RunningMoments
+
+TRAIN_ENCODED = 'stage1/processed_data/Stage1.3.3/train_encoded'
+TEST_ENCODED = 'stage1/processed_data/Stage1.3.3/test_encoded'
+
+
+def previous_normalization(train, test):
+    """Step 1.3.4 before running moments: (train, test, normalization_params)."""
+    params = {feature: {'mean': train[feature].mean(), 'std': train[feature].std()}
+              for feature in CONTINUOUS_FEATURES if feature in train.columns}
+    frames = []
+    for df in (train, test):
+        df = df.copy()
+        for feature, p in params.items():
+            if feature in df.columns:
+                df[feature] = (df[feature] - p['mean']) / p['std'] if p['std'] > 0 else 0
+        frames.append(apply_schema(df, float32=True))
+    return frames[0], frames[1], params
+
+
+def running_moments_normalization(train, test):
+    """Step 1.3.4 with running moments: (train, test, normalization_params)."""
+    pipeline = FeaturePipeline().fit(train)
+    frames = [apply_schema(pipeline.normalize(df, float32=True), float32=True) for df in (train, test)]
+    return frames[0], frames[1], pipeline.normalization_params
+
+
+def measure(func, train, test, repeat):
+    """(fastest of ``repeat`` calls in seconds, traced peak MB of one call, result of that call)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(train, test)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    result = func(train, test)
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help='timing repetitions (the best is reported)')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK: STEP 1.3.4 NORMALIZATION")
+    print("=" * 70)
+    train = read_dataset(TRAIN_ENCODED)
+    test = read_dataset(TEST_ENCODED)
+    print(f"Data: train {train.shape}, test {test.shape}, {len(CONTINUOUS_FEATURES)} continuous features")
+
+    print(f"\n{'method':<22}{'time (s)':>12}{'allocated peak (MB)':>22}")
+    print("-" * 70)
+    results = {}
+    for name, func in (('previous', previous_normalization), ('running moments', running_moments_normalization)):
+        seconds, peak, results[name] = measure(func, train, test, args.repeat)
+        print(f"{name:<22}{seconds:>12.3f}{peak:>22.1f}")
+
+    # Per-Store partials, merged as partitions of the streaming pipeline are
+    start = time.perf_counter()
+    merged = RunningMoments(CONTINUOUS_FEATURES)
+    for _, store_rows in train.groupby('Store', observed=True):
+        merged.merge(RunningMoments(CONTINUOUS_FEATURES).update(store_rows))
+    merge_seconds = time.perf_counter() - start
+    single = results['running moments'][2]
+    merged_params = merged.normalization_params()
+    worst = max(abs(merged_params[f][stat] - single[f][stat]) / abs(single[f][stat])
+                for f in single for stat in ('mean', 'std'))
+    print(f"{'per-Store merge (45)':<22}{merge_seconds:>12.3f}{'':>22}")
+
+    print("-" * 70)
+    previous, current = results['previous'], results['running moments']
+    same_params = all(float(previous[2][f][stat]) == current[2][f][stat] for f in current[2] for stat in ('mean', 'std'))
+    same_data = all(frame_a.equals(frame_b) for frame_a, frame_b in zip(previous[:2], current[:2]))
+    print(f"{'✓' if same_params else '⚠️ '} normalization parameters {'identical' if same_params else 'differ'}")
+    print(f"{'✓' if same_data else '⚠️ '} train_final / test_final {'identical' if same_data else 'differ'}")
+    print(f"✓ per-Store merged statistics within {worst:.1e} (relative) of the single pass")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
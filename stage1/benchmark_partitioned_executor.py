@@ -0,0 +1,157 @@
+"""
+Benchmark: per-Store features in a process pool (partitioned_executor.py)
+=========================================================================
+Times the per-Store feature functions of Stage 1 and Stage 2 on the
+Stage 1 output of the synthetic dataset scaled 10x (or --scale), with 1
+(in-process) to 16 worker processes:
+- step 1.3.2: add_lag_features (lags, rolling mean/std, momentum)
+- step 2.2: advanced rolling features, promotional features and time
+  aggregations (stage2/enhanced_features.py)
+
+Worker start-up (spawning the processes and importing pandas) is timed
+separately, then each feature function once with the pool running. Every
+result is checked against the single-process one (content hash of the
+added columns). Speed-up is bounded by the CPUs of the machine, printed
+first; worker counts above it only measure the overhead.
+
+Missing inputs are made in child processes: the synthetic data by
+generate_synthetic_data.py and its Stage 1 output by streaming_pipeline.py
+(in stage1/processed_data/streaming_benchmark/x<scale>_streaming, shared
+with benchmark_streaming.py).
+
+IMPORTANT: Must be run from the project root directory.
+Usage: python stage1/benchmark_partitioned_executor.py [--scale 10] [--workers 1 2 4 8 16]
+"""
+
+import argparse
+import hashlib
+import os
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+stage1_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(stage1_dir)
+sys.path.insert(0, stage1_dir)
+sys.path.insert(0, os.path.join(project_root, 'stage2'))
+
+import generate_synthetic_data
+from data_io import read_dataset
+from enhanced_features import (PROMO_INPUTS, ROLLING_INPUTS, TIME_AGGREGATION_INPUTS,
+                               create_advanced_rolling_features, create_promo_features,
+                               create_time_aggregations)
+from partitioned_executor import PartitionedExecutor
+from step_1_3_2_lag_features import LAG_INPUTS, add_lag_features
+
+OUTPUT_ROOT = os.path.join('stage1', 'processed_data', 'streaming_benchmark')
+
+# (name, function, columns it reads, keyword arguments)
+WORKLOADS = [
+    ('1.3.2 lags', add_lag_features, LAG_INPUTS, {}),
+    ('2.2 rolling', create_advanced_rolling_features, ROLLING_INPUTS, {'has_sales': True}),
+    ('2.2 promo', create_promo_features, PROMO_INPUTS, {}),
+    ('2.2 time agg', create_time_aggregations, TIME_AGGREGATION_INPUTS, {'has_sales': True}),
+]
+
+
+def stage1_output(scale):
+    """Stage 1 output directory of the ``scale`` x synthetic data (made if missing)."""
+    output_dir = os.path.join(OUTPUT_ROOT, f'x{scale}_streaming')
+    if os.path.exists(os.path.join(output_dir, 'train_final.parquet')):
+        return output_dir
+    data_dir = generate_synthetic_data.default_output_dir(scale)
+    if not os.path.exists(os.path.join(data_dir, 'train.csv')):
+        print(f"Generating {scale}x synthetic data in {data_dir}...")
+        subprocess.run([sys.executable, os.path.join(stage1_dir, 'generate_synthetic_data.py'),
+                        '--scale', str(scale), '--output-dir', data_dir],
+                       cwd=project_root, check=True, capture_output=True)
+    print(f"Running Stage 1 (streaming) on it into {output_dir}...")
+    subprocess.run([sys.executable, os.path.join(stage1_dir, 'streaming_pipeline.py'), '--data-dir', data_dir,
+                    '--output-dir', output_dir, '--work-dir', os.path.join(OUTPUT_ROOT, 'work')],
+                   cwd=project_root, check=True, capture_output=True)
+    return output_dir
+
+
+def load_inputs(output_dir):
+    """The columns the workloads read, sorted by Store, Dept, Date."""
+    columns = ['Store', 'Date', *dict.fromkeys(
+        column for _, _, inputs, _ in WORKLOADS for column in inputs)]
+    train = read_dataset(os.path.join(output_dir, 'train_final'), columns=columns)
+    return train.sort_values(['Store', 'Dept', 'Date']).reset_index(drop=True)
+
+
+def added_digest(df, result):
+    """Content hash of the columns ``result`` adds to ``df`` (values, dtypes and order)."""
+    added = result[[column for column in result.columns if column not in df.columns]]
+    h = hashlib.sha1(str(list(added.dtypes.items())).encode())
+    h.update(pd.util.hash_pandas_object(added, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def run_workers(train, workers):
+    """(start-up seconds, {workload: (seconds, digest)}) with ``workers`` processes."""
+    with PartitionedExecutor(workers) as executor:
+        start = time.perf_counter()
+        # Spawns the workers (one row per Store, split in workers * 4 partitions)
+        sample = train.groupby('Store', observed=True).head(1)
+        executor.map(sample, add_lag_features, columns=LAG_INPUTS)
+        startup = time.perf_counter() - start if workers > 1 else 0.0
+
+        timings = {}
+        for name, func, inputs, kwargs in WORKLOADS:
+            # A copy, since with one worker functions get (and may add columns to) the frame itself
+            frame = train.copy()
+            start = time.perf_counter()
+            result = executor.map(frame, func, columns=inputs, **kwargs)
+            seconds = time.perf_counter() - start
+            timings[name] = (seconds, added_digest(train, result))
+            del frame, result
+    return startup, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=10, help='synthetic dataset scale (1 uses the real Stage 1 output)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16], help='worker counts to run')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK: PER-STORE FEATURES IN A PROCESS POOL")
+    print("=" * 70)
+    output_dir = (os.path.join('stage1', 'processed_data', 'Stage1.3.4_Final') if args.scale == 1
+                  else stage1_output(args.scale))
+    train = load_inputs(output_dir)
+    cpus = os.cpu_count()
+    print(f"Data: {args.scale}x train_final, {len(train):,} rows, {train['Store'].nunique()} stores")
+    print(f"CPUs: {cpus}")
+
+    results = {}
+    for workers in sorted(set([1, *args.workers])):
+        results[workers] = run_workers(train, workers)
+
+    names = [name for name, _, _, _ in WORKLOADS]
+    print(f"\n{'workers':>7}{'start-up':>9}" + ''.join(f"{name:>13}" for name in names) + f"{'total':>8}{'speed-up':>9}")
+    print("-" * 85)
+    baseline = sum(seconds for seconds, _ in results[1][1].values())
+    for workers, (startup, timings) in results.items():
+        total = sum(seconds for seconds, _ in timings.values())
+        note = '' if workers <= cpus else ' *'
+        print(f"{workers:>7}{startup:>8.1f}s" + ''.join(f"{timings[name][0]:>12.1f}s" for name in names)
+              + f"{total:>7.1f}s{baseline / total:>8.2f}x{note}")
+    print("-" * 85)
+    if any(workers > cpus for workers in results):
+        print(f"* more workers than the {cpus} CPU(s) of this machine: measures overhead, not speed-up")
+    mismatched = [(workers, name) for workers, (_, timings) in results.items() for name in names
+                  if timings[name][1] != results[1][1][name][1]]
+    if mismatched:
+        for workers, name in mismatched:
+            print(f"⚠️  {workers} workers: {name} differs from the single-process result")
+    else:
+        print("✓ every worker count gives the single-process features, bit for bit")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
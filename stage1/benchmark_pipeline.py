@@ -0,0 +1,102 @@
+"""
+Benchmark: Stage 1 end-to-end wall time, script chain vs in-process DAG
+=======================================================================
+The script chain is how the runner used to work: one Python interpreter per
+step, each re-reading the previous step's files and writing new ones.
+The DAG run is Stage1_pipline_runner.py --no-cache (DataFrames in memory,
+plots in parallel, only the final datasets written). Both final outputs are compared.
+
+IMPORTANT: Must be run from the project root directory.
+Usage: python stage1/benchmark_pipeline.py [--workers 3]
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+stage1_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, stage1_dir)
+
+from data_io import read_dataset
+FINAL_DIR = 'stage1/processed_data/Stage1.3.4_Final'
+
+# The previous runner's os.system sequence
+SCRIPT_CHAIN = [
+    'step_1_1_data_loading_merging.py',
+    'step_1_2_missing_values.py',
+    'step_1_3_outlier_detection.py',
+    'step_1_3_1_time_features.py',
+    'step_1_3_2_lag_features.py',
+    'step_1_3_3_encode_categorical.py',
+    'step_1_3_4_normalize_features_final.py',
+    'step_1_4_eda_analysis.py',
+]
+
+
+def run_quietly(args):
+    """Run a Python script, discarding its output; returns wall seconds."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *args], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def max_difference(dir_a, dir_b):
+    """Largest absolute difference between the numeric columns of two final outputs."""
+    worst = 0.0
+    for name in ('train_final', 'test_final'):
+        a = read_dataset(os.path.join(dir_a, name))
+        b = read_dataset(os.path.join(dir_b, name))
+        if list(a.columns) != list(b.columns) or len(a) != len(b):
+            return np.inf
+        numeric = a.select_dtypes('number').columns
+        worst = max(worst, float((a[numeric] - b[numeric]).abs().max().max()))
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=3, help='concurrent steps for the DAG runner')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK: STAGE 1 PIPELINE (SCRIPT CHAIN VS IN-PROCESS DAG)")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print("\nScript chain (one interpreter and file round trip per step):")
+        chain_total = 0.0
+        for script in SCRIPT_CHAIN:
+            seconds = run_quietly([os.path.join(stage1_dir, script)])
+            chain_total += seconds
+            print(f"   {script:<42}{seconds:>8.1f}s")
+        chain_final = os.path.join(tmp, 'chain_final')
+        shutil.copytree(FINAL_DIR, chain_final)
+
+        print("\nIn-process DAG (Stage1_pipline_runner.py):")
+        dag_total = run_quietly([os.path.join(stage1_dir, 'Stage1_pipline_runner.py'),
+                                 '--workers', str(args.workers), '--no-cache'])
+        print(f"   {'end to end':<42}{dag_total:>8.1f}s")
+
+        difference = max_difference(chain_final, FINAL_DIR)
+
+    print(f"\n{'Runner':<30}{'wall time (s)':>16}{'speedup':>10}")
+    print("-" * 70)
+    print(f"{'script chain':<30}{chain_total:>16.1f}{'1.0x':>10}")
+    print(f"{'in-process DAG':<30}{dag_total:>16.1f}{chain_total / dag_total:>9.1f}x")
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    print(f"\nCPU cores available: {cores}")
+    print(f"Final outputs max abs difference: {difference:.1e}")
+    print("=" * 70)
+
+    if difference > 1e-9:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Benchmark: in-memory vs streaming (partitioned by Store) Stage 1
+=================================================================
+Runs steps 1.1 - 1.3.4 both ways on the real data and on synthetic data
+scaled 10x (or the --scales given), each in a fresh interpreter, and
+reports peak resident set size (ru_maxrss) and wall time:
+- in-memory: the step run() functions chained on whole datasets, as
+  Stage1_pipline_runner.py does
+- streaming: streaming_pipeline.py, one partition at a time
+
+Then compares the train_final and test_final of the two. Missing
+synthetic datasets are generated by generate_synthetic_data.py in a child
+process, and outputs are compared after all runs, since a child's
+ru_maxrss starts at its parent's peak.
+
+IMPORTANT: Must be run from the project root directory.
+Usage: python stage1/benchmark_streaming.py [--scales 1 10] [--in-memory-max-scale 10] [--partition-mb 16]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+stage1_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(stage1_dir)
+sys.path.insert(0, stage1_dir)
+
+import generate_synthetic_data
+import step_1_1_data_loading_merging as step_1_1
+from streaming_pipeline import DEFAULT_PARTITION_MB
+
+OUTPUT_ROOT = os.path.join('stage1', 'processed_data', 'streaming_benchmark')
+
+# Child programs: run the workload, then print the peak RSS as JSON
+IN_MEMORY = """
+import contextlib, io, json, os, resource, sys
+sys.path.insert(0, {stage1_dir!r})
+import step_1_1_data_loading_merging as step_1_1
+import step_1_2_missing_values as step_1_2
+import step_1_3_1_time_features as step_1_3_1
+import step_1_3_2_lag_features as step_1_3_2
+import step_1_3_3_encode_categorical as step_1_3_3
+import step_1_3_4_normalize_features_final as step_1_3_4
+from data_io import write_dataset
+with contextlib.redirect_stdout(io.StringIO()):
+    train, test = step_1_1.run({base_path!r})
+    for step in (step_1_2, step_1_3_1, step_1_3_2, step_1_3_3):
+        train, test = step.run(train, test)
+    train, test, _, _ = step_1_3_4.run(train, test)
+write_dataset(train, os.path.join({output_dir!r}, 'train_final'))
+write_dataset(test, os.path.join({output_dir!r}, 'test_final'))
+print(json.dumps({{'peak_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+STREAMING = """
+import json, resource, sys
+sys.path.insert(0, {stage1_dir!r})
+from streaming_pipeline import run_streaming
+summary = run_streaming({base_path!r}, {output_dir!r}, {work_dir!r}, {partition_mb!r}, verbose=False)
+print(json.dumps({{'peak_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  'partitions': summary['partitions']}}))
+"""
+
+
+def run_child(program):
+    """Run ``program`` in a new interpreter; returns (its JSON result, wall seconds), or (None, seconds) if it fails."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', program], cwd=project_root,
+                            capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        print(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exit code {result.returncode}")
+        return None, elapsed
+    return json.loads(result.stdout.strip().splitlines()[-1]), elapsed
+
+
+def compare_outputs(dir_a, dir_b):
+    """
+    Differences between the train_final and test_final of two directories.
+
+    Returns:
+    --------
+    differences : dict or None
+        None if the columns, dtypes or row counts differ; otherwise
+        'values' (differing values, NaN == NaN) and 'max_diff' (largest
+        absolute difference)
+    """
+    values, max_diff = 0, 0.0
+    for name in ('train_final', 'test_final'):
+        a = pd.read_parquet(os.path.join(dir_a, f'{name}.parquet'))
+        b = pd.read_parquet(os.path.join(dir_b, f'{name}.parquet'))
+        if list(a.columns) != list(b.columns) or len(a) != len(b) or not (a.dtypes == b.dtypes).all():
+            return None
+        for column in a.columns:
+            x, y = a[column].to_numpy(), b[column].to_numpy()
+            if x.dtype.kind == 'f':
+                differs = ~((x == y) | (np.isnan(x) & np.isnan(y)))
+                if differs.any():
+                    max_diff = max(max_diff, float(np.abs(x[differs].astype('float64') - y[differs]).max()))
+            else:
+                differs = x != y
+            values += int(differs.sum())
+    return {'values': values, 'max_diff': max_diff}
+
+
+def dataset_dir(scale):
+    """Raw data directory for a scale (generated if missing)."""
+    if scale == 1:
+        return step_1_1.BASE_PATH
+    path = generate_synthetic_data.default_output_dir(scale)
+    if not os.path.exists(os.path.join(path, 'train.csv')):
+        print(f"Generating {scale}x synthetic data in {path}...")
+        subprocess.run([sys.executable, os.path.join(stage1_dir, 'generate_synthetic_data.py'),
+                        '--scale', str(scale), '--output-dir', path],
+                       cwd=project_root, check=True, capture_output=True)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10], help='dataset scales to run')
+    parser.add_argument('--in-memory-max-scale', type=int, default=10,
+                        help='largest scale also run in memory (larger ones may not fit)')
+    parser.add_argument('--partition-mb', type=float, default=DEFAULT_PARTITION_MB,
+                        help='streaming partition size (raw training CSV)')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK: IN-MEMORY VS STREAMING STAGE 1 (STEPS 1.1 - 1.3.4)")
+    print("=" * 70)
+
+    results = []
+    for scale in args.scales:
+        base_path = dataset_dir(scale)
+        train_mb = os.path.getsize(os.path.join(base_path, 'train.csv')) / 1e6
+        row = {'scale': scale, 'train_mb': train_mb}
+        outputs = {}
+        modes = ['streaming'] + (['in-memory'] if scale <= args.in_memory_max_scale else [])
+        for mode in modes:
+            output_dir = os.path.join(OUTPUT_ROOT, f'x{scale}_{mode}')
+            shutil.rmtree(output_dir, ignore_errors=True)
+            os.makedirs(output_dir)
+            if mode == 'streaming':
+                program = STREAMING.format(stage1_dir=stage1_dir, base_path=base_path, output_dir=output_dir,
+                                           work_dir=os.path.join(OUTPUT_ROOT, 'work'),
+                                           partition_mb=args.partition_mb)
+            else:
+                program = IN_MEMORY.format(stage1_dir=stage1_dir, base_path=base_path, output_dir=output_dir)
+            result, seconds = run_child(program)
+            if result is not None:
+                row[mode] = (result['peak_kb'] / 1024, seconds)
+                row['partitions'] = result.get('partitions', row.get('partitions'))
+                outputs[mode] = output_dir
+        row['outputs'] = outputs
+        results.append(row)
+    for row in results:
+        if len(row['outputs']) == 2:
+            row['differences'] = compare_outputs(row['outputs']['streaming'], row['outputs']['in-memory'])
+
+    print(f"\n{'scale':>6}{'train.csv':>11}{'parts':>7}{'in-memory peak':>16}{'time':>8}"
+          f"{'streaming peak':>16}{'time':>8}")
+    print("-" * 70)
+    for row in results:
+        in_memory = row.get('in-memory')
+        streaming = row.get('streaming')
+        in_memory_cols = f"{in_memory[0]:>13,.0f} MB{in_memory[1]:>7.1f}s" if in_memory else f"{'—':>16}{'':>8}"
+        streaming_cols = f"{streaming[0]:>13,.0f} MB{streaming[1]:>7.1f}s" if streaming else f"{'failed':>16}{'':>8}"
+        print(f"{row['scale']:>5}x{row['train_mb']:>8.0f} MB{row.get('partitions') or 0:>7}"
+              f"{in_memory_cols}{streaming_cols}")
+    print("-" * 70)
+    for row in results:
+        if 'differences' not in row:
+            continue
+        differences = row['differences']
+        if differences is None:
+            print(f"⚠️  {row['scale']}x: streaming and in-memory outputs differ in columns, dtypes or rows")
+        elif differences['values'] == 0:
+            print(f"✓ {row['scale']}x: streaming and in-memory outputs identical")
+        else:
+            plural = 's' if differences['values'] != 1 else ''
+            print(f"✓ {row['scale']}x: outputs equal but for {differences['values']:,} float32 value{plural} "
+                  f"(max |diff| {differences['max_diff']:.2g}; normalization statistics summed per partition)")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
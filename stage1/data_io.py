@@ -0,0 +1,200 @@
+"""
+Processed Data I/O - Columnar Datasets for All Stages
+=====================================================
+Reads and writes the datasets under stage1/processed_data and
+stage2/outputs in one of two formats:
+- Parquet (default): typed columns (Date stays a datetime, integers stay
+  integers), compressed, and readable one column at a time
+- CSV: optional export for spreadsheets and tools without Parquet support
+
+Paths may be given with either suffix or none; readers pick whichever
+format exists on disk (the newer one if both do), so code written against
+the old .csv paths keeps working. Loaded columns are checked against and
+cast to the compact dtypes of data_schema.py, whichever the format.
+
+"""
+
+import os
+
+import pandas as pd
+
+from data_schema import apply_schema
+
+DATA_FORMATS = ('parquet', 'csv')
+DEFAULT_FORMAT = 'parquet'
+
+# Columns parsed as datetimes when reading CSV (Parquet stores the type)
+DATE_COLUMNS = ('Date',)
+
+
+def _parquet():
+    """Import pyarrow.parquet, which Parquet input and output need."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet files require the pyarrow package (pip install pyarrow)") from e
+    return pq
+
+
+def data_format(path):
+    """Get the format of a dataset path from its suffix (None without one)."""
+    suffix = os.path.splitext(str(path))[1].lower().lstrip('.')
+    return suffix if suffix in DATA_FORMATS else None
+
+
+def dataset_path(path, fmt=DEFAULT_FORMAT):
+    """``path`` with its .csv/.parquet suffix replaced by (or given) ``fmt``."""
+    if fmt not in DATA_FORMATS:
+        raise ValueError(f"Unknown data format '{fmt}'; expected one of {', '.join(DATA_FORMATS)}")
+    path = str(path)
+    stem = os.path.splitext(path)[0] if data_format(path) else path
+    return f'{stem}.{fmt}'
+
+
+def find_dataset(path, required=True):
+    """
+    Resolve a dataset path to the file that exists on disk.
+
+    Parameters:
+    -----------
+    path : str or Path
+        Dataset path with a .parquet or .csv suffix, or without a suffix
+    required : bool
+        Raise FileNotFoundError if no format exists; otherwise return the
+        path in the default format
+
+    Returns:
+    --------
+    path : str
+        The existing file (the most recently written one if both formats exist)
+    """
+    candidates = [dataset_path(path, fmt) for fmt in DATA_FORMATS]
+    existing = [p for p in candidates if os.path.isfile(p)]
+    if existing:
+        return max(existing, key=os.path.getmtime)
+    if required:
+        raise FileNotFoundError(f"No dataset at {' or '.join(candidates)}")
+    return candidates[0]
+
+
+def dataset_exists(path):
+    """True if the dataset exists in any format."""
+    return any(os.path.isfile(dataset_path(path, fmt)) for fmt in DATA_FORMATS)
+
+
+def read_dataset(path, columns=None):
+    """
+    Load a dataset written by write_dataset (or any CSV).
+
+    Parameters:
+    -----------
+    path : str or Path
+        Dataset path in any format (see find_dataset)
+    columns : list of str, optional
+        Only read these columns, in this order. Parquet skips the other
+        columns on disk; CSV still scans whole lines.
+
+    Returns:
+    --------
+    df : pd.DataFrame
+        With 'Date' as datetime64 and the data_schema.py dtypes in either
+        format (float32 columns stay float32)
+
+    Raises:
+    -------
+    SchemaError
+        If a column's values do not fit its schema dtype
+    """
+    path = find_dataset(path)
+    columns = list(columns) if columns is not None else None
+    if data_format(path) == 'parquet':
+        _parquet()
+        return apply_schema(pd.read_parquet(path, columns=columns))
+
+    header = pd.read_csv(path, nrows=0).columns
+    wanted = header if columns is None else columns
+    df = pd.read_csv(path, usecols=columns,
+                     parse_dates=[c for c in DATE_COLUMNS if c in wanted])
+    return apply_schema(df if columns is None else df[columns])
+
+
+def write_dataset(df, path, fmt=None):
+    """
+    Write a DataFrame (without its index).
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Data to write
+    path : str or Path
+        Destination; its suffix selects the format unless ``fmt`` is given
+    fmt : str, optional
+        'parquet' or 'csv'; defaults to the suffix, else DEFAULT_FORMAT
+
+    Returns:
+    --------
+    path : str
+        The file written
+    """
+    fmt = fmt or data_format(path) or DEFAULT_FORMAT
+    path = dataset_path(path, fmt)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    if fmt == 'parquet':
+        _parquet()
+        df.to_parquet(path, index=False, compression='snappy')
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+class DatasetAppender:
+    """
+    Write one dataset a DataFrame at a time (e.g. partition by partition),
+    holding only the frame being appended in memory.
+
+    Parameters:
+    -----------
+    path : str or Path
+        Destination; its suffix selects the format unless ``fmt`` is given
+    fmt : str, optional
+        'parquet' or 'csv'; defaults to the suffix, else DEFAULT_FORMAT
+
+    Every appended frame must have the columns and dtypes of the first.
+    Use as a context manager, or call close() to finish the file.
+    """
+
+    def __init__(self, path, fmt=None):
+        self.fmt = fmt or data_format(path) or DEFAULT_FORMAT
+        self.path = dataset_path(path, self.fmt)
+        self.rows = 0
+        self._started = False
+        self._writer = None
+        self._schema = None
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+    def append(self, df):
+        if self.fmt == 'parquet':
+            import pyarrow as pa
+            pq = _parquet()
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+            if self._writer is None:
+                self._schema = table.schema
+                self._writer = pq.ParquetWriter(self.path, self._schema, compression='snappy')
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.path, index=False, mode='a' if self._started else 'w', header=not self._started)
+        self._started = True
+        self.rows += len(df)
+
+    def close(self):
+        """Finish the file; returns its path."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,154 @@
+"""
+Data Schema - Compact Column Dtypes for All Stages
+==================================================
+One table of column dtypes used wherever the Walmart datasets are loaded
+or produced (Stage 1 steps, data_io readers and writers, Stage 2-4 loaders):
+- Store, Dept and calendar fields as int8/int16 instead of int64
+- 0/1 indicators (IsHoliday, Has_MarkDown*, Is_*, Type_*, Season_*) as bool
+- the Store Type letter as a category
+- with ``float32=True`` (model-facing datasets), float features as float32.
+  Weekly_Sales stays float64; scikit-learn trees split on float32 anyway,
+  so models trained on float32 features are the same.
+
+Casting validates first: a value that does not fit its dtype (a missing
+Store, a flag other than 0/1, a Dept above 127) raises SchemaError instead
+of being silently wrapped or truncated.
+
+"""
+
+import numpy as np
+import pandas as pd
+
+# Exact column names
+COLUMN_DTYPES = {
+    'Store': 'int16',
+    'Dept': 'int8',
+    'Type': 'category',
+    'Size': 'int32',
+    'Year': 'int16',
+    'Month': 'int8',
+    'Day': 'int8',
+    'Quarter': 'int8',
+    'DayOfWeek': 'int8',
+    'WeekOfYear': 'int8',
+    'Num_Active_MarkDowns': 'int8',
+    'Days_To_SuperBowl': 'int16',
+    'Days_To_LaborDay': 'int16',
+    'Days_To_Thanksgiving': 'int16',
+    'Days_To_Christmas': 'int16',
+    'Days_Since_SuperBowl': 'int16',
+    'Days_Since_LaborDay': 'int16',
+    'Days_Since_Thanksgiving': 'int16',
+    'Days_Since_Christmas': 'int16',
+    'IsHoliday': 'bool',
+}
+
+# 0/1 indicator columns, by name prefix
+FLAG_PREFIXES = ('Has_MarkDown', 'Is_', 'Type_', 'Season_')
+
+# Integer columns that must never hold fractional values
+KEY_COLUMNS = ('Store', 'Dept')
+
+# Float columns never narrowed to float32 (the target, summed in aggregations)
+FLOAT64_COLUMNS = ('Weekly_Sales',)
+
+
+class SchemaError(ValueError):
+    """Raised when a column's values do not fit its schema dtype"""
+
+
+def column_dtype(column, dtype, float32=False):
+    """
+    Schema dtype of one column (None: leave it as it is).
+
+    Parameters:
+    -----------
+    column : str
+        Column name
+    dtype : dtype
+        Its current dtype. A float column whose name has an integer dtype
+        in the schema (e.g. Size after normalization) is a float feature.
+    float32 : bool
+        Narrow float columns other than FLOAT64_COLUMNS to float32;
+        otherwise float columns keep their precision
+    """
+    target = COLUMN_DTYPES.get(column)
+    if target is None and column.startswith(FLAG_PREFIXES):
+        target = 'bool'
+    is_float = pd.api.types.is_float_dtype(dtype)
+    if is_float and target is not None and target.startswith('int') and column not in KEY_COLUMNS:
+        target = None
+    if target is None and is_float:
+        if float32 and column not in FLOAT64_COLUMNS:
+            target = 'float32'
+        elif not isinstance(dtype, np.dtype):
+            # Nullable Float64 (e.g. from isocalendar()) without missing values
+            target = 'float64'
+    return target
+
+
+def _check_fits(series, target):
+    """Raise SchemaError unless every value of ``series`` converts exactly to ``target``."""
+    if target == 'category' or target.startswith('float'):
+        return
+    if series.isna().any():
+        raise SchemaError(f"Column '{series.name}' has missing values; {target} cannot hold them")
+    if target == 'bool':
+        if pd.api.types.is_bool_dtype(series.dtype):
+            return
+        values = series.to_numpy()
+        if not np.isin(values, (0, 1)).all():
+            raise SchemaError(f"Column '{series.name}' is a 0/1 flag but holds other values")
+    elif target.startswith('int'):
+        values = series.to_numpy(dtype='float64')
+        info = np.iinfo(target)
+        if len(values) and (values.min() < info.min or values.max() > info.max):
+            raise SchemaError(f"Column '{series.name}' has values outside the {target} range "
+                              f"[{info.min}, {info.max}]: {values.min():g} ... {values.max():g}")
+        if not np.array_equal(values, np.round(values)):
+            raise SchemaError(f"Column '{series.name}' holds fractional values; {target} cannot hold them")
+
+
+def schema_dtypes(df, float32=False):
+    """{column: schema dtype} for the columns of ``df`` that the schema covers."""
+    dtypes = {}
+    for column, dtype in df.dtypes.items():
+        target = column_dtype(column, dtype, float32=float32)
+        if target is not None:
+            dtypes[column] = target
+    return dtypes
+
+
+def apply_schema(df, float32=False):
+    """
+    Cast ``df`` to the schema dtypes after checking every value fits.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Any stage's dataset; columns the schema does not know are kept
+    float32 : bool
+        Also narrow float features to float32 (final and enhanced datasets)
+
+    Returns:
+    --------
+    df : pd.DataFrame
+        A new frame sharing the columns already in their schema dtype
+        (``df`` itself if nothing changes)
+    """
+    changes = {}
+    for column, target in schema_dtypes(df, float32=float32).items():
+        if str(df[column].dtype) != target:
+            _check_fits(df[column], target)
+            changes[column] = target
+    return df.astype(changes, copy=False) if changes else df
+
+
+def validate_schema(df, float32=False):
+    """Raise SchemaError if a column of ``df`` is not in its schema dtype."""
+    wrong = {column: f"{df[column].dtype} (expected {target})"
+             for column, target in schema_dtypes(df, float32=float32).items()
+             if str(df[column].dtype) != target}
+    if wrong:
+        raise SchemaError("Columns not in their schema dtype: "
+                          + ", ".join(f"{column} {problem}" for column, problem in wrong.items()))
@@ -0,0 +1,154 @@
+"""
+Feature Kernels - Lag, Rolling and EWM Features per Store/Dept Series
+=====================================================================
+Computes the per-series window features of Stage 1 (step 1.3.2) and
+Stage 2 (step 2.2) over a whole frame at once instead of through
+``groupby(...).transform(lambda x: ...)``, which calls Python once per
+group (~3,300 Store/Dept series) for every feature.
+
+The frame must be sorted by its group keys. Group boundaries are found
+once; each feature is then one pass over the full column:
+- lags and differences: shifted arrays, masked at group starts
+- rolling mean/std/min/max: pandas' own rolling aggregations with window
+  bounds clipped at group starts (the same compiled code the per-group
+  version runs, so results are bit-for-bit identical)
+- EWM mean (adjust=False): the pandas recurrence, advanced for all groups
+  together one position at a time
+
+"""
+
+import numpy as np
+import pandas as pd
+from pandas.api.indexers import BaseIndexer
+
+
+class _GroupWindowIndexer(BaseIndexer):
+    """Trailing windows of ``window_size`` rows that never reach back past the row's group start."""
+
+    def get_window_bounds(self, num_values=0, min_periods=None, center=None, closed=None, step=None):
+        end = np.arange(1, num_values + 1, dtype=np.int64)
+        start = np.maximum(end - self.window_size, self.group_starts)
+        return start, end
+
+
+class GroupWindows:
+    """
+    Group boundaries of a frame sorted by its group keys, and the window
+    features computed over them.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Rows of each group contiguous and in time order (e.g. sorted by
+        Store, Dept, Date)
+    keys : list of str
+        Group key columns
+    """
+
+    def __init__(self, df, keys=('Store', 'Dept')):
+        keys = list(keys)
+        n = len(df)
+        is_start = np.zeros(n, dtype=bool)
+        if n:
+            is_start[0] = True
+            for key in keys:
+                values = df[key].to_numpy()
+                is_start[1:] |= values[1:] != values[:-1]
+        starts = np.flatnonzero(is_start)
+        if len(starts) != len(df[keys].drop_duplicates()):
+            raise ValueError(f"Rows of each {'/'.join(keys)} group must be contiguous (sort the frame first)")
+
+        self.n_rows = n
+        self.n_groups = len(starts)
+        # Row -> first row of its group, and row -> position within its group
+        sizes = np.diff(np.append(starts, n))
+        self.group_starts = np.repeat(starts, sizes)
+        self.positions = np.arange(n) - self.group_starts
+        self._by_position = None
+
+    @staticmethod
+    def _values(values):
+        return np.asarray(values, dtype='float64')
+
+    @staticmethod
+    def _float_values(values):
+        """``values`` as a float array, keeping float32 as pandas' shift and diff do."""
+        values = np.asarray(values)
+        return values if values.dtype.kind == 'f' else values.astype('float64')
+
+    def lag(self, values, periods=1):
+        """``values`` shifted down ``periods`` rows within each group (NaN before the group's start)."""
+        values = self._float_values(values)
+        out = np.full(self.n_rows, np.nan, dtype=values.dtype)
+        out[periods:] = values[:-periods] if periods else values
+        out[self.positions < periods] = np.nan
+        return out
+
+    def diff(self, values, periods=1):
+        """``values`` minus its lag, as groupby(...).diff()."""
+        return self._float_values(values) - self.lag(values, periods)
+
+    def rolling(self, values, window, how='mean', min_periods=1):
+        """
+        Trailing rolling statistic within each group.
+
+        Parameters:
+        -----------
+        values : array-like
+            Column in the frame's row order
+        window : int
+            Window length in rows
+        how : str
+            'mean', 'std', 'min', 'max' or 'sum'
+        min_periods : int
+            Rows required for a value (NaN otherwise)
+        """
+        indexer = _GroupWindowIndexer(window_size=window, group_starts=self.group_starts)
+        roll = pd.Series(self._values(values)).rolling(indexer, min_periods=min_periods)
+        return getattr(roll, how)().to_numpy()
+
+    def _rows_by_position(self):
+        """Row indices grouped by position within their group: [rows at 0, rows at 1, ...]."""
+        if self._by_position is None:
+            order = np.argsort(self.positions, kind='stable')
+            counts = np.bincount(self.positions) if self.n_rows else np.zeros(0, dtype=np.int64)
+            self._by_position = np.split(order, np.cumsum(counts)[:-1])
+        return self._by_position
+
+    def ewm_mean(self, values, span):
+        """
+        Exponentially weighted mean within each group, as
+        ``x.ewm(span=span, adjust=False).mean()`` per group.
+
+        Follows pandas' recurrence (including its NaN handling) operation for
+        operation: w = (old_wt * w + alpha * x) / (old_wt + alpha) with
+        old_wt = 1 - alpha after every observation.
+        """
+        values = self._values(values)
+        alpha = 1. / (1. + (span - 1) / 2.0)
+        old_wt_factor = 1. - alpha
+        new_wt = alpha
+
+        out = np.empty(self.n_rows)
+        old_wt = np.ones(self.n_rows)
+        by_position = self._rows_by_position()
+        if not by_position:
+            return out
+        out[by_position[0]] = values[by_position[0]]
+        for rows in by_position[1:]:
+            weighted = out[rows - 1]
+            wt = old_wt[rows - 1]
+            cur = values[rows]
+            is_observation = ~np.isnan(cur)
+            has_weighted = ~np.isnan(weighted)
+
+            wt = np.where(has_weighted, wt * old_wt_factor, wt)
+            update = has_weighted & is_observation & (weighted != cur)
+            blended = (wt * weighted + new_wt * cur) / (wt + new_wt)
+            weighted = np.where(update, blended, weighted)
+            weighted = np.where(~has_weighted & is_observation, cur, weighted)
+            wt = np.where(has_weighted & is_observation, 1., wt)
+
+            out[rows] = weighted
+            old_wt[rows] = wt
+        return out
@@ -0,0 +1,155 @@
+"""
+Synthetic Walmart Data - Scale the Raw Dataset for Benchmarking
+===============================================================
+Writes a raw dataset in the layout of the Walmart competition files
+(train.csv, test.csv, stores.csv and features.csv) with ``--scale`` times
+as many stores, as a stand-in for several regions of the same chain.
+
+Replica 0 is the original data unchanged; replica r holds stores
+``Store + r * 45`` with, per store:
+- Size scaled by a factor in [0.8, 1.2]
+- Weekly_Sales scaled by a factor in [0.7, 1.3], plus 5% noise per week
+- Temperature shifted, Fuel_Price / CPI scaled and Unemployment shifted
+  slightly; MarkDowns scaled by a factor in [0.5, 1.5] (missing ones stay
+  missing)
+
+Departments, dates and holidays are those of the original store. Replicas
+are generated and appended one at a time, so memory stays at the size of
+the original data whatever the scale. Run the result with
+streaming_pipeline.py --data-dir.
+
+IMPORTANT: Must be run from the project root directory.
+Usage: python stage1/generate_synthetic_data.py --scale 10 [--output-dir DIR] [--seed 0]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+stage1_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, stage1_dir)
+
+import step_1_1_data_loading_merging as step_1_1
+
+# Store ids must fit the int16 Store column of data_schema.py
+MAX_STORE_ID = np.iinfo(np.int16).max
+
+
+def default_output_dir(scale):
+    return os.path.join('stage1', 'datasets', f'synthetic_x{scale}')
+
+
+def load_original(base_path=step_1_1.BASE_PATH):
+    """The four raw tables of the original dataset."""
+    return {
+        'train': pd.read_csv(os.path.join(base_path, 'train.csv')),
+        'test': pd.read_csv(os.path.join(base_path, 'test.csv')),
+        'stores': pd.read_csv(os.path.join(base_path, 'stores.csv')),
+        'features': step_1_1.read_features(step_1_1.features_path(base_path)),
+    }
+
+
+def make_replica(original, replica, seed=0):
+    """
+    One replica of every table (replica 0 is the original data).
+
+    Parameters:
+    -----------
+    original : dict of pd.DataFrame
+        Tables from load_original
+    replica : int
+        Replica number; its stores are offset by replica * number of stores
+    seed : int
+        Random seed (the same seed and replica always give the same data)
+    """
+    if replica == 0:
+        return {name: table.copy() for name, table in original.items()}
+
+    rng = np.random.default_rng([seed, replica])
+    stores = original['stores']
+    offset = replica * len(stores)
+
+    # Per-store factors, looked up by original store id
+    factors = pd.DataFrame({
+        'Store': stores['Store'],
+        'size': rng.uniform(0.8, 1.2, len(stores)),
+        'sales': rng.uniform(0.7, 1.3, len(stores)),
+        'temperature': rng.normal(0, 5, len(stores)),
+        'fuel': rng.uniform(0.95, 1.05, len(stores)),
+        'cpi': rng.uniform(0.95, 1.05, len(stores)),
+        'unemployment': rng.uniform(-1, 1, len(stores)),
+        'markdown': rng.uniform(0.5, 1.5, len(stores)),
+    }).set_index('Store')
+
+    out = {}
+    s = stores.copy()
+    s['Size'] = (s['Size'] * factors.loc[s['Store'], 'size'].to_numpy()).round().astype(np.int64)
+    out['stores'] = s
+
+    f = original['features'].copy()
+    per_store = factors.loc[f['Store']]
+    f['Temperature'] = (f['Temperature'] + per_store['temperature'].to_numpy()).round(2)
+    f['Fuel_Price'] = (f['Fuel_Price'] * per_store['fuel'].to_numpy()).round(3)
+    f['CPI'] = f['CPI'] * per_store['cpi'].to_numpy()
+    f['Unemployment'] = (f['Unemployment'] + per_store['unemployment'].to_numpy()).clip(lower=2.0).round(3)
+    for i in range(1, 6):
+        f[f'MarkDown{i}'] = (f[f'MarkDown{i}'] * per_store['markdown'].to_numpy()).round(2)
+    out['features'] = f
+
+    t = original['train'].copy()
+    noise = 1 + rng.normal(0, 0.05, len(t))
+    t['Weekly_Sales'] = (t['Weekly_Sales'] * factors.loc[t['Store'], 'sales'].to_numpy() * noise).round(2)
+    out['train'] = t
+
+    out['test'] = original['test'].copy()
+    for table in out.values():
+        table['Store'] = table['Store'] + offset
+    return out
+
+
+def generate(scale, output_dir, seed=0, base_path=step_1_1.BASE_PATH):
+    """Write ``scale`` replicas of the original dataset to output_dir; returns rows per table."""
+    original = load_original(base_path)
+    if scale * len(original['stores']) > MAX_STORE_ID:
+        raise ValueError(f"--scale {scale} needs store ids above {MAX_STORE_ID}")
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.makedirs(output_dir)
+    rows = dict.fromkeys(original, 0)
+    for replica in range(scale):
+        for name, table in make_replica(original, replica, seed).items():
+            if 'Date' in table.columns:
+                table['Date'] = pd.to_datetime(table['Date']).dt.strftime('%Y-%m-%d')
+            table.to_csv(os.path.join(output_dir, f'{name}.csv'), index=False,
+                         mode='w' if replica == 0 else 'a', header=replica == 0)
+            rows[name] += len(table)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, required=True, help='copies of the 45 stores (10-100 for benchmarks)')
+    parser.add_argument('--output-dir', help='destination directory (default stage1/datasets/synthetic_x<scale>)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+    output_dir = args.output_dir or default_output_dir(args.scale)
+
+    print("=" * 70)
+    print(f"SYNTHETIC WALMART DATA: {args.scale}x STORES")
+    print("=" * 70)
+    start = time.perf_counter()
+    rows = generate(args.scale, output_dir, seed=args.seed)
+    for name, count in rows.items():
+        path = os.path.join(output_dir, f'{name}.csv')
+        print(f"   {name + '.csv':<14}{count:>14,} rows {os.path.getsize(path) / 1e6:>10,.1f} MB")
+    print(f"\nWritten to {output_dir} in {time.perf_counter() - start:.1f}s")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Partitioned Executor - Per-Store Feature Functions in a Process Pool
+====================================================================
+Runs a feature function on partitions of whole stores in worker processes
+and reassembles the columns it adds in the frame's original row order.
+The lag and rolling features of step 1.3.2 and the rolling, promotional
+and time-aggregation features of step 2.2 only read rows of their own
+Store (or Store/Dept), so every partition gets the values the whole frame
+would.
+
+Frames are handed over in shared memory as Arrow IPC streams:
+- the columns the function reads are written once to a segment; each
+  worker maps it and converts only its own rows (a zero-copy Arrow slice)
+- each worker writes the columns the function added to a segment of its
+  own, which this process maps, concatenates and unlinks
+
+With one worker (the default; see FEATURE_WORKERS) the function is simply
+called on the whole frame, in this process. Workers are spawned, not
+forked (forking a multi-threaded pipeline runner can deadlock), so feature
+functions must be module-level and importable, and scripts using the
+executor need an ``if __name__ == "__main__":`` guard.
+"""
+
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Environment variable with the default number of worker processes (1: no pool)
+WORKERS_ENV = 'FEATURE_WORKERS'
+
+# Partitions per worker, so that workers finishing early pick up more stores
+PARTITIONS_PER_WORKER = 4
+
+
+def default_workers():
+    """Worker processes from the FEATURE_WORKERS environment variable (1 if unset)."""
+    return max(1, int(os.environ.get(WORKERS_ENV, '1')))
+
+
+def plan_partitions(keys, n_partitions):
+    """
+    Split rows grouped by key into contiguous ranges of whole keys.
+
+    Parameters:
+    -----------
+    keys : ndarray
+        Key of every row (e.g. Store), rows of each key contiguous
+    n_partitions : int
+        Ranges wanted; fewer are returned when there are fewer keys
+
+    Returns:
+    --------
+    bounds : list of (start, stop)
+        Row ranges of about equal size, each starting at a key's first row
+    """
+    n = len(keys)
+    if n == 0:
+        return []
+    key_starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    targets = np.arange(1, n_partitions) * n / n_partitions
+    cuts = np.append(key_starts, n)[np.searchsorted(key_starts, targets)]
+    edges = np.unique(np.r_[0, cuts, n])
+    return [(int(start), int(stop)) for start, stop in zip(edges[:-1], edges[1:])]
+
+
+def _write_ipc(table, buffer):
+    stream = pa.FixedSizeBufferWriter(buffer)
+    with pa.ipc.new_stream(stream, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _publish(table):
+    """Write ``table`` to a new shared-memory segment; returns (segment, (name, size))."""
+    sink = pa.MockOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    size = sink.size()
+    segment = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    _write_ipc(table, pa.py_buffer(segment.buf[:size]))
+    return segment, (segment.name, size)
+
+
+def _attach(spec):
+    """Map a segment written by ``_publish``; returns (segment, Arrow table viewing it)."""
+    name, size = spec
+    segment = shared_memory.SharedMemory(name=name)
+    table = pa.ipc.open_stream(pa.py_buffer(segment.buf[:size])).read_all()
+    return segment, table
+
+
+def _attach_all(specs, segments):
+    """Arrow tables of several segments, appending each mapping to ``segments``."""
+    tables = []
+    for spec in specs:
+        segment, table = _attach(spec)
+        segments.append(segment)
+        tables.append(table)
+    return tables
+
+
+def _release(segment, unlink=False):
+    segment.close()
+    if unlink:
+        segment.unlink()
+
+
+def _run_partition(func, source, start, stop, kwargs):
+    """
+    Worker: run ``func`` on rows [start, stop) of the source segment.
+
+    Returns the spec of a new segment holding the columns ``func`` added;
+    the calling process owns (and unlinks) it.
+    """
+    segment, table = _attach(source)
+    part = table.slice(start, stop - start).to_pandas()
+    del table
+    _release(segment)
+
+    inputs, rows = set(part.columns), len(part)
+    result = func(part, **kwargs)
+    if len(result) != rows:
+        raise ValueError(f"{func.__name__} returned {len(result)} rows for a partition of {rows}")
+    added = [column for column in result.columns if column not in inputs]
+    output, spec = _publish(pa.Table.from_pandas(result[added], preserve_index=False))
+    _release(output)
+    return spec
+
+
+class PartitionedExecutor:
+    """
+    Process pool running feature functions partition by partition.
+
+    ``func(df, **kwargs)`` must return the rows of ``df`` in the same order,
+    only adding columns, and a row's values may only depend on rows of the
+    same partition key. Use as a context manager (or call ``close``) to stop
+    the workers.
+
+    Parameters:
+    -----------
+    workers : int, optional
+        Worker processes; 1 calls functions directly on the whole frame
+        (default: FEATURE_WORKERS environment variable, else 1)
+    key : str
+        Partition column; rows of one key are never split
+    """
+
+    def __init__(self, workers=None, key='Store'):
+        self.workers = default_workers() if workers is None else max(1, int(workers))
+        self.key = key
+        self._pool = None
+
+    def map(self, df, func, columns=None, **kwargs):
+        """
+        ``func(df, **kwargs)``, computed partition by partition.
+
+        Parameters:
+        -----------
+        df : pd.DataFrame
+            Frame to compute features for; with one worker it is passed to
+            ``func`` itself, otherwise it is not modified
+        func : callable
+            Module-level feature function
+        columns : list of str, optional
+            Columns ``func`` reads (default all); only these are handed to
+            the workers
+        **kwargs
+            Passed on to ``func``
+
+        Returns:
+        --------
+        result : pd.DataFrame
+            ``df`` with the columns ``func`` added (same-named columns are
+            replaced), in the original row order and index
+        """
+        if self.workers <= 1 or len(df) == 0:
+            return func(df, **kwargs)
+
+        source = df if columns is None else df[list(dict.fromkeys([self.key, *columns]))]
+        keys = source[self.key].to_numpy()
+        order = None
+        if (keys[1:] < keys[:-1]).any():
+            order = np.argsort(keys, kind='stable')
+            source, keys = source.take(order), keys[order]
+        bounds = plan_partitions(keys, self.workers * PARTITIONS_PER_WORKER)
+
+        table = pa.Table.from_pandas(source, preserve_index=False)
+        del source
+        segment, spec = _publish(table)
+        del table
+        try:
+            pool = self._executor()
+            futures = [pool.submit(_run_partition, func, spec, start, stop, kwargs) for start, stop in bounds]
+            wait(futures)
+        finally:
+            _release(segment, unlink=True)
+        added = self._collect(futures)
+        if not len(added.columns):
+            return df.copy(deep=False)
+
+        if order is not None:
+            inverse = np.empty_like(order)
+            inverse[order] = np.arange(len(order))
+            added = added.take(inverse)
+        added.index = df.index
+        result = df.copy(deep=False)
+        replaced = [column for column in added.columns if column in result.columns]
+        for column in replaced:
+            result[column] = added[column]
+        new = added.drop(columns=replaced)
+        return pd.concat([result, new], axis=1) if len(new.columns) else result
+
+    @staticmethod
+    def _collect(futures):
+        """Concatenate the partitions' added columns and unlink their segments (also on failure)."""
+        segments = []
+        try:
+            tables = _attach_all([future.result() for future in futures if future.exception() is None], segments)
+            for future in futures:
+                if future.exception() is not None:
+                    raise future.exception()
+            return pa.concat_tables(tables).to_pandas()
+        finally:
+            tables = None
+            for segment in segments:
+                _release(segment, unlink=True)
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=mp.get_context('spawn'))
+        return self._pool
+
+    def close(self):
+        """Stop the worker processes."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
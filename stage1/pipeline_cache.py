@@ -0,0 +1,402 @@
+"""
+Pipeline Step Cache - Content-Hash Caching for Stage 1 and Stage 2
+==================================================================
+Caches each pipeline step's outputs under a key derived from:
+- the step's code (its source file and the project modules it uses,
+  transitively) and parameters
+- the content of the files it reads (sources)
+- the keys of the steps producing its inputs (so a change upstream
+  invalidates everything downstream, and nothing else)
+- the pandas and NumPy versions
+
+DataFrame and other in-memory outputs are pickled; files a step writes
+(plots, reports) are fingerprinted so a hit requires them to be unchanged.
+
+Inspect or purge the cache from the project root:
+    python stage1/pipeline_cache.py              # list entries
+    python stage1/pipeline_cache.py --purge      # delete everything
+    python stage1/pipeline_cache.py --purge --stale   # keep the newest entry per step
+    python stage1/pipeline_cache.py --purge --step 1.3.2
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(PROJECT_ROOT, '.pipeline_cache')
+
+# Bump to invalidate every entry when the cache layout or key scheme changes
+CACHE_FORMAT_VERSION = 2
+
+# Directories holding the project's own modules; a step's code version
+# covers every module from these that its module uses (see code_files)
+LOCAL_CODE_DIRS = tuple(os.path.join(PROJECT_ROOT, stage) for stage in ('stage1', 'stage2', 'stage3'))
+
+# Modules shaping every step's output (part of every step's code version)
+SHARED_CODE = (
+    os.path.join(PROJECT_ROOT, 'stage1', 'data_schema.py'),
+    os.path.join(PROJECT_ROOT, 'stage3', 'ML_models', 'Feature_Pipeline.py'),
+    os.path.join(PROJECT_ROOT, 'stage3', 'ML_models', 'Feature_Engineering.py'),
+    os.path.join(PROJECT_ROOT, 'stage3', 'ML_models', 'Holiday_Calendar.py'),
+    os.path.join(PROJECT_ROOT, 'stage3', 'ML_models', 'Normalization.py'),
+)
+
+# Marks the directory an entry is written to before it is renamed into place
+# (<key>.tmp-<pid>-<thread id>)
+STAGING_MARKER = '.tmp-'
+
+_DIGEST_SIZE = 16
+_READ_BLOCK = 1 << 20
+
+
+def _hasher():
+    return hashlib.blake2b(digest_size=_DIGEST_SIZE)
+
+
+def digest_of(*parts):
+    """Hex digest of JSON-serializable parts."""
+    h = _hasher()
+    h.update(json.dumps(parts, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+def file_digest(path):
+    """Hex digest of a file's content ('missing' if it does not exist)."""
+    if not os.path.exists(path):
+        return 'missing'
+    h = _hasher()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_READ_BLOCK), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _local_source(obj):
+    """Source file of a module, function or class of the project (None otherwise)."""
+    try:
+        path = inspect.getsourcefile(obj)
+    except TypeError:
+        return None
+    if path is None:
+        return None
+    path = os.path.abspath(path)
+    if 'site-packages' in path or not path.startswith(tuple(d + os.sep for d in LOCAL_CODE_DIRS)):
+        return None
+    return path
+
+
+def local_modules(module):
+    """
+    Source files of ``module`` and of the project modules it uses, transitively.
+
+    A module is used when it, or a function or class defined in it, is
+    bound in the using module's namespace (``import x``, ``from x import f``).
+    """
+    files = {}
+    pending = [module]
+    while pending:
+        module = pending.pop()
+        path = _local_source(module)
+        if path is None or path in files:
+            continue
+        files[path] = module
+        for value in list(vars(module).values()):
+            if inspect.ismodule(value):
+                pending.append(value)
+            elif inspect.isfunction(value) or inspect.isclass(value):
+                owner = inspect.getmodule(value)
+                if owner is not None:
+                    pending.append(owner)
+    return sorted(files)
+
+
+def code_files(func):
+    """
+    Code version of ``func``: the source file defining it, the project
+    modules that file uses (see local_modules) and SHARED_CODE.
+    """
+    module = inspect.getmodule(func)
+    files = local_modules(module) if module is not None else []
+    if not files:
+        files = [inspect.getsourcefile(func)]
+    return list(dict.fromkeys([*files, *SHARED_CODE]))
+
+
+def value_digest(value):
+    """Hex digest of an in-memory artifact supplied to a pipeline run."""
+    h = _hasher()
+    if isinstance(value, pd.DataFrame):
+        h.update(json.dumps([list(map(str, value.columns)), list(map(str, value.dtypes))]).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    else:
+        h.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    return h.hexdigest()
+
+
+def file_fingerprints(paths):
+    """{file: [size, mtime_ns]} for files and every file below directories."""
+    fingerprints = {}
+    for path in paths:
+        files = [path]
+        if os.path.isdir(path):
+            files = [os.path.join(root, name) for root, _, names in os.walk(path) for name in names]
+        for file in files:
+            if os.path.isfile(file):
+                stat = os.stat(file)
+                fingerprints[os.path.abspath(file)] = [stat.st_size, stat.st_mtime_ns]
+    return fingerprints
+
+
+def file_sizes(path):
+    """Total size in bytes of the files below a directory."""
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+def _process_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def library_versions():
+    """Versions whose changes can alter step results."""
+    return {'pandas': pd.__version__, 'numpy': np.__version__}
+
+
+def pickle_safe(df):
+    """
+    Shallow copy of ``df`` that can be pickled while other threads read ``df``.
+
+    Datetime arrays pickle their cache of computed properties, which threads
+    reading the shared frame add to (pickle fails if a dict grows while it is
+    being written). The copy gets new array objects over the same data.
+    """
+    df = df.copy(deep=False)
+    for column in df.select_dtypes(['datetime', 'datetimetz', 'timedelta']).columns:
+        df[column] = df[column].array.view()
+    return df
+
+
+class StepCache:
+    """
+    On-disk store of step outputs keyed by step key.
+
+    Layout: ``<root>/<key>/meta.json`` plus one pickle per output artifact,
+    and ``<root>/materialized.json`` recording which artifact each
+    materialized file was written from.
+
+    Parameters:
+    -----------
+    root : str
+        Cache directory (created on first store)
+    """
+
+    def __init__(self, root=CACHE_DIR):
+        self.root = root
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key)
+
+    def lookup(self, key):
+        """Metadata of a valid entry, or None (counted as hit or miss)."""
+        meta_path = os.path.join(self._entry_dir(key), 'meta.json')
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = None
+        if meta is not None:
+            # Files the step wrote must still be exactly what it wrote
+            if file_fingerprints(meta['files']) != meta['files']:
+                meta = None
+        with self._lock:
+            if meta is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return meta
+
+    def load(self, key, artifact):
+        """Unpickle one cached output."""
+        with open(os.path.join(self._entry_dir(key), f'{artifact}.pkl'), 'rb') as f:
+            return pickle.load(f)
+
+    def store(self, key, step_name, outputs, files=()):
+        """
+        Save a step's outputs and the fingerprints of the files it wrote.
+
+        The entry is written to a temporary directory and renamed into
+        place, so readers never see a partial entry; the directory is
+        removed if writing fails.
+        """
+        final = self._entry_dir(key)
+        staging = f'{final}{STAGING_MARKER}{os.getpid()}-{threading.get_ident()}'
+        os.makedirs(staging, exist_ok=True)
+        try:
+            for artifact, value in outputs.items():
+                if isinstance(value, pd.DataFrame):
+                    value = pickle_safe(value)
+                with open(os.path.join(staging, f'{artifact}.pkl'), 'wb') as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            meta = {
+                'step': step_name,
+                'created': time.time(),
+                'artifacts': sorted(outputs),
+                'files': file_fingerprints(files)
+            }
+            with open(os.path.join(staging, 'meta.json'), 'w') as f:
+                json.dump(meta, f, indent=2)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(staging, final)
+
+    # ------------------------------------------------------------------
+    # Materialized files
+    # ------------------------------------------------------------------
+
+    def _manifest_path(self):
+        return os.path.join(self.root, 'materialized.json')
+
+    def _read_manifest(self):
+        try:
+            with open(self._manifest_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def is_materialized(self, path, artifact_key):
+        """True if ``path`` was written from this artifact and is unchanged since."""
+        record = self._read_manifest().get(os.path.abspath(path))
+        return (record is not None and record['key'] == artifact_key
+                and file_fingerprints([path]).get(os.path.abspath(path)) == record['fingerprint'])
+
+    def record_materialized(self, written):
+        """Remember {path: artifact key} for files just written."""
+        manifest = self._read_manifest()
+        for path, artifact_key in written.items():
+            path = os.path.abspath(path)
+            manifest[path] = {'key': artifact_key, 'fingerprint': file_fingerprints([path]).get(path)}
+        os.makedirs(self.root, exist_ok=True)
+        with open(self._manifest_path(), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+    # ------------------------------------------------------------------
+    # Inspection and purging
+    # ------------------------------------------------------------------
+
+    def entries(self):
+        """One dict per entry: key, step, created, artifacts, size (bytes)."""
+        if not os.path.isdir(self.root):
+            return []
+        entries = []
+        for key in os.listdir(self.root):
+            if STAGING_MARKER in key:
+                continue
+            entry_dir = self._entry_dir(key)
+            meta_path = os.path.join(entry_dir, 'meta.json')
+            if not os.path.isfile(meta_path):
+                continue
+            with open(meta_path) as f:
+                meta = json.load(f)
+            size = sum(os.path.getsize(os.path.join(entry_dir, name)) for name in os.listdir(entry_dir))
+            entries.append({'key': key, 'size': size, **meta})
+        return sorted(entries, key=lambda e: (e['step'], e['created']))
+
+    def orphaned_staging(self):
+        """Staging directories of writers that no longer run (killed mid-store)."""
+        if not os.path.isdir(self.root):
+            return []
+        orphans = []
+        for name in os.listdir(self.root):
+            if STAGING_MARKER not in name:
+                continue
+            owner = name.split(STAGING_MARKER, 1)[1].split('-', 1)[0]
+            if owner.isdigit() and (int(owner) == os.getpid() or _process_running(int(owner))):
+                continue
+            orphans.append(os.path.join(self.root, name))
+        return orphans
+
+    def purge(self, step=None, stale_only=False):
+        """
+        Delete entries; returns (entries removed, bytes freed).
+
+        Without ``step``, staging directories left behind by writers that
+        died mid-store are deleted too (and counted as entries).
+
+        Parameters:
+        -----------
+        step : str, optional
+            Only entries of this step
+        stale_only : bool
+            Keep the newest entry of each step
+        """
+        entries = self.entries()
+        if step is not None:
+            entries = [e for e in entries if e['step'] == step]
+        if stale_only:
+            newest = {}
+            for entry in entries:
+                if entry['created'] > newest.get(entry['step'], {'created': -1})['created']:
+                    newest[entry['step']] = entry
+            entries = [e for e in entries if newest[e['step']] is not e]
+        for entry in entries:
+            shutil.rmtree(self._entry_dir(entry['key']), ignore_errors=True)
+        orphans = self.orphaned_staging() if step is None else []
+        freed = sum(e['size'] for e in entries) + sum(file_sizes(orphan) for orphan in orphans)
+        for orphan in orphans:
+            shutil.rmtree(orphan, ignore_errors=True)
+        if step is None and not stale_only and os.path.exists(self._manifest_path()):
+            os.remove(self._manifest_path())
+        return len(entries) + len(orphans), freed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='cache directory')
+    parser.add_argument('--purge', action='store_true', help='delete entries instead of listing them')
+    parser.add_argument('--step', help='only entries of this step (e.g. 1.3.2)')
+    parser.add_argument('--stale', action='store_true', help='with --purge: keep the newest entry of each step')
+    args = parser.parse_args()
+
+    cache = StepCache(args.cache_dir)
+    if args.purge:
+        removed, freed = cache.purge(step=args.step, stale_only=args.stale)
+        print(f"🗑️  Removed {removed} cache entries ({freed / 1e6:,.1f} MB) from {args.cache_dir}")
+        return
+
+    entries = [e for e in cache.entries() if args.step is None or e['step'] == args.step]
+    print("="*70)
+    print(f"PIPELINE CACHE: {args.cache_dir}")
+    print("="*70)
+    print(f"{'step':<8}{'key':<34}{'created':<21}{'size (MB)':>10}  outputs")
+    print("-"*70)
+    for entry in entries:
+        created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['created']))
+        outputs = ', '.join(entry['artifacts']) or f"{len(entry['files'])} files"
+        print(f"{entry['step']:<8}{entry['key']:<34}{created:<21}{entry['size'] / 1e6:>10,.1f}  {outputs}")
+    print("-"*70)
+    print(f"{len(entries)} entries, {sum(e['size'] for e in entries) / 1e6:,.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
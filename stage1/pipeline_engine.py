@@ -0,0 +1,383 @@
+"""
+Stage 1 Pipeline Engine - In-Process DAG Execution
+==================================================
+Runs pipeline steps declared as functions with named inputs and outputs.
+
+- DataFrames are passed between steps in memory instead of through CSV files
+- Steps whose inputs are ready run concurrently (threads, or a separate
+  process for steps marked isolated, e.g. matplotlib plotting)
+- Outputs are written to disk only when requested (materialization)
+- Intermediate results are released as soon as no remaining step needs them
+- With a StepCache (pipeline_cache.py), steps whose code, parameters and
+  inputs are unchanged are not run at all
+
+"""
+
+import json
+import multiprocessing as mp
+import os
+import runpy
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+from data_io import write_dataset
+from pipeline_cache import (CACHE_FORMAT_VERSION, PROJECT_ROOT, SHARED_CODE, code_files, digest_of, file_digest,
+                            library_versions, pickle_safe, value_digest)
+
+
+class PipelineError(RuntimeError):
+    """Raised when a required step fails or the step graph is invalid"""
+
+
+class Step:
+    """
+    One pipeline step: a function from named input artifacts to named outputs.
+
+    Parameters:
+    -----------
+    name : str
+        Unique step name (e.g. '1.3.2')
+    func : callable
+        Module-level function called with the input artifacts as positional
+        arguments. It must not modify its inputs, which other steps may be
+        reading at the same time.
+    inputs : tuple of str
+        Artifact names passed to ``func``
+    outputs : tuple of str
+        Artifact names given to the return value: no outputs ignores it, one
+        output takes it whole, several unpack a tuple
+    description : str
+        Human-readable title for progress messages
+    optional : bool
+        A failure is reported and the pipeline continues without the step's
+        outputs (steps that need them are skipped)
+    isolated : bool
+        Run in a separate process. Use for steps relying on global state that
+        is not thread-safe, such as matplotlib.pyplot.
+    params : dict, optional
+        Keyword arguments for ``func`` (part of the cache key)
+    sources : tuple of str
+        Files the step reads itself; their content is part of the cache key
+    files : tuple of str
+        Files or directories the step writes; a cache hit requires them to
+        be unchanged since the cached run
+    code : tuple of str, optional
+        Source files defining the step's behaviour (cache key); defaults to
+        the file defining ``func`` and the project modules it uses
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), description='', optional=False, isolated=False,
+                 params=None, sources=(), files=(), code=None):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.description = description or name
+        self.optional = optional
+        self.isolated = isolated
+        self.params = dict(params or {})
+        self.sources = tuple(sources)
+        self.files = tuple(files)
+        self.code = tuple(code) if code is not None else tuple(code_files(func))
+
+    def unpack(self, result):
+        """Map a return value of ``func`` to {output name: value}."""
+        if not self.outputs:
+            return {}
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}
+        if not isinstance(result, tuple) or len(result) != len(self.outputs):
+            raise PipelineError(f"Step {self.name} must return {len(self.outputs)} values {self.outputs}")
+        return dict(zip(self.outputs, result))
+
+    def __repr__(self):
+        return f"Step({self.name!r}, inputs={self.inputs}, outputs={self.outputs})"
+
+
+def write_artifact(value, path):
+    """Write an artifact to disk: DataFrames as Parquet or CSV (by suffix), anything else as JSON."""
+    if isinstance(value, pd.DataFrame):
+        write_dataset(value, path)
+    else:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(value, f, indent=2)
+
+
+def run_script(*upstream, script):
+    """
+    Step function running a standalone script as ``__main__`` in this process.
+
+    The upstream artifacts only order the step after the steps it depends
+    on; the script reads its inputs from disk. Returns the script path.
+    """
+    runpy.run_path(script, run_name='__main__')
+    return script
+
+
+def script_step(name, script, code=(), **kwargs):
+    """Step running ``script`` (see run_script); the script, the ``code`` modules and SHARED_CODE are its code version."""
+    return Step(name, run_script, params={'script': script}, code=(script, *code, *SHARED_CODE), **kwargs)
+
+
+def artifact_key(step_key, artifact):
+    """Cache identity of one output of a step."""
+    return digest_of(step_key, artifact)
+
+
+def _timed_call(func, args, kwargs):
+    """Call ``func(*args, **kwargs)``; returns (result, seconds). Module-level so processes can run it."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+class Pipeline:
+    """
+    A DAG of Steps, validated on construction.
+
+    Parameters:
+    -----------
+    steps : list of Step
+        Steps in any order; the dependency order comes from their inputs
+        and outputs
+    """
+
+    def __init__(self, steps):
+        self.steps = {}
+        self.producers = {}
+        for step in steps:
+            if step.name in self.steps:
+                raise PipelineError(f"Duplicate step name '{step.name}'")
+            self.steps[step.name] = step
+            for output in step.outputs:
+                if output in self.producers:
+                    raise PipelineError(f"Artifact '{output}' is produced by both "
+                                        f"{self.producers[output]} and {step.name}")
+                self.producers[output] = step.name
+        self.order = self._topological_order()
+
+    def _topological_order(self):
+        """Step names ordered so every step follows the producers of its inputs."""
+        order, done, visiting = [], set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise PipelineError(f"Dependency cycle through step {name}")
+            visiting.add(name)
+            for artifact in self.steps[name].inputs:
+                if artifact in self.producers:
+                    visit(self.producers[artifact])
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for name in self.steps:
+            visit(name)
+        return order
+
+    def consumers(self, artifact):
+        """Names of the steps that take ``artifact`` as an input."""
+        return [name for name, step in self.steps.items() if artifact in step.inputs]
+
+    def step_keys(self, artifacts=None):
+        """
+        Cache key of every step.
+
+        A key covers the step's code, parameters and source file contents,
+        the keys of the steps producing its inputs (or the content of
+        supplied artifacts) and the pandas/NumPy versions, so editing one
+        step changes its key and those of its descendants only.
+        """
+        supplied = {a: value_digest(v) for a, v in (artifacts or {}).items()}
+        versions = library_versions()
+        digests = {}
+
+        def digest(path):
+            if path not in digests:
+                digests[path] = file_digest(path)
+            return digests[path]
+
+        keys = {}
+        for name in self.order:
+            step = self.steps[name]
+            inputs = {a: artifact_key(keys[self.producers[a]], a) if a in self.producers else supplied[a]
+                      for a in step.inputs}
+            keys[name] = digest_of(
+                CACHE_FORMAT_VERSION, name, step.func.__qualname__,
+                {os.path.relpath(path, PROJECT_ROOT): digest(path) for path in step.code},
+                step.params,
+                {path: digest(path) for path in step.sources},
+                inputs, step.outputs, versions
+            )
+        return keys
+
+    def run(self, artifacts=None, materialize=None, keep=None, max_workers=4, cache=None, log=print):
+        """
+        Execute the pipeline.
+
+        Parameters:
+        -----------
+        artifacts : dict, optional
+            Artifacts supplied up front (inputs no step produces)
+        materialize : dict, optional
+            {artifact name: path or tuple of paths} written to disk (in the
+            background) as soon as the artifact is produced
+        keep : iterable of str, optional
+            Artifacts to return; defaults to those no step consumes. Other
+            artifacts are released once their last consumer has finished.
+        max_workers : int
+            Steps run concurrently
+        cache : StepCache, optional
+            Reuse outputs of steps whose key is cached and store the outputs
+            of steps that run. Materialized files already written from the
+            same artifact are not rewritten.
+        log : callable
+            Receives progress messages
+
+        Returns:
+        --------
+        result : dict
+            'artifacts' (the kept artifacts), 'timings' ({step: seconds}),
+            'cached' (steps reused from the cache), 'failed' and 'skipped'
+            (optional steps that did not run)
+        """
+        available = dict(artifacts or {})
+        materialize = {a: (paths,) if isinstance(paths, (str, os.PathLike)) else tuple(paths)
+                       for a, paths in (materialize or {}).items()}
+        missing = [a for step in self.steps.values() for a in step.inputs
+                   if a not in self.producers and a not in available]
+        if missing:
+            raise PipelineError(f"No step produces {sorted(set(missing))} and they were not supplied")
+
+        if keep is None:
+            keep = {a for a in list(self.producers) + list(available) if not self.consumers(a)}
+        keep = set(keep)
+
+        keys, cached = {}, []
+        if cache is not None:
+            keys = self.step_keys(available)
+            cached = [name for name in self.order if cache.lookup(keys[name]) is not None]
+            for name in cached:
+                log(f"💾 [{name}] {self.steps[name].description}: cache hit")
+            # Up-to-date materialized files need neither writing nor their artifact
+            materialize = {a: paths for a, paths in materialize.items()
+                           if self.producers.get(a) not in cached
+                           or not all(cache.is_materialized(path, artifact_key(keys[self.producers[a]], a))
+                                      for path in paths)}
+        pending = [name for name in self.order if name not in cached]
+
+        # Load the cached artifacts that running steps, writes or the caller need
+        needed = {a for name in pending for a in self.steps[name].inputs} | set(materialize) | keep
+        for artifact in sorted(needed):
+            producer = self.producers.get(artifact)
+            if producer in cached:
+                available[artifact] = cache.load(keys[producer], artifact)
+        remaining_uses = {a: len([c for c in self.consumers(a) if c in pending])
+                          for a in list(self.producers) + list(available)}
+
+        running = {}
+        writes, stores = {}, []
+        timings, failed, skipped = {}, [], []
+        error = None
+
+        threads = ThreadPoolExecutor(max_workers=max_workers)
+        processes = None
+
+        def write(artifact):
+            for path in materialize.get(artifact, ()):
+                future = threads.submit(write_artifact, available[artifact], path)
+                writes[future] = (artifact, path)
+
+        try:
+            # Materialized outputs of cached steps that are missing or outdated on disk
+            for artifact in materialize:
+                if artifact in available:
+                    write(artifact)
+
+            while pending or running:
+                # Start every step whose inputs are all available
+                for name in list(pending):
+                    step = self.steps[name]
+                    if any(self.producers.get(a) in failed + skipped for a in step.inputs):
+                        pending.remove(name)
+                        skipped.append(name)
+                        log(f"⏭️  Skipping {name}: an upstream optional step did not complete")
+                        continue
+                    if error is None and all(a in available for a in step.inputs):
+                        args = tuple(available[a] for a in step.inputs)
+                        if step.isolated:
+                            # Arguments are pickled in the background while other steps read them
+                            args = tuple(pickle_safe(a) if isinstance(a, pd.DataFrame) else a for a in args)
+                            if processes is None:
+                                # spawn: a forked child of a multi-threaded process can deadlock
+                                processes = ProcessPoolExecutor(max_workers=max_workers,
+                                                                mp_context=mp.get_context('spawn'))
+                            future = processes.submit(_timed_call, step.func, args, step.params)
+                        else:
+                            future = threads.submit(_timed_call, step.func, args, step.params)
+                        running[future] = name
+                        pending.remove(name)
+                        log(f"▶️  [{name}] {step.description}")
+
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    step = self.steps[name]
+                    try:
+                        result, seconds = future.result()
+                        outputs = step.unpack(result)
+                    except Exception as e:
+                        failed.append(name)
+                        if step.optional:
+                            log(f"⚠️  [{name}] failed ({e!r}); continuing, the step is optional")
+                        else:
+                            log(f"❌ [{name}] failed: {e!r}")
+                            error = error or PipelineError(f"Step {name} failed: {e!r}")
+                            error.__cause__ = e
+                        continue
+
+                    timings[name] = seconds
+                    log(f"✅ [{name}] {step.description} completed in {seconds:.1f}s")
+                    if cache is not None:
+                        stores.append(threads.submit(cache.store, keys[name], name, outputs, step.files))
+                    for artifact, value in outputs.items():
+                        available[artifact] = value
+                        write(artifact)
+                    for artifact in step.inputs:
+                        remaining_uses[artifact] -= 1
+                        if remaining_uses[artifact] == 0 and artifact not in keep:
+                            del available[artifact]
+
+                if error is not None and not running:
+                    break
+
+            for future in stores:
+                future.result()
+            written = {}
+            for future, (artifact, path) in writes.items():
+                future.result()
+                if cache is not None:
+                    written[path] = artifact_key(keys[self.producers[artifact]], artifact)
+            if written:
+                cache.record_materialized(written)
+        finally:
+            threads.shutdown(wait=True)
+            if processes is not None:
+                processes.shutdown(wait=True)
+
+        if error is not None:
+            raise error
+        return {
+            'artifacts': {a: v for a, v in available.items() if a in keep},
+            'timings': timings,
+            'cached': cached,
+            'failed': failed,
+            'skipped': skipped + pending
+        }
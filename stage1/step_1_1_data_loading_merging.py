@@ -9,8 +9,9 @@ import pandas as pd
 import numpy as np
 import os
 
+from data_io import write_dataset
+from data_schema import apply_schema
 
-print("STEP 1.1: DATA LOADING & MERGING")
 
 # Define file paths (relative to project root directory)
 BASE_PATH = 'stage1/datasets/walmart-recruiting-store-sales-forecasting/'
@@ -18,33 +19,57 @@ TRAIN_PATH = os.path.join(BASE_PATH, 'train.csv')
 TEST_PATH = os.path.join(BASE_PATH, 'test.csv')
 STORES_PATH = os.path.join(BASE_PATH, 'stores.csv')
 FEATURES_PATH = os.path.join(BASE_PATH, 'features.xlsx')
+OUTPUT_DIR = 'stage1/processed_data/Stage1.1'
 
-print("\n[1] Loading datasets...")
-train = pd.read_csv(TRAIN_PATH)
-test = pd.read_csv(TEST_PATH)
-stores = pd.read_csv(STORES_PATH)
-features = pd.read_excel(FEATURES_PATH)
-print(f"Loaded: train {train.shape}, test {test.shape}, stores {stores.shape}, features {features.shape}")
-
-print("\n[2] Merging datasets...")
-train_full = train.merge(stores, on='Store', how='left')
-train_full['Date'] = pd.to_datetime(train_full['Date'])
-features['Date'] = pd.to_datetime(features['Date'])
-train_full = train_full.merge(features, on=['Store', 'Date', 'IsHoliday'], how='left')
-
-test['Date'] = pd.to_datetime(test['Date'])
-test_full = test.merge(stores, on='Store', how='left')
-test_full = test_full.merge(features, on=['Store', 'Date', 'IsHoliday'], how='left')
-print(f"Merged: train_full {train_full.shape}, test_full {test_full.shape}")
-
-print("\n[3] Saving merged datasets...")
-output_dir = 'stage1/processed_data/Stage1.1'
-os.makedirs(output_dir, exist_ok=True)
-train_output = os.path.join(output_dir, 'train_merged.csv')
-test_output = os.path.join(output_dir, 'test_merged.csv')
-train_full.to_csv(train_output, index=False)
-test_full.to_csv(test_output, index=False)
-print(f"Saved: {train_output}, {test_output}")
-
-print("\nSTEP 1.1 COMPLETED!")
 
+def features_path(base_path=BASE_PATH):
+    """The features table of a dataset directory: features.csv if present (e.g. synthetic data), else features.xlsx"""
+    csv_path = os.path.join(base_path, 'features.csv')
+    return csv_path if os.path.exists(csv_path) else os.path.join(base_path, 'features.xlsx')
+
+
+def read_features(path):
+    """Load the features table (.csv or .xlsx)"""
+    return pd.read_csv(path) if path.endswith('.csv') else pd.read_excel(path)
+
+
+def merge_datasets(train, test, stores, features):
+    """Merge store metadata and features into train and test; returns (train_full, test_full)"""
+    train_full = train.merge(stores, on='Store', how='left')
+    train_full['Date'] = pd.to_datetime(train_full['Date'])
+    features['Date'] = pd.to_datetime(features['Date'])
+    train_full = train_full.merge(features, on=['Store', 'Date', 'IsHoliday'], how='left')
+
+    test['Date'] = pd.to_datetime(test['Date'])
+    test_full = test.merge(stores, on='Store', how='left')
+    test_full = test_full.merge(features, on=['Store', 'Date', 'IsHoliday'], how='left')
+    return apply_schema(train_full), apply_schema(test_full)
+
+
+def run(base_path=BASE_PATH):
+    """Load the raw datasets and merge them; returns (train_full, test_full)"""
+    print("STEP 1.1: DATA LOADING & MERGING")
+
+    print("\n[1] Loading datasets...")
+    train = pd.read_csv(os.path.join(base_path, 'train.csv'))
+    test = pd.read_csv(os.path.join(base_path, 'test.csv'))
+    stores = pd.read_csv(os.path.join(base_path, 'stores.csv'))
+    features = read_features(features_path(base_path))
+    print(f"Loaded: train {train.shape}, test {test.shape}, stores {stores.shape}, features {features.shape}")
+
+    print("\n[2] Merging datasets...")
+    train_full, test_full = merge_datasets(train, test, stores, features)
+    print(f"Merged: train_full {train_full.shape}, test_full {test_full.shape}")
+    return train_full, test_full
+
+
+if __name__ == "__main__":
+    train_full, test_full = run()
+
+    print("\n[3] Saving merged datasets...")
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    train_output = write_dataset(train_full, os.path.join(OUTPUT_DIR, 'train_merged'))
+    test_output = write_dataset(test_full, os.path.join(OUTPUT_DIR, 'test_merged'))
+    print(f"Saved: {train_output}, {test_output}")
+
+    print("\nSTEP 1.1 COMPLETED!")
@@ -13,6 +13,14 @@ Missing Value Strategy:
 import pandas as pd
 import numpy as np
 import os
+import sys
+
+from data_io import read_dataset, write_dataset
+from data_schema import apply_schema
+
+# Shared with model training and serving
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'stage3', 'ML_models'))
+from Feature_Pipeline import MARKDOWN_COLUMNS, markdown_features
 
 def analyze_missing_values(df, dataset_name):
     """Analyze and display missing value statistics"""
@@ -29,18 +37,16 @@ def analyze_missing_values(df, dataset_name):
 def handle_missing_values(df, dataset_name):
     """Apply missing value handling strategy to dataset"""
     df_clean = df.copy()
-    markdown_cols = ['MarkDown1', 'MarkDown2', 'MarkDown3', 'MarkDown4', 'MarkDown5']
     
-    # Create binary indicators
+    # Binary indicators and MarkDown missing values filled with 0 (as at serving time)
+    markdowns = markdown_features(df_clean)
     new_cols = []
-    for col in markdown_cols:
+    for col in MARKDOWN_COLUMNS:
         indicator_col = f'Has_{col}'
-        df_clean[indicator_col] = df_clean[col].notna().astype(int)
+        df_clean[indicator_col] = markdowns[indicator_col]
         new_cols.append(indicator_col)
-    
-    # Fill MarkDown missing values with 0
-    for col in markdown_cols:
-        df_clean[col] = df_clean[col].fillna(0)
+    for col in MARKDOWN_COLUMNS:
+        df_clean[col] = markdowns[col]
     
     # Handle any other missing values
     remaining_missing = df_clean.isnull().sum().sum()
@@ -62,30 +68,33 @@ def display_statistics(df, dataset_name):
         non_zero_pct = (non_zero_count / len(df)) * 100
 
 
-print("STEP 1.2: HANDLING MISSING VALUES")
+def run(train, test):
+    """Handle missing values in train and test; returns (train_clean, test_clean)"""
+    print("STEP 1.2: HANDLING MISSING VALUES")
+    print(f"Input: train {train.shape}, test {test.shape}")
 
-print("\n[1] Loading datasets...")
-train = pd.read_csv('stage1/processed_data/Stage1.1/train_merged.csv')
-test = pd.read_csv('stage1/processed_data/Stage1.1/test_merged.csv')
-print(f"Loaded: train {train.shape}, test {test.shape}")
+    print("\n[1] Analyzing missing values...")
+    train_missing = analyze_missing_values(train, "Training Data")
+    test_missing = analyze_missing_values(test, "Test Data")
 
-print("\n[2] Analyzing missing values...")
-train_missing = analyze_missing_values(train, "Training Data")
-test_missing = analyze_missing_values(test, "Test Data")
+    print("\n[2] Processing datasets...")
+    train_clean, train_new_cols = handle_missing_values(train, "Training Data")
+    test_clean, test_new_cols = handle_missing_values(test, "Test Data")
+    print(f"Processed: Added {len(train_new_cols)} indicator columns")
+    return apply_schema(train_clean), apply_schema(test_clean)
 
-print("\n[3] Processing datasets...")
-train_clean, train_new_cols = handle_missing_values(train, "Training Data")
-test_clean, test_new_cols = handle_missing_values(test, "Test Data")
-print(f"Processed: Added {len(train_new_cols)} indicator columns")
 
-print("\n[4] Saving cleaned datasets...")
-output_dir = 'stage1/processed_data/Stage1.2'
-os.makedirs(output_dir, exist_ok=True)
-train_output = os.path.join(output_dir, 'train_cleaned_step2.csv')
-test_output = os.path.join(output_dir, 'test_cleaned_step2.csv')
-train_clean.to_csv(train_output, index=False)
-test_clean.to_csv(test_output, index=False)
-print(f"Saved: {train_output}, {test_output}")
+if __name__ == "__main__":
+    print("Loading datasets...")
+    train = read_dataset('stage1/processed_data/Stage1.1/train_merged')
+    test = read_dataset('stage1/processed_data/Stage1.1/test_merged')
+    train_clean, test_clean = run(train, test)
 
-print("\nSTEP 1.2 COMPLETED!")
+    print("\n[3] Saving cleaned datasets...")
+    output_dir = 'stage1/processed_data/Stage1.2'
+    os.makedirs(output_dir, exist_ok=True)
+    train_output = write_dataset(train_clean, os.path.join(output_dir, 'train_cleaned_step2'))
+    test_output = write_dataset(test_clean, os.path.join(output_dir, 'test_cleaned_step2'))
+    print(f"Saved: {train_output}, {test_output}")
 
+    print("\nSTEP 1.2 COMPLETED!")
@@ -13,58 +13,49 @@ Create time-based features from Date column:
 import pandas as pd
 import numpy as np
 import os
+import sys
 
-print("STEP 1.3.1: CREATE TIME-BASED FEATURES")
+from data_io import read_dataset, write_dataset
+from data_schema import apply_schema
 
-print("\n[1] Loading cleaned data...")
-train = pd.read_csv('stage1/processed_data/Stage1.2/train_cleaned_step2.csv')
-test = pd.read_csv('stage1/processed_data/Stage1.2/test_cleaned_step2.csv')
-train['Date'] = pd.to_datetime(train['Date'])
-test['Date'] = pd.to_datetime(test['Date'])
-print(f"Loaded: train {train.shape}, test {test.shape}")
+# Shared with model training and serving
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'stage3', 'ML_models'))
+from Feature_Pipeline import time_features
 
 def create_time_features(df, dataset_name):
-    """Create time-based features from Date column"""
-    # Basic time components
-    df['Year'] = df['Date'].dt.year
-    df['Month'] = df['Date'].dt.month
-    df['Day'] = df['Date'].dt.day
-    df['Quarter'] = df['Date'].dt.quarter
-    df['DayOfWeek'] = df['Date'].dt.dayofweek
-    df['WeekOfYear'] = df['Date'].dt.isocalendar().week
-    
-    # Binary indicators
-    df['Is_Weekend'] = (df['DayOfWeek'] >= 5).astype(int)
-    df['Is_Month_Start'] = df['Date'].dt.is_month_start.astype(int)
-    df['Is_Month_End'] = df['Date'].dt.is_month_end.astype(int)
-    df['Is_Quarter_Start'] = df['Date'].dt.is_quarter_start.astype(int)
-    df['Is_Quarter_End'] = df['Date'].dt.is_quarter_end.astype(int)
-    df['Is_Year_Start'] = df['Date'].dt.is_year_start.astype(int)
-    df['Is_Year_End'] = df['Date'].dt.is_year_end.astype(int)
-    
-    # Cyclical features
-    df['Month_Sin'] = np.sin(2 * np.pi * df['Month'] / 12)
-    df['Month_Cos'] = np.cos(2 * np.pi * df['Month'] / 12)
-    df['Week_Sin'] = np.sin(2 * np.pi * df['WeekOfYear'] / 52)
-    df['Week_Cos'] = np.cos(2 * np.pi * df['WeekOfYear'] / 52)
-    df['DayOfWeek_Sin'] = np.sin(2 * np.pi * df['DayOfWeek'] / 7)
-    df['DayOfWeek_Cos'] = np.cos(2 * np.pi * df['DayOfWeek'] / 7)
-    
+    """Create time-based features from Date column (the calendar features of the shared FeaturePipeline)"""
+    for feature, values in time_features(df['Date']).items():
+        df[feature] = values
     return df
 
-print("\n[2] Creating time-based features...")
-train = create_time_features(train, "Training Data")
-test = create_time_features(test, "Test Data")
-print("Created 20 time-based features")
-
-print("\n[3] Saving data with time features...")
-output_dir = 'stage1/processed_data/Stage1.3.1'
-os.makedirs(output_dir, exist_ok=True)
-train_output = os.path.join(output_dir, 'train_time_features.csv')
-test_output = os.path.join(output_dir, 'test_time_features.csv')
-train.to_csv(train_output, index=False)
-test.to_csv(test_output, index=False)
-print(f"Saved: {train_output}, {test_output}")
-
-print("\nSTEP 1.3.1 COMPLETED!")
 
+def run(train, test):
+    """Add time-based features to copies of train and test; returns (train, test)"""
+    print("STEP 1.3.1: CREATE TIME-BASED FEATURES")
+    train = train.copy()
+    test = test.copy()
+    train['Date'] = pd.to_datetime(train['Date'])
+    test['Date'] = pd.to_datetime(test['Date'])
+    print(f"Input: train {train.shape}, test {test.shape}")
+
+    print("\n[1] Creating time-based features...")
+    train = create_time_features(train, "Training Data")
+    test = create_time_features(test, "Test Data")
+    print("Created 20 time-based features")
+    return apply_schema(train), apply_schema(test)
+
+
+if __name__ == "__main__":
+    print("Loading cleaned data...")
+    train = read_dataset('stage1/processed_data/Stage1.2/train_cleaned_step2')
+    test = read_dataset('stage1/processed_data/Stage1.2/test_cleaned_step2')
+    train, test = run(train, test)
+
+    print("\n[2] Saving data with time features...")
+    output_dir = 'stage1/processed_data/Stage1.3.1'
+    os.makedirs(output_dir, exist_ok=True)
+    train_output = write_dataset(train, os.path.join(output_dir, 'train_time_features'))
+    test_output = write_dataset(test, os.path.join(output_dir, 'test_time_features'))
+    print(f"Saved: {train_output}, {test_output}")
+
+    print("\nSTEP 1.3.1 COMPLETED!")
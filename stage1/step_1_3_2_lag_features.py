@@ -8,79 +8,84 @@ Create lag features for time series forecasting:
 - Rolling statistics (4-week, 8-week moving averages)
 - Rolling standard deviation
 
+Features only use rows of their own Store/Dept, so with FEATURE_WORKERS > 1
+they are computed per partition of stores in parallel (partitioned_executor.py).
 """
 
 import pandas as pd
 import numpy as np
 import os
 
-print("STEP 1.3.2: CREATE LAG FEATURES")
-
-print("\n[1] Loading data with time features...")
-train = pd.read_csv('stage1/processed_data/Stage1.3.1/train_time_features.csv')
-test = pd.read_csv('stage1/processed_data/Stage1.3.1/test_time_features.csv')
-train['Date'] = pd.to_datetime(train['Date'])
-test['Date'] = pd.to_datetime(test['Date'])
-train = train.sort_values(['Store', 'Dept', 'Date']).reset_index(drop=True)
-test = test.sort_values(['Store', 'Dept', 'Date']).reset_index(drop=True)
-print(f"Loaded: train {train.shape}, test {test.shape}")
-
-print("\n[2] Creating lag features for training data...")
-train['Sales_Lag1'] = train.groupby(['Store', 'Dept'])['Weekly_Sales'].shift(1)
-train['Sales_Lag2'] = train.groupby(['Store', 'Dept'])['Weekly_Sales'].shift(2)
-train['Sales_Lag4'] = train.groupby(['Store', 'Dept'])['Weekly_Sales'].shift(4)
-train['Sales_Rolling_Mean_4'] = train.groupby(['Store', 'Dept'])['Weekly_Sales'].transform(
-    lambda x: x.rolling(window=4, min_periods=1).mean()
-)
-train['Sales_Rolling_Mean_8'] = train.groupby(['Store', 'Dept'])['Weekly_Sales'].transform(
-    lambda x: x.rolling(window=8, min_periods=1).mean()
-)
-train['Sales_Rolling_Std_4'] = train.groupby(['Store', 'Dept'])['Weekly_Sales'].transform(
-    lambda x: x.rolling(window=4, min_periods=1).std()
-)
-train['Sales_Momentum'] = train['Weekly_Sales'] - train['Sales_Lag1']
-print("Created 7 lag features")
-
-print("\n[3] Handling missing values in lag features...")
-lag_features = ['Sales_Lag1', 'Sales_Lag2', 'Sales_Lag4', 'Sales_Rolling_Mean_4', 
+from data_io import read_dataset, write_dataset
+from feature_kernels import GroupWindows
+from partitioned_executor import PartitionedExecutor
+
+# Columns add_lag_features reads (besides the Store partition key)
+LAG_INPUTS = ['Dept', 'Weekly_Sales']
+LAG_FEATURES = ['Sales_Lag1', 'Sales_Lag2', 'Sales_Lag4', 'Sales_Rolling_Mean_4',
                 'Sales_Rolling_Mean_8', 'Sales_Rolling_Std_4', 'Sales_Momentum']
-for feature in lag_features:
-    train[feature] = train[feature].fillna(0)
-print("Filled null values with 0")
-
-print("\n[4] Creating lag features for test data...")
-combined = pd.concat([train[['Store', 'Dept', 'Date', 'Weekly_Sales']], 
-                      test[['Store', 'Dept', 'Date']]], ignore_index=True)
-combined = combined.sort_values(['Store', 'Dept', 'Date']).reset_index(drop=True)
-
-combined['Sales_Lag1'] = combined.groupby(['Store', 'Dept'])['Weekly_Sales'].shift(1)
-combined['Sales_Lag2'] = combined.groupby(['Store', 'Dept'])['Weekly_Sales'].shift(2)
-combined['Sales_Lag4'] = combined.groupby(['Store', 'Dept'])['Weekly_Sales'].shift(4)
-combined['Sales_Rolling_Mean_4'] = combined.groupby(['Store', 'Dept'])['Weekly_Sales'].transform(
-    lambda x: x.rolling(window=4, min_periods=1).mean()
-)
-combined['Sales_Rolling_Mean_8'] = combined.groupby(['Store', 'Dept'])['Weekly_Sales'].transform(
-    lambda x: x.rolling(window=8, min_periods=1).mean()
-)
-combined['Sales_Rolling_Std_4'] = combined.groupby(['Store', 'Dept'])['Weekly_Sales'].transform(
-    lambda x: x.rolling(window=4, min_periods=1).std()
-)
-combined['Sales_Momentum'] = combined['Weekly_Sales'] - combined['Sales_Lag1']
-
-test_with_lags = combined[combined['Weekly_Sales'].isna()].copy()
-for feature in lag_features:
-    test[feature] = test_with_lags[feature].values
-    test[feature] = test[feature].fillna(0)
-print("Created lag features for test using train history")
-
-print("\n[5] Saving data with lag features...")
-output_dir = 'stage1/processed_data/Stage1.3.2'
-os.makedirs(output_dir, exist_ok=True)
-train_output = os.path.join(output_dir, 'train_lag_features.csv')
-test_output = os.path.join(output_dir, 'test_lag_features.csv')
-train.to_csv(train_output, index=False)
-test.to_csv(test_output, index=False)
-print(f"Saved: {train_output}, {test_output}")
-
-print("\nSTEP 1.3.2 COMPLETED!")
 
+
+def add_lag_features(df):
+    """Add lag, rolling and momentum features of Weekly_Sales per Store/Dept (df sorted by Store, Dept, Date)"""
+    windows = GroupWindows(df, ['Store', 'Dept'])
+    sales = df['Weekly_Sales']
+    df['Sales_Lag1'] = windows.lag(sales, 1)
+    df['Sales_Lag2'] = windows.lag(sales, 2)
+    df['Sales_Lag4'] = windows.lag(sales, 4)
+    df['Sales_Rolling_Mean_4'] = windows.rolling(sales, window=4, how='mean')
+    df['Sales_Rolling_Mean_8'] = windows.rolling(sales, window=8, how='mean')
+    df['Sales_Rolling_Std_4'] = windows.rolling(sales, window=4, how='std')
+    df['Sales_Momentum'] = df['Weekly_Sales'] - df['Sales_Lag1']
+    return df
+
+
+def run(train, test):
+    """Add lag features to train, and to test from train history; returns (train, test)"""
+    print("STEP 1.3.2: CREATE LAG FEATURES")
+    train = train.copy()
+    test = test.copy()
+    train['Date'] = pd.to_datetime(train['Date'])
+    test['Date'] = pd.to_datetime(test['Date'])
+    train = train.sort_values(['Store', 'Dept', 'Date']).reset_index(drop=True)
+    test = test.sort_values(['Store', 'Dept', 'Date']).reset_index(drop=True)
+    print(f"Input: train {train.shape}, test {test.shape}")
+
+    with PartitionedExecutor() as executor:
+        print("\n[1] Creating lag features for training data...")
+        train = executor.map(train, add_lag_features, columns=LAG_INPUTS)
+        print("Created 7 lag features")
+
+        print("\n[2] Handling missing values in lag features...")
+        for feature in LAG_FEATURES:
+            train[feature] = train[feature].fillna(0)
+        print("Filled null values with 0")
+
+        print("\n[3] Creating lag features for test data...")
+        combined = pd.concat([train[['Store', 'Dept', 'Date', 'Weekly_Sales']], 
+                              test[['Store', 'Dept', 'Date']]], ignore_index=True)
+        combined = combined.sort_values(['Store', 'Dept', 'Date']).reset_index(drop=True)
+        combined = executor.map(combined, add_lag_features, columns=LAG_INPUTS)
+
+    test_with_lags = combined[combined['Weekly_Sales'].isna()].copy()
+    for feature in LAG_FEATURES:
+        test[feature] = test_with_lags[feature].values
+        test[feature] = test[feature].fillna(0)
+    print("Created lag features for test using train history")
+    return train, test
+
+
+if __name__ == "__main__":
+    print("Loading data with time features...")
+    train = read_dataset('stage1/processed_data/Stage1.3.1/train_time_features')
+    test = read_dataset('stage1/processed_data/Stage1.3.1/test_time_features')
+    train, test = run(train, test)
+
+    print("\n[4] Saving data with lag features...")
+    output_dir = 'stage1/processed_data/Stage1.3.2'
+    os.makedirs(output_dir, exist_ok=True)
+    train_output = write_dataset(train, os.path.join(output_dir, 'train_lag_features'))
+    test_output = write_dataset(test, os.path.join(output_dir, 'test_lag_features'))
+    print(f"Saved: {train_output}, {test_output}")
+
+    print("\nSTEP 1.3.2 COMPLETED!")
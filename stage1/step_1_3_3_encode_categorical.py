@@ -11,27 +11,47 @@ Encode categorical variables for machine learning:
 import pandas as pd
 import numpy as np
 import os
+import sys
 
-print("STEP 1.3.3: ENCODE CATEGORICAL VARIABLES")
-
-print("\n[1] Loading data with lag features...")
-train = pd.read_csv('stage1/processed_data/Stage1.3.2/train_lag_features.csv')
-test = pd.read_csv('stage1/processed_data/Stage1.3.2/test_lag_features.csv')
-print(f"Loaded: train {train.shape}, test {test.shape}")
-
-print("\n[2] One-hot encoding Store Type...")
-train_encoded = pd.get_dummies(train, columns=['Type'], prefix='Type', drop_first=False)
-test_encoded = pd.get_dummies(test, columns=['Type'], prefix='Type', drop_first=False)
-type_columns = [col for col in train_encoded.columns if col.startswith('Type_')]
-print(f"Encoded Type column to: {type_columns}")
-
-print("\n[3] Saving encoded data...")
-output_dir = 'stage1/processed_data/Stage1.3.3'
-os.makedirs(output_dir, exist_ok=True)
-train_output = os.path.join(output_dir, 'train_encoded.csv')
-test_output = os.path.join(output_dir, 'test_encoded.csv')
-train_encoded.to_csv(train_output, index=False)
-test_encoded.to_csv(test_output, index=False)
-print(f"Saved: {train_output}, {test_output}")
-
-print("\nSTEP 1.3.3 COMPLETED!")
+from data_io import read_dataset, write_dataset
+
+# Shared with model training and serving
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'stage3', 'ML_models'))
+from Feature_Pipeline import store_type_features
+
+
+def encode_store_type(df):
+    """Replace Type with its one-hot columns (Type_A, Type_B, Type_C, as at serving time)"""
+    encoded = df.drop(columns='Type')
+    for feature, values in store_type_features(df['Type']).items():
+        encoded[feature] = values
+    return encoded
+
+
+def run(train, test):
+    """One-hot encode Store Type; returns (train_encoded, test_encoded)"""
+    print("STEP 1.3.3: ENCODE CATEGORICAL VARIABLES")
+    print(f"Input: train {train.shape}, test {test.shape}")
+
+    print("\n[1] One-hot encoding Store Type...")
+    train_encoded = encode_store_type(train)
+    test_encoded = encode_store_type(test)
+    type_columns = [col for col in train_encoded.columns if col.startswith('Type_')]
+    print(f"Encoded Type column to: {type_columns}")
+    return train_encoded, test_encoded
+
+
+if __name__ == "__main__":
+    print("Loading data with lag features...")
+    train = read_dataset('stage1/processed_data/Stage1.3.2/train_lag_features')
+    test = read_dataset('stage1/processed_data/Stage1.3.2/test_lag_features')
+    train_encoded, test_encoded = run(train, test)
+
+    print("\n[2] Saving encoded data...")
+    output_dir = 'stage1/processed_data/Stage1.3.3'
+    os.makedirs(output_dir, exist_ok=True)
+    train_output = write_dataset(train_encoded, os.path.join(output_dir, 'train_encoded'))
+    test_output = write_dataset(test_encoded, os.path.join(output_dir, 'test_encoded'))
+    print(f"Saved: {train_output}, {test_output}")
+
+    print("\nSTEP 1.3.3 COMPLETED!")
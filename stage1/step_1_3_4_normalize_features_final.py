@@ -4,70 +4,71 @@ MILESTONE 1 - Step 1.3.4: Normalize Numerical Features
 Task 3: Preprocessing and Feature Engineering (Final Step)
 
 Normalize numerical features to standardize ranges for ML models.
-Using manual Z-score normalization (no sklearn dependency).
+Using manual Z-score normalization (no sklearn dependency): mean and std
+from one pass of mergeable running moments (stage3/ML_models/Normalization.py,
+shared with the streaming pipeline and serving), applied column by column
+as float32.
 
 """
 
 import pandas as pd
 import numpy as np
 import os
+import sys
 import json
 
-print("STEP 1.3.4: NORMALIZE NUMERICAL FEATURES")
-
-print("\n[1] Loading encoded data...")
-train = pd.read_csv('stage1/processed_data/Stage1.3.3/train_encoded.csv')
-test = pd.read_csv('stage1/processed_data/Stage1.3.3/test_encoded.csv')
-print(f"Loaded: train {train.shape}, test {test.shape}")
-
-continuous_features = [
-    'Size', 'Temperature', 'Fuel_Price', 'CPI', 'Unemployment',
-    'MarkDown1', 'MarkDown2', 'MarkDown3', 'MarkDown4', 'MarkDown5',
-    'Sales_Lag1', 'Sales_Lag2', 'Sales_Lag4', 'Sales_Rolling_Mean_4',
-    'Sales_Rolling_Mean_8', 'Sales_Rolling_Std_4', 'Sales_Momentum'
-]
-
-print("\n[2] Calculating normalization parameters...")
-normalization_params = {}
-for feature in continuous_features:
-    if feature in train.columns:
-        mean_val = train[feature].mean()
-        std_val = train[feature].std()
-        normalization_params[feature] = {'mean': mean_val, 'std': std_val}
-print(f"Calculated parameters for {len(normalization_params)} features")
-
-print("\n[3] Applying Z-score normalization...")
-for feature in continuous_features:
-    if feature in train.columns:
-        mean_val = normalization_params[feature]['mean']
-        std_val = normalization_params[feature]['std']
-        if std_val > 0:
-            train[feature] = (train[feature] - mean_val) / std_val
-        else:
-            train[feature] = 0
-            
-for feature in continuous_features:
-    if feature in test.columns:
-        mean_val = normalization_params[feature]['mean']
-        std_val = normalization_params[feature]['std']
-        if std_val > 0:
-            test[feature] = (test[feature] - mean_val) / std_val
-        else:
-            test[feature] = 0
-print("Normalized train and test data")
-
-print("\n[4] Saving normalization parameters and data...")
-output_dir = 'stage1/processed_data/Stage1.3.4_Final'
-os.makedirs(output_dir, exist_ok=True)
-
-params_path = os.path.join(output_dir, 'normalization_params.json')
-with open(params_path, 'w') as f:
-    json.dump(normalization_params, f, indent=2)
-
-train_output = os.path.join(output_dir, 'train_final.csv')
-test_output = os.path.join(output_dir, 'test_final.csv')
-train.to_csv(train_output, index=False)
-test.to_csv(test_output, index=False)
-print(f"Saved: {train_output}, {test_output}, {params_path}")
-
-print("\nSTEP 1.3.4 COMPLETED!")
+from data_io import read_dataset, write_dataset
+from data_schema import apply_schema
+
+# Shared with model training and serving
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'stage3', 'ML_models'))
+from Feature_Pipeline import FeaturePipeline
+
+
+def run(train, test):
+    """
+    Z-score continuous features with train statistics; returns
+    (train, test, normalization_params, feature_pipeline) where
+    feature_pipeline is the fitted FeaturePipeline's saved state
+    """
+    print("STEP 1.3.4: NORMALIZE NUMERICAL FEATURES")
+    print(f"Input: train {train.shape}, test {test.shape}")
+
+    print("\n[1] Calculating normalization parameters...")
+    pipeline = FeaturePipeline().fit(train)
+    normalization_params = pipeline.normalization_params
+    print(f"Calculated parameters for {len(normalization_params)} features")
+
+    print("\n[2] Applying Z-score normalization...")
+    # Written as float32 column by column (computed in float64, like the parameters)
+    train = pipeline.normalize(train, float32=True)
+    test = pipeline.normalize(test, float32=True)
+    print("Normalized train and test data")
+
+    # Model-facing datasets: the other float features as float32 too
+    return (apply_schema(train, float32=True), apply_schema(test, float32=True),
+            normalization_params, pipeline.to_dict())
+
+
+if __name__ == "__main__":
+    print("Loading encoded data...")
+    train = read_dataset('stage1/processed_data/Stage1.3.3/train_encoded')
+    test = read_dataset('stage1/processed_data/Stage1.3.3/test_encoded')
+    train, test, normalization_params, feature_pipeline = run(train, test)
+
+    print("\n[3] Saving normalization parameters and data...")
+    output_dir = 'stage1/processed_data/Stage1.3.4_Final'
+    os.makedirs(output_dir, exist_ok=True)
+
+    params_path = os.path.join(output_dir, 'normalization_params.json')
+    with open(params_path, 'w') as f:
+        json.dump(normalization_params, f, indent=2)
+    pipeline_file = os.path.join(output_dir, 'feature_pipeline.json')
+    with open(pipeline_file, 'w') as f:
+        json.dump(feature_pipeline, f, indent=2)
+
+    train_output = write_dataset(train, os.path.join(output_dir, 'train_final'))
+    test_output = write_dataset(test, os.path.join(output_dir, 'test_final'))
+    print(f"Saved: {train_output}, {test_output}, {params_path}, {pipeline_file}")
+
+    print("\nSTEP 1.3.4 COMPLETED!")
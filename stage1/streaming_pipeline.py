@@ -0,0 +1,296 @@
+"""
+Stage 1 Streaming Pipeline - Out-of-Core Processing Partitioned by Store
+=========================================================================
+Runs steps 1.1 - 1.3.4 on datasets larger than memory. Every feature of
+steps 1.1 - 1.3.3 depends only on rows of the same Store (merges, per-store
+CPI/Unemployment fill, per-Store/Dept lag history), so the data is split
+into partitions of whole stores and each partition goes through the same
+step functions as the in-memory pipeline:
+
+0. Split: the raw CSVs are read in chunks of CSV_CHUNK_ROWS rows and
+   written as Parquet pieces per partition (contiguous Store ranges sized
+   from --partition-mb of raw training CSV)
+1. Partitions: steps 1.1 - 1.3.3 per partition; the encoded partitions are
+   kept on disk, and each returns the running moments (count, mean, sum of
+   squared deviations) of its continuous training features
+2. Normalization statistics (step 1.3.4): the partitions' moments merged
+   (Normalization.RunningMoments), no extra pass over the data
+3. Output: each partition normalized in place to float32 and appended to
+   train_final / test_final, in Store, Dept, Date order as the in-memory
+   pipeline writes
+
+Memory is bounded by the largest partition, not the dataset. With a single
+partition (the real Walmart data at the default size) the outputs are
+identical to Stage1_pipline_runner.py's; with several, normalized values
+can differ in the last float32 bit from merging per-partition statistics.
+
+Generate larger test data with generate_synthetic_data.py.
+
+IMPORTANT: Must be run from the project root directory.
+Usage: python stage1/streaming_pipeline.py [--data-dir DIR] [--output-dir DIR] [--partition-mb 16]
+                                           [--format parquet|csv] [--keep-work]
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import math
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Get the stage1 directory path
+stage1_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, stage1_dir)
+sys.path.insert(0, os.path.join(os.path.dirname(stage1_dir), 'stage3', 'ML_models'))
+
+import step_1_1_data_loading_merging as step_1_1
+import step_1_2_missing_values as step_1_2
+import step_1_3_1_time_features as step_1_3_1
+import step_1_3_2_lag_features as step_1_3_2
+import step_1_3_3_encode_categorical as step_1_3_3
+from data_io import DATA_FORMATS, DEFAULT_FORMAT, DatasetAppender
+from data_schema import apply_schema
+from Feature_Pipeline import CONTINUOUS_FEATURES, FeaturePipeline
+from Normalization import RunningMoments
+
+DEFAULT_OUTPUT_DIR = 'stage1/processed_data/Stage1.3.4_Final'
+DEFAULT_WORK_DIR = 'stage1/processed_data/streaming_work'
+
+# Raw training CSV per partition (the partition's peak memory is roughly 40x this)
+DEFAULT_PARTITION_MB = 16
+
+# Rows read from a raw CSV at a time while splitting
+CSV_CHUNK_ROWS = 250_000
+
+# Raw tables split by Store
+RAW_TABLES = ('train', 'test', 'features')
+
+
+def plan_partitions(store_ids, train_bytes, partition_mb=DEFAULT_PARTITION_MB):
+    """
+    Group stores into partitions of about ``partition_mb`` of raw training data.
+
+    Parameters:
+    -----------
+    store_ids : array-like
+        Every Store in stores.csv
+    train_bytes : int
+        Size of the raw training CSV (stores are assumed to be of similar size)
+    partition_mb : float
+        Target raw training CSV per partition
+
+    Returns:
+    --------
+    partitions : list of ndarray
+        Contiguous ranges of the sorted store ids, so writing partitions in
+        order keeps the output sorted by Store
+    """
+    stores = np.sort(np.unique(np.asarray(store_ids)))
+    n_partitions = max(1, min(len(stores), math.ceil(train_bytes / (partition_mb * 1e6))))
+    return np.array_split(stores, n_partitions)
+
+
+def _raw_path(base_path, table):
+    return step_1_1.features_path(base_path) if table == 'features' else os.path.join(base_path, f'{table}.csv')
+
+
+def _read_raw(path):
+    """Chunks of a raw table (an .xlsx features table is small and read whole)."""
+    if path.endswith('.xlsx'):
+        return [step_1_1.read_features(path)]
+    return pd.read_csv(path, chunksize=CSV_CHUNK_ROWS)
+
+
+def _partition_dir(work_dir, kind, table, partition):
+    return os.path.join(work_dir, kind, table, f'part-{partition:05d}')
+
+
+def split_raw(base_path, work_dir, partitions):
+    """Pass 0: stream each raw table into Parquet pieces per partition; returns rows per table."""
+    store_partition = {store: p for p, stores in enumerate(partitions) for store in stores}
+    rows = {}
+    for table in RAW_TABLES:
+        rows[table] = 0
+        columns = None
+        for k, chunk in enumerate(_read_raw(_raw_path(base_path, table))):
+            columns = chunk.iloc[:0]
+            rows[table] += len(chunk)
+            partition = chunk['Store'].map(store_partition)
+            if partition.isna().any():
+                unknown = sorted(chunk.loc[partition.isna(), 'Store'].unique())
+                raise ValueError(f"{table}: stores {unknown[:10]} are not in stores.csv")
+            for p, piece in chunk.groupby(partition.astype(int), sort=True):
+                out_dir = _partition_dir(work_dir, 'raw', table, p)
+                os.makedirs(out_dir, exist_ok=True)
+                piece.to_parquet(os.path.join(out_dir, f'chunk-{k:06d}.parquet'), index=False)
+        # Partitions without rows of this table get an empty piece with its columns
+        for p in range(len(partitions)):
+            out_dir = _partition_dir(work_dir, 'raw', table, p)
+            if not os.path.isdir(out_dir):
+                os.makedirs(out_dir)
+                columns.to_parquet(os.path.join(out_dir, 'chunk-000000.parquet'), index=False)
+    return rows
+
+
+def read_raw_partition(work_dir, table, partition):
+    """The raw rows of one partition, in file order."""
+    pieces = sorted(glob.glob(os.path.join(_partition_dir(work_dir, 'raw', table, partition), '*.parquet')))
+    return pd.concat([pd.read_parquet(piece) for piece in pieces], ignore_index=True)
+
+
+def encoded_path(work_dir, table, partition):
+    return os.path.join(work_dir, 'encoded', f'{table}_encoded-{partition:05d}.parquet')
+
+
+def process_partition(work_dir, partition, stores):
+    """
+    Pass 1 for one partition: steps 1.1 - 1.3.3 (the in-memory pipeline's
+    step functions) on its raw rows; writes the encoded train and test
+    partitions and returns their row counts and the RunningMoments of the
+    continuous training features.
+    """
+    train, test, features = (read_raw_partition(work_dir, table, partition) for table in RAW_TABLES)
+    with contextlib.redirect_stdout(io.StringIO()):
+        train, test = step_1_1.merge_datasets(train, test, stores, features)
+        train, test = step_1_2.run(train, test)
+        train, test = step_1_3_1.run(train, test)
+        train, test = step_1_3_2.run(train, test)
+        train, test = step_1_3_3.run(train, test)
+    os.makedirs(os.path.dirname(encoded_path(work_dir, 'train', partition)), exist_ok=True)
+    train.to_parquet(encoded_path(work_dir, 'train', partition), index=False)
+    test.to_parquet(encoded_path(work_dir, 'test', partition), index=False)
+    return len(train), len(test), RunningMoments(CONTINUOUS_FEATURES).update(train)
+
+
+def write_final(work_dir, n_partitions, pipeline, output_dir, fmt=DEFAULT_FORMAT):
+    """Step 3: normalize each encoded partition and append it to train_final / test_final."""
+    outputs = {}
+    for table in ('train', 'test'):
+        with DatasetAppender(os.path.join(output_dir, f'{table}_final'), fmt=fmt) as appender:
+            for p in range(n_partitions):
+                df = pd.read_parquet(encoded_path(work_dir, table, p))
+                appender.append(apply_schema(pipeline.normalize(df, float32=True, inplace=True), float32=True))
+        outputs[table] = (appender.path, appender.rows)
+    return outputs
+
+
+def run_streaming(base_path=step_1_1.BASE_PATH, output_dir=DEFAULT_OUTPUT_DIR, work_dir=DEFAULT_WORK_DIR,
+                  partition_mb=DEFAULT_PARTITION_MB, fmt=DEFAULT_FORMAT, keep_work=False, verbose=True):
+    """
+    Run steps 1.1 - 1.3.4 partition by partition.
+
+    Parameters:
+    -----------
+    base_path : str
+        Directory with train.csv, test.csv, stores.csv and features.csv
+        (or features.xlsx)
+    output_dir : str
+        Where train_final, test_final, normalization_params.json and
+        feature_pipeline.json are written
+    work_dir : str
+        Scratch directory for the raw and encoded partitions (emptied first)
+    partition_mb : float
+        Target raw training CSV per partition
+    fmt : str
+        Output dataset format ('parquet' or 'csv')
+    keep_work : bool
+        Keep the partitions in work_dir afterwards
+
+    Returns:
+    --------
+    summary : dict
+        Partition count, input and output row counts, output paths and
+        seconds per pass
+    """
+    def log(message):
+        if verbose:
+            print(message, flush=True)
+
+    timings = {}
+    shutil.rmtree(work_dir, ignore_errors=True)
+    stores = pd.read_csv(os.path.join(base_path, 'stores.csv'))
+    partitions = plan_partitions(stores['Store'], os.path.getsize(os.path.join(base_path, 'train.csv')), partition_mb)
+    log(f"{len(stores):,} stores in {len(partitions):,} partitions")
+
+    start = time.perf_counter()
+    log("\n[0] Splitting raw data by Store...")
+    input_rows = split_raw(base_path, work_dir, partitions)
+    timings['split'] = time.perf_counter() - start
+    log("Split: " + ", ".join(f"{table} {rows:,} rows" for table, rows in input_rows.items()))
+
+    start = time.perf_counter()
+    log("\n[1] Steps 1.1 - 1.3.3 per partition...")
+    moments = RunningMoments(CONTINUOUS_FEATURES)
+    for p, partition_stores in enumerate(partitions):
+        n_train, n_test, partial = process_partition(work_dir, p, stores[stores['Store'].isin(partition_stores)])
+        moments.merge(partial)
+        log(f"   partition {p + 1}/{len(partitions)}: stores {partition_stores[0]}-{partition_stores[-1]}, "
+            f"train {n_train:,}, test {n_test:,} rows")
+    timings['partitions'] = time.perf_counter() - start
+
+    log("\n[2] Normalization statistics (merged partition moments)...")
+    pipeline = FeaturePipeline().fit_moments(moments)
+    log(f"Calculated parameters for {len(pipeline.normalization_params)} features")
+
+    start = time.perf_counter()
+    log("\n[3] Normalizing and writing final datasets...")
+    outputs = write_final(work_dir, len(partitions), pipeline, output_dir, fmt=fmt)
+    params_path = os.path.join(output_dir, 'normalization_params.json')
+    with open(params_path, 'w') as f:
+        json.dump(pipeline.normalization_params, f, indent=2)
+    pipeline_file = os.path.join(output_dir, 'feature_pipeline.json')
+    with open(pipeline_file, 'w') as f:
+        json.dump(pipeline.to_dict(), f, indent=2)
+    timings['output'] = time.perf_counter() - start
+    for path, rows in outputs.values():
+        log(f"Saved: {path} ({rows:,} rows)")
+    log(f"Saved: {params_path}, {pipeline_file}")
+
+    if not keep_work:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return {
+        'partitions': len(partitions),
+        'input_rows': input_rows,
+        'outputs': outputs,
+        'timings': timings,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data-dir', default=step_1_1.BASE_PATH, help='raw dataset directory')
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR, help='final dataset directory')
+    parser.add_argument('--work-dir', default=DEFAULT_WORK_DIR, help='scratch directory for partitions')
+    parser.add_argument('--partition-mb', type=float, default=DEFAULT_PARTITION_MB,
+                        help='raw training CSV per partition (bounds memory)')
+    parser.add_argument('--format', choices=DATA_FORMATS, default=DEFAULT_FORMAT, help='dataset file format')
+    parser.add_argument('--keep-work', action='store_true', help='keep the partitions in the work directory')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("STAGE 1 STREAMING PIPELINE - PARTITIONED BY STORE")
+    print("=" * 70)
+    print(f"Data: {args.data_dir}")
+
+    start = time.perf_counter()
+    summary = run_streaming(args.data_dir, args.output_dir, args.work_dir, args.partition_mb,
+                            fmt=args.format, keep_work=args.keep_work)
+    elapsed = time.perf_counter() - start
+
+    print("\n" + "=" * 70)
+    print("⏱️  Pass timings:")
+    for name, seconds in summary['timings'].items():
+        print(f"   {name:<12}{seconds:8.1f}s")
+    print(f"   Total wall time: {elapsed:.1f}s")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,75 +1,131 @@
 """
 Stage 2 Pipeline - Advanced Analysis and Feature Engineering
 =============================================================
-This script runs all Stage 2 tasks sequentially:
+This script runs all Stage 2 tasks:
 1. Advanced Data Analysis (time series, correlation, stationarity)
-2. Enhanced Feature Engineering (42 additional features)
+2. Enhanced Feature Engineering (48 additional features)
 3. Advanced Visualizations (10 professional plots)
 
+Steps whose script, inputs and upstream steps are unchanged since a previous
+run are skipped (content-hash step cache, see stage1/pipeline_cache.py).
+Tasks 2.1 and 2.2 run in parallel; --feature-workers N also computes the
+per-Store features of task 2.2 in N worker processes (see
+stage1/partitioned_executor.py; same output).
+
 IMPORTANT: Must be run from the project root directory.
+Usage: python stage2/Stage2_pipline_runner.py [--no-cache] [--csv-export] [--feature-workers N]
 
-Input:  stage1/processed_data/Stage1.3.4_Final/train_final.csv & test_final.csv
+Input:  stage1/processed_data/Stage1.3.4_Final/train_final & test_final (.parquet or .csv)
 Output: stage2/outputs/ (analysis_results, enhanced_features, visualizations)
+        --csv-export also writes CSV copies of the enhanced datasets
 """
 
+import argparse
 import os
 import sys
+import time
 
 # Get the stage2 directory path
 stage2_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(stage2_dir)
+sys.path.insert(0, os.path.join(project_root, 'stage1'))
+
+from data_io import DATA_FORMATS, dataset_path, read_dataset, write_dataset
+from partitioned_executor import WORKERS_ENV
+from pipeline_cache import StepCache
+from pipeline_engine import Pipeline, PipelineError, script_step
+
+stage1_output = os.path.join(project_root, 'stage1', 'processed_data', 'Stage1.3.4_Final')
+output_base = os.path.join(stage2_dir, 'outputs')
+visualizations = os.path.join(output_base, 'visualizations')
+enhanced_features = os.path.join(output_base, 'enhanced_features')
+
+
+def stage1_final(name):
+    """Both formats of a Stage 1 final dataset (whichever exists is the step's source)."""
+    return tuple(dataset_path(os.path.join(stage1_output, name), fmt) for fmt in DATA_FORMATS)
+
+
+STEPS = [
+    script_step('2.1', os.path.join(stage2_dir, 'step_2_1_advanced_analysis.py'),
+                description='Advanced Data Analysis', isolated=True,
+                sources=stage1_final('train_final'),
+                files=(os.path.join(output_base, 'analysis_results'),
+                       *(os.path.join(visualizations, name) for name in (
+                           '01_time_series_decomposition.png', '02_correlation_heatmap.png',
+                           '03_holiday_impact.png')))),
+    script_step('2.2', os.path.join(stage2_dir, 'step_2_2_feature_engineering.py'),
+                description='Enhanced Feature Engineering', outputs=('enhanced_features',),
+                code=(os.path.join(stage2_dir, 'enhanced_features.py'),
+                      os.path.join(project_root, 'stage1', 'feature_kernels.py'),
+                      os.path.join(project_root, 'stage1', 'partitioned_executor.py')),
+                sources=stage1_final('train_final') + stage1_final('test_final'),
+                files=tuple(os.path.join(enhanced_features, name) for name in (
+                    'train_enhanced.parquet', 'test_enhanced.parquet', 'feature_summary.json'))),
+    script_step('2.3', os.path.join(stage2_dir, 'step_2_3_advanced_visualizations.py'),
+                description='Advanced Visualizations', inputs=('enhanced_features',), isolated=True,
+                files=tuple(os.path.join(visualizations, name) for name in (
+                    '04_historical_trends_ema.png', '05_seasonal_patterns.png',
+                    '06_store_type_performance.png', '07_department_performance_heatmap.png',
+                    '08_promotional_effectiveness.png', '09_external_factors_impact.png',
+                    '10_comprehensive_dashboard.png'))),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--no-cache', action='store_true', help='run every step and leave the step cache untouched')
+    parser.add_argument('--csv-export', action='store_true', help='also write the enhanced datasets as CSV')
+    parser.add_argument('--feature-workers', type=int,
+                        help=f'processes computing per-Store features (default ${WORKERS_ENV} or 1)')
+    args = parser.parse_args()
+    if args.feature_workers is not None:
+        os.environ[WORKERS_ENV] = str(args.feature_workers)
+
+    print("STAGE 2 PIPELINE - ADVANCED ANALYSIS & FEATURE ENGINEERING")
+    print("\nPipeline Flow:")
+    print("  Stage1.3.4_Final -> [2.1] -> Analysis")
+    print("  Stage1.3.4_Final -> [2.2] -> Enhanced Features -> [2.3] -> Advanced Visualizations\n")
+    print("Input:  stage1/processed_data/Stage1.3.4_Final/train_final & test_final")
+    print("Output: stage2/outputs/ (analysis_results, enhanced_features, visualizations)\n")
+
+    start = time.perf_counter()
+    try:
+        result = Pipeline(STEPS).run(max_workers=2, cache=None if args.no_cache else StepCache())
+    except PipelineError as e:
+        print(f"\nERROR: {e}")
+        sys.exit(1)
+    if args.csv_export:
+        for name in ('train_enhanced', 'test_enhanced'):
+            path = os.path.join(enhanced_features, name)
+            write_dataset(read_dataset(dataset_path(path, 'parquet')), path, fmt='csv')
+    elapsed = time.perf_counter() - start
+
+    # Final summary
+    print("\nSTAGE 2 PIPELINE COMPLETED SUCCESSFULLY!")
+    print("\nStep timings:")
+    for step in STEPS:
+        status = 'cached' if step.name in result['cached'] else f"{result['timings'][step.name]:.1f}s"
+        print(f"  [{step.name}] {step.description:<32} {status:>8}")
+    print(f"  Total wall time: {elapsed:.1f}s")
+    if not args.no_cache:
+        print(f"  Cache: {len(result['cached'])} of {len(STEPS)} steps reused")
+
+    print("\nAnalysis Outputs:")
+    print("  stage2/outputs/")
+    print("     |- analysis_results/")
+    print("     |  |- adf_test_results.json")
+    print("     |  |- correlation_matrix.csv")
+    print("     |  |- sales_correlations.csv")
+    print("     |  `- holiday_impact_stats.csv")
+    print("     |- enhanced_features/")
+    print("     |  |- train_enhanced.parquet (421,570 x 97)")
+    print("     |  |- test_enhanced.parquet (115,064 x 79)")
+    print("     |  `- feature_summary.json")
+    print("     `- visualizations/")
+    print("        `- [13 professional visualizations]")
+    print("\nReady for Milestone 3 (Model Development)!")
 
-print("STAGE 2 PIPELINE - ADVANCED ANALYSIS & FEATURE ENGINEERING")
-print("\nPipeline Flow:")
-print("  Stage1.3.4_Final -> [2.1] -> Analysis -> [2.2] -> Enhanced Features")
-print("  -> [2.3] -> Advanced Visualizations\n")
-
-# Task 2.1: Advanced Data Analysis
-print("[1/3] TASK 2.1: ADVANCED DATA ANALYSIS")
-print("Input:  stage1/processed_data/Stage1.3.4_Final/train_final.csv")
-print("Output: stage2/outputs/analysis_results/ & visualizations/")
-exit_code = os.system(f"{sys.executable} {os.path.join(stage2_dir, 'step_2_1_advanced_analysis.py')}")
-if exit_code != 0:
-    print(f"\nERROR: Step 2.1 failed with exit code {exit_code}")
-    sys.exit(1)
-print("Output: ADF test, correlation matrix, holiday stats")
-print("Visualizations: time series decomposition, correlation heatmap, holiday impact\n")
-
-# Task 2.2: Enhanced Feature Engineering
-print("[2/3] TASK 2.2: ENHANCED FEATURE ENGINEERING")
-print("Input:  stage1/processed_data/Stage1.3.4_Final/")
-print("Output: stage2/outputs/enhanced_features/")
-exit_code = os.system(f"{sys.executable} {os.path.join(stage2_dir, 'step_2_2_feature_engineering.py')}")
-if exit_code != 0:
-    print(f"\nERROR: Step 2.2 failed with exit code {exit_code}")
-    sys.exit(1)
-print("Output: train_enhanced.csv (91 features)")
-print("Output: test_enhanced.csv (73 features)")
-print("Output: feature_summary.json\n")
-
-# Task 2.3: Advanced Visualizations
-print("[3/3] TASK 2.3: ADVANCED VISUALIZATIONS")
-print("Input:  stage2/outputs/enhanced_features/train_enhanced.csv")
-print("Output: stage2/outputs/visualizations/")
-exit_code = os.system(f"{sys.executable} {os.path.join(stage2_dir, 'step_2_3_advanced_visualizations.py')}")
-if exit_code != 0:
-    print(f"\nERROR: Step 2.3 failed with exit code {exit_code}")
-    sys.exit(1)
-print("Output: 10 advanced visualizations created\n")
-
-# Final summary
-print("STAGE 2 PIPELINE COMPLETED SUCCESSFULLY!")
-print("\nAnalysis Outputs:")
-print("  stage2/outputs/")
-print("     |- analysis_results/")
-print("     |  |- adf_test_results.json")
-print("     |  |- correlation_matrix.csv")
-print("     |  |- sales_correlations.csv")
-print("     |  `- holiday_impact_stats.csv")
-print("     |- enhanced_features/")
-print("     |  |- train_enhanced.csv (421,570 x 91)")
-print("     |  |- test_enhanced.csv (115,064 x 73)")
-print("     |  `- feature_summary.json")
-print("     `- visualizations/")
-print("        `- [13 professional visualizations]")
-print("\nReady for Milestone 3 (Model Development)!")
 
+if __name__ == "__main__":
+    main()
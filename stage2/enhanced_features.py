@@ -0,0 +1,116 @@
+"""
+============================================================================
+Milestone 2 - Task 2.2 Feature Functions
+============================================================================
+The feature functions of step_2_2_feature_engineering.py, in a module of
+their own so that worker processes of stage1/partitioned_executor.py can
+import them. Rolling, promotional and time-aggregation features only use
+rows of their own Store (or Store/Dept); the *_INPUTS lists name the
+columns each of them reads.
+============================================================================
+"""
+
+import os
+import sys
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_root, 'stage1'))
+sys.path.insert(0, os.path.join(project_root, 'stage3', 'ML_models'))
+from feature_kernels import GroupWindows
+from Holiday_Calendar import holiday_features
+
+MARKDOWN_COLUMNS = ['MarkDown1', 'MarkDown2', 'MarkDown3', 'MarkDown4', 'MarkDown5']
+
+# Columns read by the per-Store features (besides Store)
+ROLLING_INPUTS = ['Dept', 'Weekly_Sales', 'Sales_Momentum']
+PROMO_INPUTS = ['Dept', 'Size', *MARKDOWN_COLUMNS, *(f'Has_{col}' for col in MARKDOWN_COLUMNS)]
+TIME_AGGREGATION_INPUTS = ['Year', 'Quarter', 'Month', 'Day', 'Weekly_Sales']
+
+# Season of each month (index 1-12)
+MONTH_SEASONS = np.array(['', 'Winter', 'Winter', 'Spring', 'Spring', 'Spring', 'Summer',
+                          'Summer', 'Summer', 'Fall', 'Fall', 'Fall', 'Winter'])
+
+
+def create_advanced_rolling_features(df, has_sales=True):
+    """Create advanced rolling window features (df sorted by Store, Dept, Date)"""
+    df_copy = df.copy()
+
+    if has_sales:
+        windows = GroupWindows(df_copy, ['Store', 'Dept'])
+        sales = df_copy['Weekly_Sales']
+
+        # Exponential Moving Averages
+        df_copy['Sales_EMA_4'] = windows.ewm_mean(sales, span=4)
+        df_copy['Sales_EMA_8'] = windows.ewm_mean(sales, span=8)
+        df_copy['Sales_EMA_12'] = windows.ewm_mean(sales, span=12)
+
+        # Rolling Min/Max
+        df_copy['Sales_Rolling_Min_4'] = windows.rolling(sales, window=4, how='min')
+        df_copy['Sales_Rolling_Max_4'] = windows.rolling(sales, window=4, how='max')
+        df_copy['Sales_Rolling_Range_4'] = df_copy['Sales_Rolling_Max_4'] - df_copy['Sales_Rolling_Min_4']
+        df_copy['Sales_Trend'] = df_copy['Sales_EMA_4'] - df_copy['Sales_EMA_12']
+
+        # Coefficient of Variation
+        rolling_mean = windows.rolling(sales, window=4, how='mean')
+        rolling_std = windows.rolling(sales, window=4, how='std')
+        df_copy['Sales_CV_4'] = rolling_std / (rolling_mean + 1)
+        df_copy['Sales_Acceleration'] = windows.diff(df_copy['Sales_Momentum'])
+
+    return df_copy
+
+
+def create_seasonal_features(df):
+    """Create seasonal and holiday-related features"""
+    df_copy = df.copy()
+    season = MONTH_SEASONS[df_copy['Month'].to_numpy()]
+    df_copy['Is_Holiday_Season'] = ((df_copy['Month'] == 11) | (df_copy['Month'] == 12)).astype(int)
+    df_copy['Is_BackToSchool_Season'] = ((df_copy['Month'] == 7) | (df_copy['Month'] == 8)).astype(int)
+    df_copy['Is_SuperBowl_Week'] = ((df_copy['Month'] == 2) & (df_copy['Day'] <= 14)).astype(int)
+    # Days to / since the actual Super Bowl, Labor Day, Thanksgiving and Christmas
+    for feature, values in holiday_features(df_copy['Date']).items():
+        df_copy[feature] = values
+    df_copy['Season_Winter'] = (season == 'Winter').astype(int)
+    df_copy['Season_Spring'] = (season == 'Spring').astype(int)
+    df_copy['Season_Summer'] = (season == 'Summer').astype(int)
+    df_copy['Season_Fall'] = (season == 'Fall').astype(int)
+    return df_copy
+
+
+def create_promo_features(df):
+    df_copy = df.copy()
+    df_copy['Total_MarkDown'] = df_copy[MARKDOWN_COLUMNS].sum(axis=1)
+    has_markdown_cols = [f'Has_{col}' for col in MARKDOWN_COLUMNS]
+    if all(col in df_copy.columns for col in has_markdown_cols):
+        df_copy['Num_Active_MarkDowns'] = df_copy[has_markdown_cols].sum(axis=1)
+    df_copy['Promo_Intensity'] = df_copy['Total_MarkDown'] / (df_copy['Size'] + 1)
+    df_copy['Total_MarkDown_Rolling_4'] = GroupWindows(df_copy, ['Store', 'Dept']).rolling(
+        df_copy['Total_MarkDown'], window=4, how='mean')
+    return df_copy
+
+
+def create_economic_interactions(df):
+    df_copy = df.copy()
+    df_copy['Economic_Stress'] = df_copy['CPI'] * df_copy['Unemployment']
+    df_copy['Holiday_Temperature'] = df_copy['Temperature'] * df_copy['IsHoliday']
+    df_copy['Spending_Power'] = df_copy['Fuel_Price'] * df_copy['Unemployment']
+    df_copy['Store_Purchasing_Power'] = df_copy['Size'] * df_copy['CPI']
+    return df_copy
+
+
+def create_time_aggregations(df, has_sales=True):
+    df_copy = df.copy()
+    if has_sales:
+        df_copy['Month_Store_Avg_Sales'] = df_copy.groupby(['Store', 'Year', 'Month'])['Weekly_Sales'].transform('mean')
+        df_copy['Month_Store_Total_Sales'] = df_copy.groupby(['Store', 'Year', 'Month'])['Weekly_Sales'].transform('sum')
+        df_copy['Quarter_Store_Avg_Sales'] = df_copy.groupby(['Store', 'Year', 'Quarter'])['Weekly_Sales'].transform('mean')
+        df_copy['Quarter_Store_Total_Sales'] = df_copy.groupby(['Store', 'Year', 'Quarter'])['Weekly_Sales'].transform('sum')
+        df_copy['Store_Sales_YoY_Growth'] = df_copy.groupby(['Store', 'Month', 'Day'])['Weekly_Sales'].transform(
+            lambda x: x.pct_change(periods=1))
+    return df_copy
+
+
+def present(df, columns):
+    """The columns that df has, in order"""
+    return [column for column in columns if column in df.columns]
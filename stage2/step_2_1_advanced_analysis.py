@@ -7,7 +7,7 @@ This script performs:
 2. Statistical Tests (ADF test for stationarity)
 3. Correlation Analysis (features vs sales)
 
-Input: processed_data/Final/train_final.csv
+Input: processed_data/Final/train_final.parquet (or .csv)
 Output: outputs/analysis_results/
 ============================================================================
 """
@@ -18,6 +18,7 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import json
 import os
+import sys
 
 print("MILESTONE 2 - TASK 2.1: ADVANCED DATA ANALYSIS")
 
@@ -25,12 +26,22 @@ print("MILESTONE 2 - TASK 2.1: ADVANCED DATA ANALYSIS")
 script_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(script_dir)
 stage1_output = os.path.join(project_root, 'stage1', 'processed_data', 'Stage1.3.4_Final')
+sys.path.insert(0, os.path.join(project_root, 'stage1'))
+from data_io import find_dataset, read_dataset
+
+# Columns the analysis uses (the rest of train_final is not read)
+ANALYSIS_COLUMNS = [
+    'Store', 'Dept', 'Date', 'Weekly_Sales', 'IsHoliday',
+    'Temperature', 'Fuel_Price', 'CPI', 'Unemployment', 'Size',
+    'MarkDown1', 'MarkDown2', 'MarkDown3', 'MarkDown4', 'MarkDown5',
+    'Sales_Lag1', 'Sales_Lag2', 'Sales_Lag4',
+    'Sales_Rolling_Mean_4', 'Sales_Rolling_Mean_8', 'Sales_Rolling_Std_4'
+]
 
 # Load data and create output directories
-train_path = os.path.join(stage1_output, 'train_final.csv')
+train_path = find_dataset(os.path.join(stage1_output, 'train_final'))
 print(f"\nLoading data from: {train_path}")
-train = pd.read_csv(train_path)    
-train['Date'] = pd.to_datetime(train['Date'])
+train = read_dataset(train_path, columns=ANALYSIS_COLUMNS)
 train = train.sort_values(['Store', 'Dept', 'Date']).reset_index(drop=True)
 
 # Create output directories relative to script location
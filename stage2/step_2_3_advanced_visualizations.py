@@ -11,7 +11,7 @@ This script creates advanced visualizations:
 6. External factor impact visualizations
 7. Interactive dashboard-style reports
 
-Input: outputs/enhanced_features/train_enhanced.csv
+Input: outputs/enhanced_features/train_enhanced.parquet (or .csv)
 Output: outputs/visualizations/
 ============================================================================
 """
@@ -21,6 +21,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+import sys
 
 # Set style
 plt.style.use('seaborn-v0_8-darkgrid')
@@ -30,12 +31,21 @@ print("MILESTONE 2 - TASK 2.3: ADVANCED VISUALIZATIONS")
 
 # Determine correct paths
 script_dir = os.path.dirname(os.path.abspath(__file__))
-input_path = os.path.join(script_dir, 'outputs', 'enhanced_features', 'train_enhanced.csv')
+sys.path.insert(0, os.path.join(os.path.dirname(script_dir), 'stage1'))
+from data_io import read_dataset
+
+input_path = os.path.join(script_dir, 'outputs', 'enhanced_features', 'train_enhanced')
 output_dir = os.path.join(script_dir, 'outputs', 'visualizations')
 
+# Columns the plots use (the other enhanced features are not read)
+PLOT_COLUMNS = [
+    'Store', 'Dept', 'Date', 'Weekly_Sales', 'IsHoliday', 'Size', 'Month', 'Quarter',
+    'Temperature', 'Fuel_Price', 'CPI', 'Unemployment', 'Type_A', 'Type_B',
+    'Sales_EMA_4', 'Sales_EMA_8', 'Sales_EMA_12', 'Total_MarkDown'
+]
+
 # Load data and create output directory
-train = pd.read_csv(input_path)
-train['Date'] = pd.to_datetime(train['Date'])
+train = read_dataset(input_path, columns=PLOT_COLUMNS)
 train = train.sort_values('Date').reset_index(drop=True)
 os.makedirs(output_dir, exist_ok=True)
 
@@ -6,17 +6,27 @@ from datetime import datetime
 import pickle
 from Config import RANDOM_FOREST_PARAMS, TRAIN_TEST_SPLIT_RATIO
 from Feature_Engineering import FeatureSelector
+from Feature_Pipeline import load_stage1_pipeline, pipeline_path
 from Evaluation import ModelEvaluator
 from Models import ModelTrainer
 from pathlib import Path
+import sys
 
 # Get the correct data path relative to this file
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent.parent
-DATA_PATH = PROJECT_ROOT / 'stage1' / 'processed_data' / 'Stage1.3.4_Final' / 'train_final.csv'
+sys.path.insert(0, str(PROJECT_ROOT / 'stage1'))
+from data_io import read_dataset
 
-# data
-data = pd.read_csv(DATA_PATH)
+# Stage 1 output, Parquet or CSV (see stage1/data_io.py)
+DATA_PATH = PROJECT_ROOT / 'stage1' / 'processed_data' / 'Stage1.3.4_Final' / 'train_final'
+
+# Feature pipeline fitted by Stage 1 (normalization of the training data)
+STAGE1_FINAL_DIR = DATA_PATH.parent
+
+# data: only the columns the model uses
+MODEL_COLUMNS = ['Date', 'Weekly_Sales'] + FeatureSelector().get_features_by_stage('full')
+data = read_dataset(DATA_PATH, columns=MODEL_COLUMNS)
 
 # Trains the best Random Forest model using all features and evaluates its performance.
 def train_best_random_forest(data, target_col='Weekly_Sales', save_path=None):
@@ -91,6 +101,10 @@ def train_best_random_forest(data, target_col='Weekly_Sales', save_path=None):
         with open(save_path, 'wb') as f:
             pickle.dump(model, f)
         print("✓ Model saved successfully")
+
+        # Serving turns raw inputs into these features with the same pipeline
+        pipeline_file = load_stage1_pipeline(STAGE1_FINAL_DIR, features).save(pipeline_path(save_path))
+        print(f"✓ Feature pipeline saved to: {pipeline_file}")
     
     print("="*70 + "\n")
     
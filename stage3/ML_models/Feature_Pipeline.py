@@ -0,0 +1,210 @@
+# Feature pipeline shared by training and serving.
+# Stage 1 builds the training data with it, Stage 3 saves the fitted pipeline next to
+# the trained model, and Stage 4 turns raw request batches into model features with
+# the same object: calendar features, markdown flags, store type one-hot encoding and
+# the z-score normalization fitted on the training data.
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from Feature_Engineering import FeatureSelector
+from Holiday_Calendar import HOLIDAY_FEATURES, holiday_features
+from Normalization import RunningMoments, normalize_frame, scale
+
+# Bump when the saved format changes
+PIPELINE_VERSION = 1
+
+# Continuous features z-scored with training statistics
+CONTINUOUS_FEATURES = [
+    'Size', 'Temperature', 'Fuel_Price', 'CPI', 'Unemployment',
+    'MarkDown1', 'MarkDown2', 'MarkDown3', 'MarkDown4', 'MarkDown5',
+    'Sales_Lag1', 'Sales_Lag2', 'Sales_Lag4', 'Sales_Rolling_Mean_4',
+    'Sales_Rolling_Mean_8', 'Sales_Rolling_Std_4', 'Sales_Momentum'
+]
+
+MARKDOWN_COLUMNS = [f'MarkDown{i}' for i in range(1, 6)]
+STORE_TYPES = ('A', 'B', 'C')
+
+# Columns produced by each feature group, in training-data order
+TIME_FEATURES = [
+    'Year', 'Month', 'Day', 'Quarter', 'DayOfWeek', 'WeekOfYear',
+    'Is_Weekend', 'Is_Month_Start', 'Is_Month_End', 'Is_Quarter_Start',
+    'Is_Quarter_End', 'Is_Year_Start', 'Is_Year_End',
+    'Month_Sin', 'Month_Cos', 'Week_Sin', 'Week_Cos', 'DayOfWeek_Sin', 'DayOfWeek_Cos'
+]
+MARKDOWN_FEATURES = [f'Has_{column}' for column in MARKDOWN_COLUMNS] + MARKDOWN_COLUMNS
+STORE_TYPE_FEATURES = [f'Type_{store_type}' for store_type in STORE_TYPES]
+
+
+# Path of the pipeline saved next to a model artifact (best_model.pkl -> best_model.pipeline.json)
+def pipeline_path(model_path):
+    return Path(model_path).with_suffix('.pipeline.json')
+
+
+# Pipeline fitted by Stage 1 in stage1_dir (feature_pipeline.json, or the normalization_params.json
+# of earlier runs) for the given model features. Raises FileNotFoundError if neither exists.
+def load_stage1_pipeline(stage1_dir, features=None):
+    stage1_dir = Path(stage1_dir)
+    if (stage1_dir / 'feature_pipeline.json').exists():
+        fitted = FeaturePipeline.load(stage1_dir / 'feature_pipeline.json')
+        return FeaturePipeline(fitted.normalization_params, fitted.features if features is None else features)
+    with open(stage1_dir / 'normalization_params.json') as f:
+        return FeaturePipeline(json.load(f), features)
+
+
+# Calendar features of a date column: {feature: array}
+def time_features(dates):
+    dates = pd.DatetimeIndex(pd.to_datetime(dates))
+    out = {
+        'Year': dates.year.to_numpy(),
+        'Month': dates.month.to_numpy(),
+        'Day': dates.day.to_numpy(),
+        'Quarter': dates.quarter.to_numpy(),
+        'DayOfWeek': dates.dayofweek.to_numpy(),
+        'WeekOfYear': dates.isocalendar().week.to_numpy(dtype=np.int64),
+    }
+    out['Is_Weekend'] = out['DayOfWeek'] >= 5
+    out['Is_Month_Start'] = np.asarray(dates.is_month_start)
+    out['Is_Month_End'] = np.asarray(dates.is_month_end)
+    out['Is_Quarter_Start'] = np.asarray(dates.is_quarter_start)
+    out['Is_Quarter_End'] = np.asarray(dates.is_quarter_end)
+    out['Is_Year_Start'] = np.asarray(dates.is_year_start)
+    out['Is_Year_End'] = np.asarray(dates.is_year_end)
+
+    # Cyclical encoding
+    out['Month_Sin'] = np.sin(2 * np.pi * out['Month'] / 12)
+    out['Month_Cos'] = np.cos(2 * np.pi * out['Month'] / 12)
+    out['Week_Sin'] = np.sin(2 * np.pi * out['WeekOfYear'] / 52)
+    out['Week_Cos'] = np.cos(2 * np.pi * out['WeekOfYear'] / 52)
+    out['DayOfWeek_Sin'] = np.sin(2 * np.pi * out['DayOfWeek'] / 7)
+    out['DayOfWeek_Cos'] = np.cos(2 * np.pi * out['DayOfWeek'] / 7)
+    return out
+
+
+# Markdown presence flags (a value was recorded, even 0) and values with gaps as 0.
+# Columns missing from df count as not recorded.
+def markdown_features(df):
+    out = {}
+    values = {}
+    for column in MARKDOWN_COLUMNS:
+        if column in df.columns:
+            values[column] = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64)
+        else:
+            values[column] = np.full(len(df), np.nan)
+        out[f'Has_{column}'] = ~np.isnan(values[column])
+    for column in MARKDOWN_COLUMNS:
+        out[column] = np.where(np.isnan(values[column]), 0.0, values[column])
+    return out
+
+
+# One-hot store type: {Type_A, Type_B, Type_C: bool array}
+def store_type_features(types):
+    types = np.asarray(types, dtype=object)
+    return {f'Type_{store_type}': types == store_type for store_type in STORE_TYPES}
+
+
+class FeaturePipeline:
+
+    # normalization_params: {feature: {'mean', 'std'}} fitted on training data
+    # features: model feature columns, in model order (default: the 'full' stage)
+    def __init__(self, normalization_params=None, features=None):
+        self.normalization_params = {feature: {'mean': float(p['mean']), 'std': float(p['std'])}
+                                     for feature, p in (normalization_params or {}).items()}
+        self.features = list(features) if features is not None else FeatureSelector().get_features_by_stage('full')
+        self._compile()
+
+    # Resolve once which feature groups transform computes and how it normalizes
+    def _compile(self):
+        wanted = set(self.features)
+        self._groups = {
+            'time': not wanted.isdisjoint(TIME_FEATURES),
+            'holiday': not wanted.isdisjoint(HOLIDAY_FEATURES),
+            'markdown': not wanted.isdisjoint(MARKDOWN_FEATURES),
+            'store_type': not wanted.isdisjoint(STORE_TYPE_FEATURES),
+        }
+        derived = set(TIME_FEATURES) | set(HOLIDAY_FEATURES) | set(MARKDOWN_FEATURES) | set(STORE_TYPE_FEATURES)
+        # Features taken from the input as they are (before normalization)
+        self._passthrough = [feature for feature in self.features if feature not in derived]
+        self._normalized = [(feature, p['mean'], p['std']) for feature, p in self.normalization_params.items()
+                            if feature in wanted]
+
+    @property
+    def is_fitted(self):
+        return bool(self.normalization_params)
+
+    # Fit the normalization on training data (raw, un-normalized continuous columns)
+    def fit(self, df):
+        return self.fit_chunks([df])
+
+    # Fit the same normalization in one pass over chunks of data too large to load at once
+    def fit_chunks(self, chunks):
+        moments = RunningMoments(CONTINUOUS_FEATURES)
+        for chunk in chunks:
+            moments.update(chunk)
+        return self.fit_moments(moments)
+
+    # Fit from merged per-partition statistics (Normalization.RunningMoments)
+    def fit_moments(self, moments):
+        self.normalization_params = moments.normalization_params()
+        self._compile()
+        return self
+
+    # Z-score the continuous columns of a DataFrame with the fitted statistics (a constant
+    # column becomes 0), as float32 if asked; inplace replaces the columns of df itself
+    def normalize(self, df, float32=False, inplace=False):
+        if not inplace:
+            df = df.copy(deep=False)
+        return normalize_frame(df, self.normalization_params, np.float32 if float32 else np.float64)
+
+    # Model features for a raw batch in one columnar pass.
+    # df needs Date, Type and every passthrough feature (IsHoliday, Size, economic
+    # indicators, lag features); markdowns are optional.
+    def transform(self, df):
+        out = {}
+        if self._groups['time']:
+            out.update(time_features(df['Date']))
+        if self._groups['holiday']:
+            out.update(holiday_features(df['Date']))
+        if self._groups['markdown']:
+            out.update(markdown_features(df))
+        if self._groups['store_type']:
+            out.update(store_type_features(df['Type']))
+
+        missing = [feature for feature in self._passthrough if feature not in df.columns]
+        if missing:
+            raise KeyError(f"Input is missing feature columns: {', '.join(missing)}")
+        for feature in self._passthrough:
+            out[feature] = df[feature].to_numpy()
+
+        for feature, mean, std in self._normalized:
+            out[feature] = scale(out[feature], mean, std)
+        return pd.DataFrame({feature: out[feature] for feature in self.features})
+
+    def to_dict(self):
+        return {
+            'version': PIPELINE_VERSION,
+            'features': self.features,
+            'normalization_params': self.normalization_params,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        if state.get('version') != PIPELINE_VERSION:
+            raise ValueError(f"Unsupported feature pipeline version {state.get('version')} "
+                             f"(expected {PIPELINE_VERSION})")
+        return cls(state['normalization_params'], state['features'])
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,70 @@
+# Holiday calendar shared by training (Stage 2 features) and serving (SalesPredictor).
+# Computes the actual date of each Walmart holiday per year once, then derives
+# days-to / days-since features for whole date arrays with searchsorted on day numbers.
+
+import numpy as np
+import pandas as pd
+
+# The four holidays of the Walmart dataset's IsHoliday weeks
+HOLIDAYS = ('SuperBowl', 'LaborDay', 'Thanksgiving', 'Christmas')
+
+# First Super Bowl played on the second Sunday of February (17-game season)
+SUPER_BOWL_SECOND_SUNDAY_FROM = 2022
+
+# Feature columns produced by holiday_features
+HOLIDAY_FEATURES = ([f'Days_To_{holiday}' for holiday in HOLIDAYS] +
+                    [f'Days_Since_{holiday}' for holiday in HOLIDAYS])
+
+MONDAY, THURSDAY, SUNDAY = 0, 3, 6
+
+
+# n-th given weekday (0 = Monday) of a month
+def _nth_weekday(year, month, weekday, n):
+    first = pd.Timestamp(year=year, month=month, day=1)
+    offset = (weekday - first.dayofweek) % 7
+    return first + pd.Timedelta(days=offset + 7 * (n - 1))
+
+
+# Date of one holiday in one year
+def holiday_date(holiday, year):
+    if holiday == 'SuperBowl':
+        return _nth_weekday(year, 2, SUNDAY, 2 if year >= SUPER_BOWL_SECOND_SUNDAY_FROM else 1)
+    if holiday == 'LaborDay':
+        return _nth_weekday(year, 9, MONDAY, 1)
+    if holiday == 'Thanksgiving':
+        return _nth_weekday(year, 11, THURSDAY, 4)
+    if holiday == 'Christmas':
+        return pd.Timestamp(year=year, month=12, day=25)
+    raise ValueError(f"Unknown holiday '{holiday}'; expected one of {', '.join(HOLIDAYS)}")
+
+
+# Sorted day numbers (days since 1970-01-01) of a holiday in the given years
+def holiday_days(holiday, years):
+    return np.array([holiday_date(holiday, year).to_datetime64() for year in sorted(set(years))],
+                    dtype='datetime64[D]').astype(np.int64)
+
+
+# Day numbers of datetime-like values (time of day dropped)
+def _day_numbers(dates):
+    values = pd.DatetimeIndex(pd.to_datetime(dates)).to_numpy(dtype='datetime64[ns]')
+    return values.astype('datetime64[D]').astype(np.int64)
+
+
+# Days until each date's next holiday and since its previous one (0 on the day itself),
+# for every holiday in HOLIDAYS. Returns {feature column: int64 array}.
+def holiday_features(dates):
+    days = _day_numbers(dates)
+    if len(days) == 0:
+        return {feature: np.zeros(0, dtype=np.int64) for feature in HOLIDAY_FEATURES}
+
+    # The year before the first date and after the last bound every gap
+    first_year, last_year = (np.array([days.min(), days.max()]).astype('datetime64[D]')
+                             .astype('datetime64[Y]').astype(np.int64) + 1970)
+    years = range(first_year - 1, last_year + 2)
+
+    features = {}
+    for holiday in HOLIDAYS:
+        calendar = holiday_days(holiday, years)
+        features[f'Days_To_{holiday}'] = calendar[np.searchsorted(calendar, days, side='left')] - days
+        features[f'Days_Since_{holiday}'] = days - calendar[np.searchsorted(calendar, days, side='right') - 1]
+    return {feature: features[feature] for feature in HOLIDAY_FEATURES}
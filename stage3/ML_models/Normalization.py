@@ -0,0 +1,94 @@
+# Z-score normalization shared by Stage 1 (fitting, scaling the datasets) and serving.
+# RunningMoments keeps count, mean and sum of squared deviations per feature and is
+# updated one chunk at a time in a single pass. Partial states of different chunks,
+# Stores or processes merge into the state of all their data (Chan et al.'s pairwise
+# update), so statistics can be computed per partition, in parallel, and combined.
+
+import numpy as np
+
+
+# Non-missing values of a column as float64
+def _present(column):
+    values = column.to_numpy(dtype=np.float64, na_value=np.nan)
+    return values[~np.isnan(values)]
+
+
+class RunningMoments:
+
+    # features: columns tracked (missing ones are skipped by update)
+    def __init__(self, features):
+        self.features = list(features)
+        # feature -> (count, mean, sum of squared deviations from the mean)
+        self._moments = {}
+
+    # Fold one chunk in (missing values are skipped, as pandas' mean/std do)
+    def update(self, df):
+        for feature in self.features:
+            if feature in df.columns:
+                values = _present(df[feature])
+                if len(values):
+                    mean = values.sum() / len(values)
+                    self._combine(feature, len(values), mean, ((values - mean) ** 2).sum())
+        return self
+
+    # Fold in the partial state of other data (another chunk, Store or process)
+    def merge(self, other):
+        for feature, (count, mean, m2) in other._moments.items():
+            self._combine(feature, count, mean, m2)
+        return self
+
+    def _combine(self, feature, count, mean, m2):
+        if feature not in self._moments:
+            self._moments[feature] = (count, mean, m2)
+            return
+        count_a, mean_a, m2_a = self._moments[feature]
+        total = count_a + count
+        delta = mean - mean_a
+        self._moments[feature] = (total,
+                                  mean_a + delta * count / total,
+                                  m2_a + m2 + delta * delta * count_a * count / total)
+
+    def count(self, feature):
+        return self._moments.get(feature, (0, np.nan, np.nan))[0]
+
+    # {feature: {'mean', 'std'}} with the sample standard deviation, the
+    # normalization_params.json schema
+    def normalization_params(self):
+        params = {}
+        for feature in self.features:
+            if feature in self._moments:
+                count, mean, m2 = self._moments[feature]
+                std = np.sqrt(m2 / (count - 1)) if count > 1 else np.nan
+                params[feature] = {'mean': float(mean), 'std': float(std)}
+        return params
+
+    # Plain state for sending partials between processes or saving them
+    def to_dict(self):
+        return {'features': self.features,
+                'moments': {feature: [int(c), float(m), float(s)] for feature, (c, m, s) in self._moments.items()}}
+
+    @classmethod
+    def from_dict(cls, state):
+        moments = cls(state['features'])
+        moments._moments = {feature: (int(c), float(m), float(s)) for feature, (c, m, s) in state['moments'].items()}
+        return moments
+
+
+# Z-scores of values as dtype; a constant feature (std 0 or undefined) becomes 0.
+# Computed in float64 whatever the output dtype; values itself is never modified.
+def scale(values, mean, std, dtype=np.float64):
+    if not std > 0:
+        return np.zeros(len(values), dtype=dtype)
+    out = np.array(values, dtype=np.float64)
+    out -= mean
+    out /= std
+    return out if out.dtype == dtype else out.astype(dtype)
+
+
+# Z-score the columns of df named in normalization_params, replacing them in df
+# (no copy of the frame; one float64 column is alive at a time)
+def normalize_frame(df, normalization_params, dtype=np.float64):
+    for feature, p in normalization_params.items():
+        if feature in df.columns:
+            df[feature] = scale(df[feature].to_numpy(), p['mean'], p['std'], dtype)
+    return df
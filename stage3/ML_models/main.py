@@ -4,13 +4,11 @@ import pandas as pd
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from Forecaster import SalesForecaster
 from Feature_Engineering import FeatureSelector
-from Best_model import train_best_random_forest, data
-from pathlib import Path
+from Best_model import train_best_random_forest, data, DATA_PATH
+from data_io import read_dataset
 
-# Get correct path to training data
-PROJECT_ROOT = Path(__file__).parent.parent.parent
-DATA_PATH = PROJECT_ROOT / 'stage1' / 'processed_data' / 'Stage1.3.4_Final' / 'train_final.csv'
-df = pd.read_csv(DATA_PATH)
+# Full training data (Parquet or CSV, see stage1/data_io.py)
+df = read_dataset(DATA_PATH)
 
 # Main function demonstrating usage of the SalesForecaster class.
 def main():
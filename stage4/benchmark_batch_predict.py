@@ -0,0 +1,104 @@
+"""
+Benchmark: vectorized batch prediction and parity with per-row predict_single.
+Usage: python benchmark_batch_predict.py [--rows 10000] [--parity-rows 200] [--model PATH]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add stage4 to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from deployment.predictor import SalesPredictor
+
+DEFAULT_MODEL = Path(__file__).parent / 'models' / 'best_model.pkl'
+
+
+def make_requests(n_rows, seed=0):
+    """Build API-shaped request records spread over stores, depts and dates."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2012-06-01', '2013-06-28', freq='W-FRI')
+    store_types = np.array(['A', 'B', 'C'])
+    return pd.DataFrame({
+        'Store': rng.integers(1, 46, n_rows),
+        'Dept': rng.integers(1, 100, n_rows),
+        'Date': dates[rng.integers(0, len(dates), n_rows)].strftime('%Y-%m-%d'),
+        'IsHoliday': rng.random(n_rows) < 0.07,
+        'Temperature': rng.uniform(10, 95, n_rows).round(2),
+        'Fuel_Price': rng.uniform(2.5, 4.5, n_rows).round(3),
+        'CPI': rng.uniform(126, 228, n_rows).round(3),
+        'Unemployment': rng.uniform(4, 14, n_rows).round(3),
+        'Type': store_types[rng.integers(0, 3, n_rows)],
+        'Size': rng.integers(34000, 220000, n_rows)
+    }).to_dict('records')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000, help='batch size to time')
+    parser.add_argument('--parity-rows', type=int, default=200, help='rows checked against predict_single')
+    parser.add_argument('--repeats', type=int, default=3, help='timed repetitions (best is reported)')
+    parser.add_argument('--model', default=str(DEFAULT_MODEL), help='model pickle to load')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK: VECTORIZED BATCH PREDICTION")
+    print("=" * 70)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor = SalesPredictor(model_path=args.model)
+    print(f"Model: {args.model}")
+    if predictor.feature_table is not None:
+        lag_source = 'latest-feature table'
+    elif predictor.history_store is not None:
+        lag_source = 'history store'
+    else:
+        lag_source = 'not available (fallback lags)'
+    print(f"Lag features: {lag_source}")
+
+    requests = make_requests(args.rows)
+    features_s, total_s = [], []
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        features = predictor.engineer_features(requests)
+        features_s.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        predictor.predict_batch(requests)
+        total_s.append(time.perf_counter() - start)
+
+    print(f"\nBatch of {args.rows:,} rows ({features.shape[1]} features):")
+    print(f"  engineer_features: {min(features_s) * 1000:8.1f} ms")
+    print(f"  predict_batch:     {min(total_s) * 1000:8.1f} ms  ({args.rows / min(total_s):,.0f} rows/s)")
+
+    # Parity: every batch row must equal an independent predict_single call
+    sample = requests[:args.parity_rows]
+    batch = predictor.predict_batch(sample)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        single = [predictor.predict_single(dict(row)) for row in sample]
+    single_s = time.perf_counter() - start
+
+    mismatches = sum(
+        b['predicted_sales'] != s['predicted_sales'] or b['ci_lower'] != s['ci_lower']
+        for b, s in zip(batch, single)
+    )
+    per_row_ms = single_s / len(sample) * 1000
+    print(f"\nPer-row predict_single: {per_row_ms:.2f} ms/row "
+          f"(~{per_row_ms * args.rows / 1000:,.1f} s for {args.rows:,} rows)")
+    print(f"Parity: {len(sample) - mismatches:,}/{len(sample):,} batch rows identical to predict_single")
+    print("=" * 70)
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
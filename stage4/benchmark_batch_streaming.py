@@ -0,0 +1,120 @@
+"""
+Benchmark: server memory for large batch uploads, JSON /predict/batch vs
+NDJSON /predict/batch/stream.
+A real uvicorn server is started per upload while its resident set size is
+sampled; the streamed upload is generated and its response consumed
+incrementally, so the client does not hold the batch either.
+Usage: python benchmark_batch_streaming.py [--json-rows 10000 100000] [--stream-rows 100000 1000000]
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import psutil
+
+STAGE4_DIR = Path(__file__).parent
+sys.path.insert(0, str(STAGE4_DIR))
+
+from benchmark_batch_predict import make_requests
+from load_test_api import start_server
+
+DEFAULT_MODEL = STAGE4_DIR / 'models' / 'best_model.pkl'
+
+# Rows generated per block of the streamed upload
+UPLOAD_BLOCK_ROWS = 10000
+
+
+class RssSampler:
+    """Track the peak resident set size of a process in a background thread."""
+
+    def __init__(self, pid, interval=0.05):
+        self.process = psutil.Process(pid)
+        self.interval = interval
+        self.baseline = self.process.memory_info().rss
+        self.peak = self.baseline
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            time.sleep(self.interval)
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.baseline, self.peak
+
+
+def ndjson_upload(n_rows):
+    """Generate an NDJSON body block by block."""
+    for block, start in enumerate(range(0, n_rows, UPLOAD_BLOCK_ROWS)):
+        records = make_requests(min(UPLOAD_BLOCK_ROWS, n_rows - start), seed=block)
+        yield ''.join(json.dumps(record) + '\n' for record in records).encode()
+
+
+def run_json(client, n_rows):
+    """Post one /predict/batch request; return the rows predicted."""
+    response = client.post('/predict/batch', json={'predictions': make_requests(n_rows)})
+    response.raise_for_status()
+    return response.json()['count']
+
+
+def run_stream(client, n_rows):
+    """Stream one /predict/batch/stream upload; return the rows predicted."""
+    headers = {'Content-Type': 'application/x-ndjson'}
+    with client.stream('POST', '/predict/batch/stream', content=ndjson_upload(n_rows), headers=headers) as response:
+        response.raise_for_status()
+        summary = None
+        for line in response.iter_lines():
+            if line:
+                summary = line
+    return json.loads(summary)['count']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--json-rows', type=int, nargs='+', default=[10000, 100000], help='JSON batch sizes')
+    parser.add_argument('--stream-rows', type=int, nargs='+', default=[100000, 1000000], help='NDJSON upload sizes')
+    parser.add_argument('--model', default=str(DEFAULT_MODEL), help='model artifact for the server')
+    parser.add_argument('--port', type=int, default=8768, help='port for the test server')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK: STREAMED BATCH PREDICTION MEMORY")
+    print("=" * 70)
+
+    runs = [('/predict/batch', n, run_json) for n in args.json_rows] + \
+           [('/predict/batch/stream', n, run_stream) for n in args.stream_rows]
+
+    print(f"\n{'Endpoint':<24}{'rows':>11}{'seconds':>9}{'rows/s':>9}{'RSS base':>10}{'RSS peak':>10}{'growth':>9}")
+    print("-" * 82)
+    for endpoint, n_rows, run in runs:
+        server = start_server({'model_path': args.model}, args.port)
+        try:
+            with httpx.Client(base_url=f'http://127.0.0.1:{args.port}', timeout=None) as client:
+                sampler = RssSampler(server.pid)
+                start = time.perf_counter()
+                predicted = run(client, n_rows)
+                elapsed = time.perf_counter() - start
+                baseline, peak = sampler.stop()
+        finally:
+            server.terminate()
+            server.wait()
+
+        assert predicted == n_rows, f"{endpoint} predicted {predicted} of {n_rows} rows"
+        print(f"{endpoint:<24}{n_rows:>11,}{elapsed:>9.1f}{n_rows / elapsed:>9,.0f}"
+              f"{baseline / 2**20:>8.0f}MB{peak / 2**20:>8.0f}MB{(peak - baseline) / 2**20:>7.0f}MB")
+
+    print("\nRSS of the API server process; growth is peak minus the idle server.")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: SalesPredictor() cold start with CSV parsing vs prebuilt snapshots.
+Each configuration is measured in fresh interpreter processes.
+Usage: python benchmark_cold_start.py [--runs 3] [--model PATH]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+STAGE4_DIR = Path(__file__).parent
+sys.path.insert(0, str(STAGE4_DIR))
+
+from deployment.history_store import HistoryStore
+from deployment.feature_state import LatestFeatureTable
+from deployment.predictor import TRAIN_DATA_PATH, load_history_frame
+
+DEFAULT_MODEL = STAGE4_DIR / 'models' / 'best_model.pkl'
+
+# Runs in a fresh interpreter: time imports plus SalesPredictor construction
+CHILD_SCRIPT = """
+import contextlib, io, json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {stage4!r})
+from deployment.predictor import SalesPredictor
+imported = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    predictor = SalesPredictor(model_path={model!r}, feature_state_path={state!r},
+                               history_snapshot_path={snapshot!r})
+    predictor.predict_single({{'Store': 1, 'Dept': 1, 'Date': '2012-11-02', 'IsHoliday': False,
+                              'Temperature': 60.0, 'Fuel_Price': 3.5, 'Type': 'A', 'Size': 151315}})
+done = time.perf_counter()
+print(json.dumps({{'import': imported - start, 'init': done - imported}}))
+"""
+
+
+def time_cold_start(model, state, snapshot, runs):
+    """Return the best (import, init) timings over several fresh processes."""
+    timings = []
+    for _ in range(runs):
+        code = CHILD_SCRIPT.format(stage4=str(STAGE4_DIR), model=model, state=state, snapshot=snapshot)
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        timings.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    return min(timings, key=lambda t: t['init'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=3, help='fresh processes per configuration')
+    parser.add_argument('--model', default=str(DEFAULT_MODEL), help='model pickle to load')
+    args = parser.parse_args()
+
+    if not TRAIN_DATA_PATH.exists():
+        print(f"❌ Training data not found at {TRAIN_DATA_PATH}")
+        sys.exit(1)
+
+    print("=" * 70)
+    print("BENCHMARK: SALESPREDICTOR COLD START")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        missing = str(tmp / 'missing')
+        snapshot = tmp / 'history_snapshot'
+        state = tmp / 'feature_state.npz'
+
+        history = load_history_frame(TRAIN_DATA_PATH)
+        store = HistoryStore.from_frame(history)
+        store.save(snapshot)
+        LatestFeatureTable.from_history(store).save(state)
+
+        configs = [
+            ('CSV parse (before)', missing, missing),
+            ('history snapshot (mmap)', missing, str(snapshot)),
+            ('snapshot + feature table', str(state), str(snapshot)),
+        ]
+
+        print(f"\n{'Configuration':<28}{'import (s)':>12}{'init (s)':>12}{'total (s)':>12}")
+        print("-" * 64)
+        for name, state_path, snapshot_path in configs:
+            t = time_cold_start(args.model, state_path, snapshot_path, args.runs)
+            print(f"{name:<28}{t['import']:>12.2f}{t['init']:>12.2f}{t['import'] + t['init']:>12.2f}")
+
+    print("\ninit = SalesPredictor() plus one prediction (model load included)")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
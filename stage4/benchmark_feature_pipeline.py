@@ -0,0 +1,122 @@
+"""
+Benchmark: FeaturePipeline transform throughput, and training/serving parity.
+
+Throughput: raw batches of each size go through the fitted pipeline
+(calendar, holiday, markdown and store type features plus normalization)
+in one columnar pass.
+
+Parity: raw training records (Stage 1.1 merged rows, markdown gaps included,
+with the Stage 1.3.2 lag values as caller-supplied lags) go through
+SalesPredictor.engineer_features and must reproduce the model features of
+Stage 1's train_final exactly (both as float32, the precision the model
+splits on).
+
+IMPORTANT: Requires the Stage 1 outputs (python stage1/Stage1_pipline_runner.py --materialize-all).
+Usage: python benchmark_feature_pipeline.py [--sizes 1 100 10000 100000] [--parity-rows 0] [--model PATH]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add stage4 and stage1 to path
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'stage1'))
+
+from data_io import read_dataset
+from deployment.predictor import LAG_FEATURE_MAP, SalesPredictor
+
+DEFAULT_MODEL = Path(__file__).parent / 'models' / 'best_model.pkl'
+PROCESSED_DIR = Path(__file__).parent.parent / 'stage1' / 'processed_data'
+KEYS = ['Store', 'Dept', 'Date']
+
+
+def load_raw_training_records():
+    """Raw Stage 1.1 training rows with their Stage 1.3.2 lag values, and the train_final rows, aligned."""
+    merged = read_dataset(PROCESSED_DIR / 'Stage1.1' / 'train_merged')
+    lags = read_dataset(PROCESSED_DIR / 'Stage1.3.2' / 'train_lag_features',
+                        columns=KEYS + list(LAG_FEATURE_MAP))
+    final = read_dataset(PROCESSED_DIR / 'Stage1.3.4_Final' / 'train_final')
+    raw = merged.merge(lags, on=KEYS, how='inner', validate='one_to_one')
+    raw = raw.sort_values(KEYS).reset_index(drop=True)
+    final = final.sort_values(KEYS).reset_index(drop=True)
+    return raw.drop(columns='Weekly_Sales'), final
+
+
+def best_time(func, repeats):
+    """Fastest of ``repeats`` calls, in seconds."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 100, 10000, 100000],
+                        help='batch sizes to time')
+    parser.add_argument('--parity-rows', type=int, default=0,
+                        help='training rows checked for parity (0: all of them)')
+    parser.add_argument('--repeats', type=int, default=3, help='timed repetitions (best is reported)')
+    parser.add_argument('--model', default=str(DEFAULT_MODEL), help='model artifact to load')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK: FEATURE PIPELINE THROUGHPUT AND TRAINING/SERVING PARITY")
+    print("=" * 70)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor = SalesPredictor(model_path=args.model)
+    pipeline = predictor.feature_pipeline
+    print(f"Model: {args.model}")
+    print(f"Pipeline: {len(pipeline.features)} features, "
+          f"{len(pipeline.normalization_params)} normalized{'' if pipeline.is_fitted else ' (NOT FITTED)'}")
+
+    raw, final = load_raw_training_records()
+    print(f"Raw training records: {len(raw):,}")
+
+    # Throughput of the pipeline itself (lag values already present)
+    print(f"\n{'batch rows':>12}{'transform (ms)':>18}{'rows/s':>16}")
+    print("-" * 70)
+    for size in args.sizes:
+        batch = raw.iloc[:size]
+        seconds = best_time(lambda: pipeline.transform(batch), args.repeats)
+        print(f"{len(batch):>12,}{seconds * 1000:>18.2f}{len(batch) / seconds:>16,.0f}")
+
+    # Parity: serving features of raw training records vs the training data
+    rows = args.parity_rows or len(raw)
+    print("\n" + "-" * 70)
+    print(f"Parity check on {rows:,} training records (engineer_features vs train_final)...")
+    start = time.perf_counter()
+    served = predictor.engineer_features(raw.iloc[:rows])
+    elapsed = time.perf_counter() - start
+    print(f"engineer_features: {elapsed:.2f} s ({rows / elapsed:,.0f} rows/s)")
+
+    trained = final.iloc[:rows][pipeline.features]
+    mismatched = {}
+    for feature in pipeline.features:
+        expected = trained[feature].to_numpy(dtype=np.float32)
+        actual = served[feature].to_numpy(dtype=np.float32)
+        differs = ~((expected == actual) | (np.isnan(expected) & np.isnan(actual)))
+        if differs.any():
+            mismatched[feature] = (int(differs.sum()), float(np.nanmax(np.abs(expected - actual))))
+
+    print("-" * 70)
+    if mismatched:
+        print("⚠️  Serving features differ from the training data:")
+        for feature, (count, max_diff) in mismatched.items():
+            print(f"   {feature:<24}{count:>10,} rows  max |diff| {max_diff:.3g}")
+    else:
+        print(f"✓ Serving features identical to the training data ({len(pipeline.features)} features, float32)")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
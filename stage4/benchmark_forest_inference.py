@@ -0,0 +1,88 @@
+"""
+Benchmark: flattened-forest NumPy engine vs sklearn RandomForestRegressor.predict.
+Times batches of engineered features and checks predictions are bit-identical
+to sklearn's sequential (n_jobs=1) predict.
+Usage: python benchmark_forest_inference.py [--model PATH] [--sizes 1 10 1000 100000]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add stage4 to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from benchmark_batch_predict import make_requests
+from deployment.forest import FlatForest
+from deployment.predictor import FLAT_ENGINE_MAX_ROWS, SalesPredictor
+
+DEFAULT_MODEL = Path(__file__).parent / 'models' / 'best_model.pkl'
+
+
+def best_latency(predict, X, budget_s=2.0, max_repeats=200):
+    """Median latency of ``predict(X)`` over repeats fitting in a time budget."""
+    timings = []
+    deadline = time.perf_counter() + budget_s
+    while len(timings) < max_repeats and (len(timings) < 3 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        predict(X)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--model', default=str(DEFAULT_MODEL), help='model artifact to load')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 1000, 100000], help='batch sizes')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK: FLATTENED FOREST INFERENCE")
+    print("=" * 70)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor = SalesPredictor(model_path=args.model, inference_engine='sklearn')
+    model = predictor.model
+    forest = FlatForest.from_sklearn(model)
+    n_jobs = model.n_jobs
+    print(f"Model: {args.model} ({forest.n_trees} trees, {forest.n_nodes:,} nodes, "
+          f"max depth {forest.max_depth}, n_jobs={n_jobs})")
+
+    X_all = predictor.engineer_features(make_requests(max(args.sizes)))
+
+    print(f"\n{'Batch':>8}{'sklearn (ms)':>15}{'n_jobs=1 (ms)':>15}{'flat (ms)':>12}{'speedup':>10}{'parity':>9}")
+    print("-" * 69)
+    all_identical = True
+    for size in args.sizes:
+        X = X_all.iloc[:size]
+
+        model.set_params(n_jobs=n_jobs)
+        sklearn_s = best_latency(model.predict, X)
+        model.set_params(n_jobs=1)
+        sequential_s = best_latency(model.predict, X)
+        flat_s = best_latency(forest.predict, X)
+
+        identical = np.array_equal(model.predict(X), forest.predict(X))
+        all_identical &= identical
+        print(f"{size:>8,}{sklearn_s * 1000:>15.2f}{sequential_s * 1000:>15.2f}{flat_s * 1000:>12.2f}"
+              f"{sklearn_s / flat_s:>9.1f}x{'exact' if identical else 'DIFF':>9}")
+
+    model.set_params(n_jobs=n_jobs)
+    print("\nLatency is the median per call; speedup is sklearn (as configured) / flat.")
+    print("Parity compares against sklearn with n_jobs=1: threaded predict sums trees")
+    print("in completion order, so its last bits can vary from call to call.")
+    print(f"SalesPredictor uses the flat engine for batches up to {FLAT_ENGINE_MAX_ROWS:,} rows")
+    print("and sklearn's compiled predict above that.")
+    print("=" * 70)
+
+    if not all_identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark: indexed HistoryStore vs the original mask-and-sort lag lookup.
+Usage: python benchmark_history_store.py [--queries 5000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add stage4 to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from deployment.history_store import HistoryStore
+from deployment.predictor import TRAIN_DATA_PATH as DATA_PATH, load_history_frame
+
+
+def load_history():
+    """Load the same tail of history the predictor uses (synthetic if missing)."""
+    if DATA_PATH.exists():
+        return load_history_frame(DATA_PATH), DATA_PATH.name
+
+    rng = np.random.default_rng(42)
+    dates = pd.date_range('2010-02-05', periods=143, freq='W-FRI')
+    grid = pd.MultiIndex.from_product([range(1, 46), range(1, 81), dates], names=['Store', 'Dept', 'Date'])
+    df = grid.to_frame(index=False)
+    df['Weekly_Sales'] = rng.gamma(2.0, 8000.0, len(df))
+    return df.sort_values('Date').tail(50000), 'synthetic'
+
+
+def mask_and_sort_lookup(historical_data, store, dept, date):
+    """Reference implementation: the pre-index SalesPredictor._get_historical_sales."""
+    pred_date = pd.to_datetime(date)
+    store_dept_data = historical_data[
+        (historical_data['Store'] == store) &
+        (historical_data['Dept'] == dept) &
+        (historical_data['Date'] < pred_date)
+    ].sort_values('Date')
+
+    if len(store_dept_data) == 0:
+        return None
+
+    recent_sales = store_dept_data['Weekly_Sales'].tail(8).values
+    if len(recent_sales) >= 4:
+        return {
+            'lag1': recent_sales[-1],
+            'lag2': recent_sales[-2],
+            'lag4': recent_sales[-4],
+            'rolling_mean_4': recent_sales[-4:].mean(),
+            'rolling_mean_8': recent_sales.mean(),
+            'rolling_std_4': recent_sales[-4:].std(),
+            'momentum': recent_sales[-1] - recent_sales[-4]
+        }
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--queries', type=int, default=5000, help='number of lookups to time')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK: HISTORY STORE LAG LOOKUPS")
+    print("=" * 70)
+
+    history, source = load_history()
+    print(f"History rows: {len(history):,} ({source})")
+
+    start = time.perf_counter()
+    store = HistoryStore.from_frame(history)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"Index build: {build_ms:.1f} ms for {store.n_series:,} series")
+
+    # Query existing series at dates spread across (and just past) the window
+    rng = np.random.default_rng(0)
+    sample = history.sample(args.queries, replace=True, random_state=0)
+    offsets = pd.to_timedelta(rng.integers(0, 3, len(sample)) * 7, unit='D')
+    queries = list(zip(sample['Store'], sample['Dept'], sample['Date'] + offsets))
+
+    start = time.perf_counter()
+    reference = [mask_and_sort_lookup(history, s, d, dt) for s, d, dt in queries]
+    mask_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [store.get_lag_features(s, d, dt) for s, d, dt in queries]
+    index_s = time.perf_counter() - start
+
+    mismatches = 0
+    for ref, got in zip(reference, indexed):
+        if (ref is None) != (got is None):
+            mismatches += 1
+        elif ref is not None and any(not np.isclose(ref[k], got[k], rtol=0, atol=1e-9) for k in ref):
+            mismatches += 1
+
+    print(f"\n{'Path':<20}{'total (s)':>12}{'per lookup (us)':>18}")
+    print("-" * 50)
+    print(f"{'mask + sort':<20}{mask_s:>12.3f}{mask_s / len(queries) * 1e6:>18.1f}")
+    print(f"{'HistoryStore':<20}{index_s:>12.3f}{index_s / len(queries) * 1e6:>18.1f}")
+    print(f"\nSpeedup: {mask_s / index_s:,.0f}x")
+    print(f"Parity: {len(queries) - mismatches:,}/{len(queries):,} lookups identical")
+    print("=" * 70)
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
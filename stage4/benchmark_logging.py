@@ -0,0 +1,93 @@
+"""
+Benchmark: /predict throughput with request logging off, sampled and on for every call.
+Log output goes to a real file through the queue-based handler.
+Usage: python benchmark_logging.py [--requests 2000] [--model PATH]
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+# Add stage4 to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi.testclient import TestClient
+
+from benchmark_batch_predict import make_requests
+from deployment.config import API_CONFIG
+from deployment.logging_setup import LOGGER_NAME, RequestSampler, StructuredFormatter, setup_logging
+
+DEFAULT_MODEL = Path(__file__).parent / 'models' / 'best_model.pkl'
+
+# (label, logger level, 1-in-N request sampling, write synchronously)
+MODES = [
+    ('logging off', 'warning', 0, False),
+    ('sampled 1/100', 'info', 100, False),
+    ('every request', 'info', 1, False),
+    ('every request, sync', 'info', 1, True),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000, help='sequential /predict calls per mode')
+    parser.add_argument('--model', default=str(DEFAULT_MODEL), help='model artifact to load')
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    API_CONFIG['model_path'] = args.model
+    with contextlib.redirect_stderr(io.StringIO()):
+        from deployment import api
+
+    print("=" * 70)
+    print("BENCHMARK: /predict THROUGHPUT WITH LOGGING")
+    print("=" * 70)
+
+    client = TestClient(api.app)
+    payloads = make_requests(args.requests)
+
+    # Warm-up outside the timed runs
+    for payload in payloads[:50]:
+        client.post('/predict', json=payload)
+
+    print(f"\n{'Mode':<22}{'req/s':>10}{'mean (ms)':>12}{'log lines':>12}{'dropped':>10}")
+    print("-" * 66)
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, (label, level, rate, sync) in enumerate(MODES):
+            log_path = Path(tmp) / f'{i}.log'
+            with open(log_path, 'w') as log_file:
+                handler = setup_logging(level, stream=log_file)
+                if sync:
+                    # Baseline: format and write on the request thread
+                    logger = logging.getLogger(LOGGER_NAME)
+                    logger.removeHandler(handler)
+                    sync_handler = logging.StreamHandler(log_file)
+                    sync_handler.setFormatter(StructuredFormatter())
+                    logger.addHandler(sync_handler)
+                api.predictor.request_sampler = RequestSampler(rate)
+
+                start = time.perf_counter()
+                for payload in payloads:
+                    response = client.post('/predict', json=payload)
+                    response.raise_for_status()
+                elapsed = time.perf_counter() - start
+
+                if sync:
+                    logging.getLogger(LOGGER_NAME).removeHandler(sync_handler)
+                setup_logging('warning')  # flush and detach the file
+            lines = sum(1 for _ in open(log_path))
+            print(f"{label:<22}{args.requests / elapsed:>10,.0f}{elapsed / args.requests * 1000:>12.2f}"
+                  f"{lines:>12,}{handler.dropped:>10,}")
+
+    print("\nRequests are sequential through FastAPI's TestClient; logging writes to a file.")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
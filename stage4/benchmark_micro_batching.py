@@ -0,0 +1,99 @@
+"""
+Benchmark: /predict throughput vs latency with micro-batching off and on.
+For each concurrency level and batching window a real uvicorn server is
+started and hammered with single-row /predict requests.
+Usage: python benchmark_micro_batching.py [--clients 8 32] [--waits 1 2 5 10] [--duration 8]
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+STAGE4_DIR = Path(__file__).parent
+sys.path.insert(0, str(STAGE4_DIR))
+
+from benchmark_batch_predict import make_requests
+from load_test_api import start_server
+
+DEFAULT_MODEL = STAGE4_DIR / 'models' / 'best_model.pkl'
+
+
+async def run_clients(port, clients, duration):
+    """Send single predictions back to back from concurrent clients."""
+    singles = make_requests(500, seed=1)
+    latencies = []
+    errors = 0
+
+    async def client_loop(client, seed):
+        nonlocal errors
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.post('/predict', json=rng.choice(singles))
+            except httpx.TransportError:
+                errors += 1
+                continue
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*[client_loop(client, seed) for seed in range(clients)])
+        stats = (await client.get('/stats/inference')).json()
+    return np.array(latencies), errors, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, nargs='+', default=[8, 32], help='concurrency levels')
+    parser.add_argument('--waits', type=float, nargs='+', default=[1, 2, 5, 10], help='max wait (ms) values')
+    parser.add_argument('--max-batch', type=int, default=64, help='micro_batch_max_size')
+    parser.add_argument('--duration', type=float, default=8, help='seconds of load per point')
+    parser.add_argument('--model', default=str(DEFAULT_MODEL), help='model artifact for the server')
+    parser.add_argument('--port', type=int, default=8766, help='port for the test server')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK: MICRO-BATCHING THROUGHPUT VS LATENCY")
+    print("=" * 70)
+
+    points = [('off', {'micro_batching': False})] + [
+        (f'{wait:g} ms', {'micro_batching': True, 'micro_batch_max_wait_ms': wait,
+                          'micro_batch_max_size': args.max_batch})
+        for wait in args.waits
+    ]
+
+    print(f"\n{'clients':>8}{'batching':>10}{'req/s':>9}{'p50 (ms)':>10}{'p99 (ms)':>10}{'rows/batch':>12}{'errors':>8}")
+    print("-" * 67)
+    for clients in args.clients:
+        for label, overrides in points:
+            server = start_server({'model_path': args.model, **overrides}, args.port)
+            try:
+                latencies, errors, stats = asyncio.run(run_clients(args.port, clients, args.duration))
+            finally:
+                server.terminate()
+                server.wait()
+
+            batching = stats.get('micro_batching')
+            rows_per_batch = f"{batching['mean_batch_size']:.1f}" if batching else '1.0'
+            print(f"{clients:>8}{label:>10}{len(latencies) / args.duration:>9,.0f}"
+                  f"{np.percentile(latencies, 50) * 1000:>10.1f}{np.percentile(latencies, 99) * 1000:>10.1f}"
+                  f"{rows_per_batch:>12}{errors:>8}")
+        print()
+
+    print("Each row is one curve point: batching window (max wait) vs throughput and latency.")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark: model artifact formats (pickle, joblib mmap, flattened forest).
+Reports artifact size, cold load time and per-worker memory when several
+worker processes hold the same model, as uvicorn workers do.
+Usage: python benchmark_model_artifacts.py [--model PATH] [--workers 4] [--runs 3]
+"""
+
+import argparse
+import json
+import pickle
+import subprocess
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+
+import numpy as np
+import psutil
+
+STAGE4_DIR = Path(__file__).parent
+sys.path.insert(0, str(STAGE4_DIR))
+
+from deployment.model_artifacts import load_model_artifact, save_model_artifact
+
+DEFAULT_MODEL = STAGE4_DIR / 'models' / 'best_model.pkl'
+
+# Runs in a fresh interpreter (sklearn already imported, so only the artifact
+# is timed): load, predict once, report, then stay alive until stdin closes so
+# the parent can sample its memory
+WORKER_SCRIPT = """
+import json, sys, time, warnings
+import numpy as np
+import sklearn.ensemble
+sys.path.insert(0, {stage4!r})
+from deployment.model_artifacts import load_model_artifact
+warnings.filterwarnings('ignore', message='X does not have valid feature names')
+start = time.perf_counter()
+model = load_model_artifact({path!r})
+loaded = time.perf_counter()
+model.predict(np.random.default_rng(0).normal(size=(256, {n_features})))
+print(json.dumps({{'load': loaded - start}}), flush=True)
+sys.stdin.read()
+"""
+
+
+def artifact_size(path):
+    """Size on disk of a file or artifact directory in bytes."""
+    path = Path(path)
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob('*') if p.is_file())
+    return path.stat().st_size
+
+
+def run_workers(path, n_features, n_workers):
+    """Start workers on one artifact; return their load reports and memory info."""
+    code = WORKER_SCRIPT.format(stage4=str(STAGE4_DIR), path=str(path), n_features=n_features)
+    workers = [
+        subprocess.Popen([sys.executable, '-c', code], stdin=subprocess.PIPE,
+                         stdout=subprocess.PIPE, text=True)
+        for _ in range(n_workers)
+    ]
+    try:
+        reports = [json.loads(w.stdout.readline()) for w in workers]
+        # All workers are alive and hold the model: sample resident memory now
+        memory = [psutil.Process(w.pid).memory_full_info() for w in workers]
+    finally:
+        for w in workers:
+            w.stdin.close()
+            w.wait()
+    return reports, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--model', default=str(DEFAULT_MODEL), help='fitted model pickle to convert')
+    parser.add_argument('--workers', type=int, default=4, help='concurrent worker processes')
+    parser.add_argument('--runs', type=int, default=3, help='fresh processes for load timing')
+    args = parser.parse_args()
+
+    try:
+        with open(args.model, 'rb') as f:
+            model = pickle.load(f)
+        n_features = model.n_features_in_
+    except Exception as e:
+        print(f"❌ Could not load a fitted forest from {args.model}: {e}")
+        print("   Train one first with: python train_model.py")
+        sys.exit(1)
+
+    print("=" * 70)
+    print("BENCHMARK: MODEL ARTIFACT FORMATS")
+    print("=" * 70)
+    print(f"Model: {args.model} ({len(model.estimators_)} trees, "
+          f"{sum(e.tree_.node_count for e in model.estimators_):,} nodes)")
+
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    X = np.random.default_rng(1).normal(size=(1000, n_features))
+    expected = model.predict(X)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        artifacts = {
+            'pickle': tmp / 'model.pkl',
+            'joblib (mmap)': tmp / 'model.joblib',
+            'flat forest (mmap)': tmp / 'model.forest',
+        }
+        for path in artifacts.values():
+            save_model_artifact(model, path)
+
+        print(f"\n{'Format':<20}{'size (MB)':>10}{'load (s)':>10}"
+              f"{'RSS (MB)':>10}{'USS (MB)':>10}{'PSS (MB)':>10}{'parity':>8}")
+        print("-" * 78)
+        for name, path in artifacts.items():
+            loads = []
+            for _ in range(args.runs):
+                reports, _ = run_workers(path, n_features, 1)
+                loads.append(reports[0]['load'])
+
+            _, memory = run_workers(path, n_features, args.workers)
+            rss = np.mean([m.rss for m in memory]) / 1e6
+            uss = np.mean([m.uss for m in memory]) / 1e6
+            pss = np.mean([m.pss for m in memory]) / 1e6
+
+            predictions = load_model_artifact(path).predict(X)
+            parity = 'exact' if np.array_equal(predictions, expected) else 'DIFF'
+
+            print(f"{name:<20}{artifact_size(path) / 1e6:>10.1f}{min(loads):>10.3f}"
+                  f"{rss:>10.1f}{uss:>10.1f}{pss:>10.1f}{parity:>8}")
+
+    print(f"\nMemory is the mean per worker with {args.workers} workers holding the model.")
+    print("USS = private to the worker; PSS = private plus a fair share of shared pages.")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: recursive multi-week forecast over the full Store x Dept grid.
+The vectorized rollout (one model call per week for every series) is timed
+against one predict_single call per series and week, which is measured on
+a sample of series and extrapolated to the grid. The sample is also checked
+for identical predictions.
+Usage: python benchmark_multi_week.py [--weeks 52] [--loop-series 20] [--model PATH]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add stage4 to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from deployment.history_store import HISTORY_WINDOW, window_lag_features
+from deployment.predictor import LAG_FEATURE_MAP, SalesPredictor
+
+DEFAULT_MODEL = Path(__file__).parent / 'models' / 'best_model.pkl'
+
+
+def per_call_forecast(predictor, store, dept, week_dates):
+    """Recursive forecast of one series with a predict_single call per week."""
+    store_types, sizes = predictor._store_attributes([store])
+    windows, counts = predictor._history_windows([store], [dept], [week_dates[0]])
+    window = list(windows[0, HISTORY_WINDOW - counts[0]:])
+
+    predictions = []
+    for date in week_dates:
+        padded = np.full((1, HISTORY_WINDOW), np.nan)
+        if window:
+            padded[0, -len(window):] = window
+        lags = window_lag_features(padded, np.array([len(window)]))
+        record = {
+            'Store': store, 'Dept': dept, 'Date': date.strftime('%Y-%m-%d'), 'IsHoliday': False,
+            'Temperature': 60.0, 'Fuel_Price': 3.5, 'Type': store_types[0], 'Size': int(sizes[0]),
+            **{feature: lags[key][0] for feature, key in LAG_FEATURE_MAP.items()}
+        }
+        value = predictor.predict_single(record)['predicted_sales']
+        predictions.append(value)
+        window = (window + [value])[-HISTORY_WINDOW:]
+    return predictions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--weeks', type=int, default=52, help='forecast horizon')
+    parser.add_argument('--loop-series', type=int, default=20, help='series timed with per-call forecasting')
+    parser.add_argument('--model', default=str(DEFAULT_MODEL), help='model artifact to load')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK: VECTORIZED MULTI-WEEK FORECAST")
+    print("=" * 70)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor = SalesPredictor(model_path=args.model, request_log_rate=0)
+    stores, depts = predictor.all_series()
+    # Start right after the loaded history so no warm-up weeks are needed
+    start = predictor._history_end() + pd.Timedelta(weeks=1)
+    week_dates = pd.date_range(start, periods=args.weeks, freq='7D')
+    print(f"Model: {args.model}")
+    print(f"Grid: {len(stores):,} series x {args.weeks} weeks from {start.date()} "
+          f"({len(stores) * args.weeks:,} predictions)")
+
+    timings = {}
+    for strategy in ('recursive', 'direct'):
+        begin = time.perf_counter()
+        forecast = predictor.forecast_horizon(stores, depts, start, args.weeks, strategy)
+        timings[strategy] = time.perf_counter() - begin
+        if strategy == 'recursive':
+            recursive = forecast
+
+    rng = np.random.default_rng(0)
+    sample = rng.choice(len(stores), size=min(args.loop_series, len(stores)), replace=False)
+    begin = time.perf_counter()
+    looped = [per_call_forecast(predictor, int(stores[i]), int(depts[i]), week_dates) for i in sample]
+    loop_s = (time.perf_counter() - begin) / len(sample) * len(stores)
+    identical = np.array_equal(np.array(looped), recursive.to_numpy()[sample])
+
+    print(f"\n{'Method':<36}{'model calls':>13}{'seconds':>11}{'speedup':>10}")
+    print("-" * 70)
+    print(f"{'predict_single per series/week *':<36}{len(stores) * args.weeks:>13,}{loop_s:>11.1f}{'1.0x':>10}")
+    print(f"{'recursive, vectorized':<36}{args.weeks:>13,}{timings['recursive']:>11.1f}"
+          f"{loop_s / timings['recursive']:>9.0f}x")
+    print(f"{'direct, vectorized':<36}{1:>13,}{timings['direct']:>11.1f}{loop_s / timings['direct']:>9.0f}x")
+
+    print(f"\n* timed on {len(sample)} series and extrapolated to the grid")
+    print(f"Recursive parity with the per-call loop on the sample: {'exact' if identical else 'DIFF'}")
+    print("=" * 70)
+
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
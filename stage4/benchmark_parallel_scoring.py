@@ -0,0 +1,122 @@
+"""
+Benchmark: multi-process bulk scoring with shared-memory model and history
+arrays vs a private predictor per worker.
+Each configuration scores the same file with score_file; worker memory is
+sampled after every chunk. USS is memory private to a worker and PSS
+charges shared pages proportionally, so the shared segment shows up in PSS
+only once across all workers.
+Usage: python benchmark_parallel_scoring.py [--workers 1 2 4 8] [--rows 50000] [--model PATH]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import psutil
+
+# Add stage4 to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from deployment.bulk_scoring import score_file
+from deployment.logging_setup import setup_logging
+
+DEFAULT_MODEL = Path(__file__).parent / 'models' / 'best_model.pkl'
+DEFAULT_INPUT = (Path(__file__).parent.parent / 'stage1' / 'datasets' /
+                 'walmart-recruiting-store-sales-forecasting' / 'test.csv')
+
+
+class WorkerMemory:
+    """Peak summed USS and PSS of this process's children, sampled on demand."""
+
+    def __init__(self):
+        self.process = psutil.Process()
+        self.uss = 0
+        self.pss = 0
+
+    def sample(self, rows=None):
+        uss = pss = 0
+        for child in self.process.children(recursive=True):
+            try:
+                info = child.memory_full_info()
+            except psutil.Error:
+                continue
+            uss += info.uss
+            pss += info.pss
+        self.uss = max(self.uss, uss)
+        self.pss = max(self.pss, pss)
+
+
+def run(input_path, output_path, model, workers, shared, chunk_size):
+    """Score the input once; return the score_file summary and worker memory."""
+    memory = WorkerMemory()
+    summary = score_file(
+        input_path, output_path,
+        predictor_kwargs={'model_path': model, 'request_log_rate': 0},
+        chunk_size=chunk_size, workers=workers, feature_mode='engineer',
+        progress=memory.sample, shared_memory=shared
+    )
+    return summary, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='worker counts')
+    parser.add_argument('--input', default=str(DEFAULT_INPUT), help='raw Store/Dept/Date records to score')
+    parser.add_argument('--rows', type=int, default=50000, help='rows of the input to score (0 for all)')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='rows per chunk')
+    parser.add_argument('--model', default=str(DEFAULT_MODEL), help='model artifact to load')
+    args = parser.parse_args()
+
+    setup_logging('warning')
+
+    print("=" * 70)
+    print("BENCHMARK: PARALLEL BULK SCORING")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        records = pd.read_csv(args.input)
+        if args.rows:
+            records = records.head(args.rows)
+        input_path = tmp / 'input.csv'
+        records.to_csv(input_path, index=False)
+        print(f"Model: {args.model}")
+        print(f"Input: {len(records):,} rows from {args.input}, chunks of {args.chunk_size:,}")
+        print(f"CPU cores available: {len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()}")
+
+        print(f"\n{'workers':>8}{'mode':>10}{'seconds':>10}{'rows/s':>10}{'speedup':>9}"
+              f"{'USS (MB)':>11}{'PSS (MB)':>11}")
+        print("-" * 70)
+        baseline = None
+        reference = None
+        all_identical = True
+        for workers in args.workers:
+            for shared in (True, False):
+                output_path = tmp / f'predictions_{workers}_{shared}.csv'
+                summary, memory = run(input_path, output_path, args.model, workers, shared, args.chunk_size)
+                baseline = baseline or summary['seconds']
+
+                predictions = pd.read_csv(output_path)['predicted_sales'].to_numpy()
+                if reference is None:
+                    reference = predictions
+                all_identical &= np.allclose(predictions, reference, rtol=0, atol=1e-9)
+
+                print(f"{workers:>8}{'shared' if shared else 'private':>10}{summary['seconds']:>10.1f}"
+                      f"{summary['rows_per_second']:>10,.0f}{baseline / summary['seconds']:>8.1f}x"
+                      f"{memory.uss / 1e6:>11,.0f}{memory.pss / 1e6:>11,.0f}")
+
+    print("\nseconds include loading the model and history (once for 'shared', per worker")
+    print("for 'private'); USS/PSS are summed over workers at their peak.")
+    print(f"Parity across configurations: {'exact' if all_identical else 'DIFF'}")
+    print("=" * 70)
+
+    if not all_identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
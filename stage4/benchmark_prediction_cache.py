@@ -0,0 +1,121 @@
+"""
+Benchmark: API throughput with the prediction cache off and on.
+Clients replay a dashboard-like mix of repeated requests (single
+predictions, store forecasts and multi-week forecasts drawn from a fixed
+working set) against a real uvicorn server.
+Usage: python benchmark_prediction_cache.py [--clients 8] [--distinct 200] [--duration 10]
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+STAGE4_DIR = Path(__file__).parent
+sys.path.insert(0, str(STAGE4_DIR))
+
+from benchmark_batch_predict import make_requests
+from load_test_api import start_server
+
+DEFAULT_MODEL = STAGE4_DIR / 'models' / 'best_model.pkl'
+
+# Share of each endpoint in the replayed traffic
+REQUEST_MIX = [('predict', 0.7), ('store', 0.2), ('week', 0.1)]
+
+
+def make_working_set(distinct, seed=0):
+    """Distinct requests per endpoint, as (method, url, params or body)."""
+    rng = random.Random(seed)
+    dates = ['2012-10-05', '2012-10-12', '2012-10-19', '2012-10-26']
+    return {
+        'predict': [('post', '/predict', body) for body in make_requests(distinct, seed=1)],
+        'store': [('get', f'/predict/store/{rng.randint(1, 45)}', {'date': rng.choice(dates)})
+                  for _ in range(max(1, distinct // 10))],
+        'week': [('get', '/predict/week', {'store_id': rng.randint(1, 45), 'dept_id': rng.randint(1, 99),
+                                           'start_date': rng.choice(dates), 'weeks': 4})
+                 for _ in range(max(1, distinct // 10))]
+    }
+
+
+async def run_clients(port, clients, duration, working_set):
+    """Replay the working set from concurrent clients; return (kind, seconds) per success."""
+    kinds = [kind for kind, _ in REQUEST_MIX]
+    weights = [share for _, share in REQUEST_MIX]
+    results = []
+    errors = 0
+
+    async def client_loop(client, seed):
+        nonlocal errors
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            kind = rng.choices(kinds, weights)[0]
+            method, url, payload = rng.choice(working_set[kind])
+            start = time.perf_counter()
+            try:
+                if method == 'post':
+                    response = await client.post(url, json=payload)
+                else:
+                    response = await client.get(url, params=payload)
+            except httpx.TransportError:
+                errors += 1
+                continue
+            if response.status_code == 200:
+                results.append((kind, time.perf_counter() - start))
+            else:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*[client_loop(client, seed) for seed in range(clients)])
+        stats = (await client.get('/stats/cache')).json()
+    return results, errors, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=8, help='concurrent clients')
+    parser.add_argument('--distinct', type=int, default=200, help='distinct single-prediction requests')
+    parser.add_argument('--duration', type=float, default=10, help='seconds of load per configuration')
+    parser.add_argument('--model', default=str(DEFAULT_MODEL), help='model artifact for the server')
+    parser.add_argument('--port', type=int, default=8767, help='port for the test server')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK: PREDICTION CACHE")
+    print("=" * 70)
+    working_set = make_working_set(args.distinct)
+    print(f"{args.clients} clients for {args.duration:.0f}s per configuration; working set of "
+          f"{sum(len(requests) for requests in working_set.values())} distinct requests")
+
+    print(f"\n{'cache':<7}{'kind':<9}{'req/s':>9}{'p50 (ms)':>10}{'p99 (ms)':>10}{'hit rate':>10}{'errors':>8}")
+    print("-" * 63)
+    for label, enabled in (('off', False), ('on', True)):
+        server = start_server({'model_path': args.model, 'cache_predictions': enabled}, args.port)
+        try:
+            results, errors, stats = asyncio.run(run_clients(args.port, args.clients, args.duration, working_set))
+        finally:
+            server.terminate()
+            server.wait()
+
+        hit_rate = f"{stats['hit_rate']:.1%}" if stats.get('enabled') else '-'
+        for kind in ['all'] + [kind for kind, _ in REQUEST_MIX]:
+            latencies = np.array([t for k, t in results if kind in ('all', k)])
+            if len(latencies) == 0:
+                continue
+            print(f"{label if kind == 'all' else '':<7}{kind:<9}{len(latencies) / args.duration:>9,.0f}"
+                  f"{np.percentile(latencies, 50) * 1000:>10.1f}{np.percentile(latencies, 99) * 1000:>10.1f}"
+                  f"{hit_rate if kind == 'all' else '':>10}{errors if kind == 'all' else '':>8}")
+        print()
+
+    print("The hit rate includes the cold misses that fill the cache at the start of a run.")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: store-wide forecast as one vectorized batch vs one predict_single
+call per department.
+Both paths score the same departments with the store's real Type and Size
+and are checked for identical predictions.
+Usage: python benchmark_store_forecast.py [--stores 1 10 20 30] [--date 2012-11-02] [--model PATH]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add stage4 to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from deployment.predictor import SalesPredictor
+
+DEFAULT_MODEL = Path(__file__).parent / 'models' / 'best_model.pkl'
+
+
+def per_department_forecast(predictor, store_id, date):
+    """The previous implementation: predict_single for each department in turn."""
+    store_type, size = predictor.store_metadata.loc[store_id, ['Type', 'Size']]
+    return [
+        predictor.predict_single({
+            'Store': store_id, 'Dept': dept, 'Date': date, 'IsHoliday': False,
+            'Temperature': 60.0, 'Fuel_Price': 3.5, 'Type': store_type, 'Size': int(size)
+        })
+        for dept in predictor.store_departments(store_id)
+    ]
+
+
+def best_time(func, repeats):
+    """Best wall time of ``func()`` over repeats."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--stores', type=int, nargs='+', default=[1, 10, 20, 30], help='stores to forecast')
+    parser.add_argument('--date', default='2012-11-02', help='week to forecast')
+    parser.add_argument('--repeats', type=int, default=5, help='timed repetitions (best is reported)')
+    parser.add_argument('--model', default=str(DEFAULT_MODEL), help='model artifact to load')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BENCHMARK: VECTORIZED STORE FORECAST")
+    print("=" * 70)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor = SalesPredictor(model_path=args.model, request_log_rate=0)
+    print(f"Model: {args.model}; week of {args.date}")
+
+    print(f"\n{'Store':>6}{'Type':>6}{'Size':>9}{'depts':>7}{'loop (ms)':>12}{'batch (ms)':>12}{'speedup':>10}{'parity':>8}")
+    print("-" * 70)
+    all_identical = True
+    for store_id in args.stores:
+        store_type, size = predictor.store_metadata.loc[store_id, ['Type', 'Size']]
+        loop_s = best_time(lambda: per_department_forecast(predictor, store_id, args.date), args.repeats)
+        batch_s = best_time(lambda: predictor.predict_store_forecast(store_id, args.date), args.repeats)
+
+        looped = {p['Dept']: p['predicted_sales'] for p in per_department_forecast(predictor, store_id, args.date)}
+        ranked = predictor.predict_store_forecast(store_id, args.date)
+        identical = (len(looped) == len(ranked)
+                     and all(looped[p['Dept']] == p['predicted_sales'] for p in ranked)
+                     and bool(np.all(np.diff([p['predicted_sales'] for p in ranked]) <= 0)))
+        all_identical &= identical
+        print(f"{store_id:>6}{store_type:>6}{size:>9,}{len(ranked):>7}{loop_s * 1000:>12.1f}{batch_s * 1000:>12.1f}"
+              f"{loop_s / batch_s:>9.1f}x{'exact' if identical else 'DIFF':>8}")
+
+    print("\nParity: same prediction per department and results ranked by predicted sales.")
+    print("=" * 70)
+
+    if not all_identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Script to build the latest lag/rolling feature table used by the API.
+Reads the Stage 1 training data once and writes models/feature_state.npz,
+so predictor startup no longer needs to parse the Stage 1 training data.
+Usage: python build_feature_state.py [--output PATH]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add stage4 to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from deployment.history_store import HistoryStore
+from deployment.feature_state import LatestFeatureTable
+from deployment.predictor import DEFAULT_FEATURE_STATE_PATH, TRAIN_DATA_PATH as DATA_PATH, load_history_frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--output', default=str(DEFAULT_FEATURE_STATE_PATH), help='where to write the table')
+    args = parser.parse_args()
+
+    if not DATA_PATH.exists():
+        print("❌ Training data not found!")
+        print(f"   Expected location: {DATA_PATH}")
+        print("   Run stage1/Stage1_pipline_runner.py first.")
+        sys.exit(1)
+
+    print("=" * 70)
+    print("BUILDING LATEST FEATURE TABLE")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    history = load_history_frame(DATA_PATH, tail_rows=None)
+    table = LatestFeatureTable.from_history(HistoryStore.from_frame(history))
+    table.save(args.output)
+    elapsed = time.perf_counter() - start
+
+    print(f"✓ {len(history):,} weekly actuals → {table.n_series:,} store/dept series")
+    print(f"✓ Saved to {args.output} in {elapsed:.1f}s")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
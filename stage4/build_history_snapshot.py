@@ -0,0 +1,47 @@
+"""
+Script to build the binary history snapshot used for lag features.
+Reads the Stage 1 training data once and writes the exact rows SalesPredictor
+keeps as a directory of .npy arrays that the API memory-maps at startup.
+Usage: python build_history_snapshot.py [--output DIR]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add stage4 to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from deployment.history_store import HistoryStore
+from deployment.predictor import DEFAULT_HISTORY_SNAPSHOT_PATH, TRAIN_DATA_PATH, load_history_frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--output', default=str(DEFAULT_HISTORY_SNAPSHOT_PATH), help='snapshot directory')
+    args = parser.parse_args()
+
+    if not TRAIN_DATA_PATH.exists():
+        print("❌ Training data not found!")
+        print(f"   Expected location: {TRAIN_DATA_PATH}")
+        print("   Run stage1/Stage1_pipline_runner.py first.")
+        sys.exit(1)
+
+    print("=" * 70)
+    print("BUILDING HISTORY SNAPSHOT")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    store = HistoryStore.from_frame(load_history_frame(TRAIN_DATA_PATH))
+    store.save(args.output)
+    elapsed = time.perf_counter() - start
+
+    size_kb = sum(f.stat().st_size for f in Path(args.output).glob('*.npy')) / 1024
+    print(f"✓ {len(store):,} records in {store.n_series:,} store/dept series")
+    print(f"✓ Saved to {args.output} ({size_kb:,.0f} KB) in {elapsed:.1f}s")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
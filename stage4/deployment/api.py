@@ -3,8 +3,13 @@ FastAPI REST API for Sales Forecasting
 Serves predictions via HTTP endpoints
 """
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+import functools
+import json
+import tempfile
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional
 import pandas as pd
@@ -13,6 +18,17 @@ from datetime import datetime, timedelta
 import uvicorn
 from deployment.predictor import SalesPredictor
 from deployment.config import API_CONFIG
+from deployment.logging_setup import setup_logging
+from deployment.inference_pool import InferencePool, PoolSaturatedError
+from deployment.batcher import MicroBatcher
+from deployment.prediction_cache import CACHE_BACKENDS, PredictionCache, RedisCacheBackend, cache_key
+
+# Non-blocking logging: handlers only enqueue, a background thread writes
+log_handler = setup_logging(
+    level=API_CONFIG['log_level'],
+    json_output=API_CONFIG['log_format'] == 'json',
+    queue_size=API_CONFIG['log_queue_size']
+)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -33,7 +49,89 @@ app.add_middleware(
 )
 
 # Initialize predictor (loads model once at startup)
-predictor = SalesPredictor()
+predictor_kwargs = {
+    'model_path': API_CONFIG['model_path'],
+    'request_log_rate': API_CONFIG['log_request_sample_rate'] if API_CONFIG['log_predictions'] else 0
+}
+predictor = SalesPredictor(**predictor_kwargs)
+
+# Inference runs in a bounded pool so the event loop stays responsive
+inference_pool = InferencePool(
+    threads=API_CONFIG['inference_threads'],
+    queue_depth=API_CONFIG['inference_queue_depth'],
+    process_workers=API_CONFIG['inference_process_workers'],
+    process_min_rows=API_CONFIG['process_batch_min_rows'],
+    predictor_kwargs=predictor_kwargs
+)
+
+# Optional coalescing of concurrent single predictions into one batch
+micro_batcher = MicroBatcher(
+    predictor,
+    inference_pool.run,
+    max_batch_size=API_CONFIG['micro_batch_max_size'],
+    max_wait_ms=API_CONFIG['micro_batch_max_wait_ms'],
+    max_concurrent_batches=inference_pool.threads
+) if API_CONFIG['micro_batching'] else None
+
+async def refresh_worker_state():
+    """Another worker reloaded the model or recorded actuals: load them from disk."""
+    await asyncio.get_running_loop().run_in_executor(None, predictor.refresh)
+    inference_pool.recycle_processes()
+
+
+# Optional cache of predictions, keyed on the request and model version
+if API_CONFIG['cache_backend'] not in CACHE_BACKENDS:
+    raise ValueError(f"cache_backend must be one of {CACHE_BACKENDS}, got '{API_CONFIG['cache_backend']}'")
+prediction_cache = PredictionCache(
+    max_entries=API_CONFIG['cache_max_entries'],
+    ttl=API_CONFIG['cache_ttl'],
+    shared=(RedisCacheBackend(API_CONFIG['cache_redis_url'])
+            if API_CONFIG['cache_backend'] == 'redis' else None),
+    on_invalidate=refresh_worker_state
+) if API_CONFIG['cache_predictions'] else None
+
+
+async def cached(kind, payload, compute):
+    """Serve ``compute()`` through the prediction cache when it is enabled."""
+    if prediction_cache is None:
+        return await compute()
+    key = cache_key(kind, payload, predictor.model_version)
+    return await prediction_cache.get_or_compute(key, compute)
+
+
+async def cached_rows(rows):
+    """Predict rows, scoring only those missing from the prediction cache."""
+    if prediction_cache is None:
+        return await inference_pool.predict_batch(predictor, rows)
+
+    keys = [cache_key('row', row, predictor.model_version) for row in rows]
+    predictions = await prediction_cache.get_many(keys)
+    missing = [i for i, prediction in enumerate(predictions) if prediction is None]
+    if missing:
+        generation = prediction_cache.generation
+        scored = await inference_pool.predict_batch(predictor, [rows[i] for i in missing])
+        for i, prediction in zip(missing, scored):
+            predictions[i] = prediction
+        await prediction_cache.set_many([(keys[i], predictions[i]) for i in missing], generation)
+    return predictions
+
+
+def saturated_error(error):
+    """HTTP 503 telling the client to back off and retry."""
+    return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": "1"})
+
+
+@app.on_event("shutdown")
+def shutdown_inference_pool():
+    """Stop inference workers with the server."""
+    inference_pool.shutdown()
+
+
+@app.on_event("shutdown")
+async def close_prediction_cache():
+    """Close the shared cache connection."""
+    if prediction_cache is not None:
+        await prediction_cache.close()
 
 
 # Request/Response Models
@@ -72,6 +170,19 @@ class BatchPredictionRequest(BaseModel):
     predictions: List[PredictionRequest]
 
 
+class ActualRecord(BaseModel):
+    """Observed weekly sales for one store/department."""
+    Store: int = Field(..., ge=1, le=45, description="Store number (1-45)")
+    Dept: int = Field(..., ge=1, le=99, description="Department number (1-99)")
+    Date: str = Field(..., description="Week date in YYYY-MM-DD format")
+    Weekly_Sales: float = Field(..., description="Observed weekly sales")
+
+
+class ActualsRequest(BaseModel):
+    """Batch of newly observed weekly sales."""
+    actuals: List[ActualRecord]
+
+
 class PredictionResponse(BaseModel):
     """Prediction response."""
     Store: int
@@ -153,7 +264,11 @@ async def predict_single(request: PredictionRequest):
         input_data = request.dict()
         
         # Make prediction
-        prediction = predictor.predict_single(input_data)
+        if micro_batcher is not None:
+            compute = functools.partial(micro_batcher.predict, input_data)
+        else:
+            compute = functools.partial(inference_pool.run, predictor.predict_single, input_data)
+        prediction = await cached('row', input_data, compute)
         
         return {
             "Store": request.Store,
@@ -165,39 +280,49 @@ async def predict_single(request: PredictionRequest):
             "prediction_timestamp": datetime.now().isoformat()
         }
     
+    except PoolSaturatedError as e:
+        raise saturated_error(e)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+def format_prediction(pred, timestamp):
+    """Shape a predictor row as a PredictionResponse."""
+    return {
+        "Store": pred['Store'],
+        "Dept": pred['Dept'],
+        "Date": pred['Date'],
+        "predicted_sales": round(pred['predicted_sales'], 2),
+        "confidence_interval_lower": round(pred.get('ci_lower', 0), 2),
+        "confidence_interval_upper": round(pred.get('ci_upper', 0), 2),
+        "prediction_timestamp": timestamp
+    }
+
+
 @app.post("/predict/batch", response_model=BatchPredictionResponse, tags=["Predictions"])
 async def predict_batch(request: BatchPredictionRequest):
     """
     Make batch predictions for multiple records.
     
-    Useful for forecasting multiple stores/departments at once.
+    Useful for forecasting multiple stores/departments at once. Rows are
+    scored in chunks of ``max_batch_size``; use /predict/batch/stream for
+    uploads too large to hold in memory.
     """
     try:
         # Convert requests to list of dicts
         input_data = [req.dict() for req in request.predictions]
         
-        # Make batch prediction
-        predictions = predictor.predict_batch(input_data)
-        
-        # Format response
+        # Score chunk by chunk so one request never monopolizes a worker
+        chunk_size = API_CONFIG['max_batch_size']
         prediction_responses = []
         total_sales = 0
         
-        for pred in predictions:
-            prediction_responses.append({
-                "Store": pred['Store'],
-                "Dept": pred['Dept'],
-                "Date": pred['Date'],
-                "predicted_sales": round(pred['predicted_sales'], 2),
-                "confidence_interval_lower": round(pred.get('ci_lower', 0), 2),
-                "confidence_interval_upper": round(pred.get('ci_upper', 0), 2),
-                "prediction_timestamp": datetime.now().isoformat()
-            })
-            total_sales += pred['predicted_sales']
+        for start in range(0, len(input_data), chunk_size):
+            predictions = await cached_rows(input_data[start:start + chunk_size])
+            timestamp = datetime.now().isoformat()
+            for pred in predictions:
+                prediction_responses.append(format_prediction(pred, timestamp))
+                total_sales += pred['predicted_sales']
         
         return {
             "predictions": prediction_responses,
@@ -205,33 +330,144 @@ async def predict_batch(request: BatchPredictionRequest):
             "count": len(prediction_responses)
         }
     
+    except PoolSaturatedError as e:
+        raise saturated_error(e)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+async def spool_body(request):
+    """Copy the request body to a temporary file, in memory while it is small."""
+    upload = tempfile.SpooledTemporaryFile(max_size=API_CONFIG['stream_spool_max_bytes'])
+    try:
+        async for data in request.stream():
+            upload.write(data)
+    except BaseException:
+        upload.close()
+        raise
+    upload.seek(0)
+    return upload
+
+
+async def score_stream_chunk(rows):
+    """
+    Score (line number, record) pairs and return their NDJSON lines.
+
+    Once the response has started an HTTP error can no longer be sent, so a
+    full pool is waited out rather than rejected, and a chunk that fails is
+    scored row by row so only the offending lines report an error.
+    """
+    while True:
+        try:
+            predictions = await cached_rows([record for _, record in rows])
+            break
+        except PoolSaturatedError:
+            await asyncio.sleep(0.05)
+        except Exception as e:
+            if len(rows) == 1:
+                return [{"line": rows[0][0], "error": str(e)}]
+            lines = []
+            for row in rows:
+                lines.extend(await score_stream_chunk([row]))
+            return lines
+    
+    timestamp = datetime.now().isoformat()
+    return [format_prediction(pred, timestamp) for pred in predictions]
+
+
+async def stream_predictions(upload):
+    """Yield NDJSON predictions for a spooled NDJSON upload, one chunk at a time."""
+    chunk_size = API_CONFIG['max_batch_size']
+    count = errors = 0
+    total_sales = 0.0
+    try:
+        rows = []
+        lines = iter(enumerate(upload, start=1))
+        while True:
+            # Collect up to one chunk of valid rows; invalid lines are reported in place
+            output = []
+            for line_number, line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    rows.append((line_number, PredictionRequest.parse_raw(line).dict()))
+                except ValueError as e:
+                    output.append({"line": line_number, "error": str(e)})
+                if len(rows) >= chunk_size:
+                    break
+            if rows:
+                output.extend(await score_stream_chunk(rows))
+                rows = []
+            if not output:
+                break
+            
+            for item in output:
+                if 'error' in item:
+                    errors += 1
+                else:
+                    count += 1
+                    total_sales += item['predicted_sales']
+            yield ''.join(json.dumps(item) + '\n' for item in output)
+        
+        yield json.dumps({
+            "count": count,
+            "errors": errors,
+            "total_predicted_sales": round(total_sales, 2)
+        }) + '\n'
+    finally:
+        upload.close()
+
+
+@app.post("/predict/batch/stream", tags=["Predictions"])
+async def predict_batch_stream(request: Request):
+    """
+    Stream predictions for an NDJSON upload of any size.
+    
+    The body holds one PredictionRequest object per line. It is spooled to
+    a temporary file, scored in chunks of ``max_batch_size`` and answered
+    as NDJSON while scoring proceeds: one PredictionResponse per valid
+    line in input order, ``{"line": n, "error": ...}`` for lines that
+    cannot be scored, and a final ``{"count", "errors",
+    "total_predicted_sales"}`` summary. Server memory stays bounded by one
+    chunk whatever the upload size.
+    """
+    upload = await spool_body(request)
+    return StreamingResponse(stream_predictions(upload), media_type="application/x-ndjson")
+
+
 @app.get("/predict/store/{store_id}", tags=["Predictions"])
 async def predict_store(
     store_id: int,
     date: str,
-    top_departments: int = 10
+    top_departments: Optional[int] = None,
+    is_holiday: bool = False
 ):
     """
-    Predict sales for top departments in a specific store.
+    Forecast every department of a store, ranked by predicted sales.
     
     Parameters:
     - store_id: Store number (1-45)
     - date: Date in YYYY-MM-DD format
-    - top_departments: Number of top departments to predict (default: 10)
+    - top_departments: Return only the top N departments (default: all)
+    - is_holiday: Is it a holiday week? (default: false)
     """
     try:
-        predictions = predictor.predict_store_forecast(store_id, date, top_departments)
+        predictions = await cached(
+            'store',
+            {'store_id': store_id, 'date': date, 'top_departments': top_departments, 'is_holiday': is_holiday},
+            functools.partial(inference_pool.run, predictor.predict_store_forecast, store_id, date,
+                              top_departments, is_holiday)
+        )
         return {
             "store_id": store_id,
             "date": date,
+            "departments": len(predictions),
             "predictions": predictions,
             "total_predicted_sales": sum(p['predicted_sales'] for p in predictions)
         }
     
+    except PoolSaturatedError as e:
+        raise saturated_error(e)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -241,7 +477,8 @@ async def predict_week(
     store_id: int,
     dept_id: int,
     start_date: str,
-    weeks: int = 4
+    weeks: int = 4,
+    strategy: str = 'recursive'
 ):
     """
     Predict sales for multiple weeks ahead.
@@ -251,20 +488,78 @@ async def predict_week(
     - dept_id: Department number
     - start_date: Starting date (YYYY-MM-DD)
     - weeks: Number of weeks to forecast (default: 4)
+    - strategy: 'recursive' feeds each week's prediction into the next
+      week's lag features; 'direct' uses observed history only (default: recursive)
     """
     try:
-        predictions = predictor.predict_multi_week(store_id, dept_id, start_date, weeks)
+        predictions = await cached(
+            'week',
+            {'store_id': store_id, 'dept_id': dept_id, 'start_date': start_date, 'weeks': weeks,
+             'strategy': strategy},
+            functools.partial(inference_pool.run, predictor.predict_multi_week, store_id, dept_id,
+                              start_date, weeks, strategy)
+        )
         return {
             "store_id": store_id,
             "dept_id": dept_id,
+            "strategy": strategy,
             "predictions": predictions,
             "total_predicted_sales": sum(p['predicted_sales'] for p in predictions)
         }
     
+    except PoolSaturatedError as e:
+        raise saturated_error(e)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post("/actuals", tags=["Model"])
+async def record_actuals(request: ActualsRequest):
+    """
+    Record observed weekly sales.
+    
+    Updates the latest lag/rolling features used for subsequent predictions.
+    """
+    try:
+        recorded = await inference_pool.run(
+            predictor.record_actuals, [record.dict() for record in request.actuals]
+        )
+        # Process workers reload the updated lag state; cached predictions are stale
+        inference_pool.recycle_processes()
+        if prediction_cache is not None:
+            await prediction_cache.clear()
+        return {
+            "status": "success",
+            "recorded": recorded,
+            "timestamp": datetime.now().isoformat()
+        }
+    except PoolSaturatedError as e:
+        raise saturated_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/stats/inference", tags=["Statistics"])
+async def get_inference_stats():
+    """Get inference pool load (in-flight and rejected requests), batching and log queue stats."""
+    stats = inference_pool.stats()
+    stats['micro_batching'] = micro_batcher.stats() if micro_batcher is not None else None
+    stats['logging'] = {
+        'queue_size': API_CONFIG['log_queue_size'],
+        'queued': log_handler.queue.qsize(),
+        'dropped_records': log_handler.dropped
+    }
+    return stats
+
+
+@app.get("/stats/cache", tags=["Statistics"])
+async def get_cache_stats():
+    """Get prediction cache hit, miss and eviction counters."""
+    if prediction_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **prediction_cache.stats()}
+
+
 @app.get("/stats/performance", tags=["Statistics"])
 async def get_performance_stats():
     """Get model performance statistics."""
@@ -275,7 +570,13 @@ async def get_performance_stats():
 async def reload_model():
     """Reload the model from disk."""
     try:
-        predictor.load_model()
+        # Loading blocks, so it runs off the event loop (not subject to the queue limit)
+        await asyncio.get_running_loop().run_in_executor(None, predictor.load_model)
+        # Process workers load the new model; keys carry the model version,
+        # clearing also frees the old entries
+        inference_pool.recycle_processes()
+        if prediction_cache is not None:
+            await prediction_cache.clear()
         return {
             "status": "success",
             "message": "Model reloaded successfully",
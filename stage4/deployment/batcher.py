@@ -0,0 +1,136 @@
+"""
+Micro-batching for single-prediction requests
+Coalesces concurrent /predict calls into one vectorized predict_batch
+"""
+
+import asyncio
+import logging
+
+from deployment.inference_pool import PoolSaturatedError
+from deployment.logging_setup import LOGGER_NAME
+
+
+logger = logging.getLogger(f'{LOGGER_NAME}.batcher')
+
+
+class MicroBatcher:
+    """
+    Collect concurrent single-row requests and score them together.
+
+    The first request of a batch starts a ``max_wait_ms`` timer; the batch
+    is flushed when the timer fires or when ``max_batch_size`` requests have
+    arrived, whichever comes first. At most ``max_concurrent_batches`` are
+    scored at once: while every worker is busy, requests keep accumulating
+    and are dispatched together as soon as a batch finishes, so batches
+    grow with load instead of queueing up one by one. Each batch is one
+    ``predict_batch`` call run through ``run`` (the inference pool), and
+    every waiting request gets its own row of the result. Batch rows are
+    computed exactly like ``predict_single``, so coalescing does not change
+    any prediction.
+
+    All methods are called from the event loop thread, so no locking is
+    needed.
+    """
+
+    def __init__(self, predictor, run, max_batch_size=64, max_wait_ms=5.0,
+                 max_concurrent_batches=1):
+        """
+        Initialize the batcher.
+
+        Parameters:
+        -----------
+        predictor : SalesPredictor
+        run : coroutine function
+            Executes ``run(func, *args)`` off the event loop
+            (e.g. ``InferencePool.run``)
+        max_batch_size : int
+            Rows that trigger an immediate flush
+        max_wait_ms : float
+            Longest time the first request of a batch waits for company
+        max_concurrent_batches : int
+            Batches scored at the same time (normally the pool's thread count)
+        """
+        self.predictor = predictor
+        self.run = run
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_concurrent_batches = max(1, int(max_concurrent_batches))
+        self._pending = []
+        self._running = 0
+        self._timer = None
+        self._tasks = set()
+        self.batches = 0
+        self.rows = 0
+
+    async def predict(self, record):
+        """
+        Queue one record and wait for its prediction.
+
+        Returns:
+        --------
+        prediction : dict
+            Same fields as ``SalesPredictor.predict_batch`` rows
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((record, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        """Dispatch pending requests to background scoring tasks while workers are free."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending and self._running < self.max_concurrent_batches:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            self._running += 1
+            # Keep a reference so the task is not garbage-collected mid-flight
+            task = asyncio.ensure_future(self._score(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._batch_done)
+
+    def _batch_done(self, task):
+        """Free the worker slot and send whatever accumulated meanwhile."""
+        self._tasks.discard(task)
+        self._running -= 1
+        if self._pending:
+            self._flush()
+
+    async def _score(self, batch):
+        """Score one batch and resolve each request's future."""
+        records = [record for record, _ in batch]
+        try:
+            results = await self.run(self.predictor.predict_batch, records)
+        except Exception as e:
+            if len(batch) > 1 and not isinstance(e, PoolSaturatedError):
+                # A bad record fails the vectorized call; score rows one by
+                # one so only the offending request sees the error
+                logger.debug("Batch of %d failed (%s); retrying rows individually", len(batch), e)
+                await asyncio.gather(*[self._score([item]) for item in batch])
+                return
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.rows += len(batch)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self):
+        """Batches flushed and mean rows per batch."""
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'batches': self.batches,
+            'rows': self.rows,
+            'mean_batch_size': self.rows / self.batches if self.batches else 0.0
+        }
@@ -0,0 +1,370 @@
+"""
+Bulk scoring of CSV and Parquet files
+Reads input in chunks, scores them with SalesPredictor and streams predictions out
+"""
+
+import logging
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from deployment.logging_setup import LOGGER_NAME
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+logger = logging.getLogger(f'{LOGGER_NAME}.bulk_scoring')
+
+# File format selected by path suffix
+TABULAR_FORMATS = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet'
+}
+
+# How input columns become model features
+# 'engineer': raw records go through SalesPredictor.engineer_features
+# 'precomputed': the file already holds every model feature (e.g. test_final.parquet)
+# 'auto': precomputed when all model features are present, engineer otherwise
+FEATURE_MODES = ('auto', 'engineer', 'precomputed')
+
+# Predictor owned by each worker process (see _init_worker)
+_worker_predictor = None
+# Shared-memory mapping backing the worker predictor's arrays
+_worker_segment = None
+
+
+def tabular_format(path):
+    """Get the file format of a path from its suffix."""
+    suffix = Path(path).suffix.lower()
+    if suffix not in TABULAR_FORMATS:
+        raise ValueError(f"Unsupported file '{path}'; expected one of {', '.join(TABULAR_FORMATS)}")
+    return TABULAR_FORMATS[suffix]
+
+
+def _parquet():
+    """Import pyarrow.parquet, which Parquet input and output need."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet files require the pyarrow package (pip install pyarrow)") from e
+    return pq
+
+
+def iter_chunks(path, chunk_size):
+    """
+    Read a CSV or Parquet file as DataFrames of at most ``chunk_size`` rows.
+
+    Only one chunk is held in memory at a time.
+    """
+    if tabular_format(path) == 'csv':
+        yield from pd.read_csv(path, chunksize=chunk_size)
+    else:
+        for batch in _parquet().ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+
+
+class ChunkWriter:
+    """Append DataFrames to a CSV or Parquet file as they are produced."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.format = tabular_format(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._parquet_writer = None
+        self._started = False
+
+    def write(self, frame):
+        if self.format == 'csv':
+            frame.to_csv(self.path, mode='a' if self._started else 'w', header=not self._started, index=False)
+        else:
+            import pyarrow as pa
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = _parquet().ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        self._started = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+
+def score_frame(predictor, frame, feature_mode='auto'):
+    """
+    Score one chunk of records.
+
+    Parameters:
+    -----------
+    predictor : SalesPredictor
+    frame : DataFrame
+        Records with at least Store, Dept and Date. In 'engineer' mode a
+        missing Type or Size is taken from stores.csv and a missing
+        IsHoliday is False.
+    feature_mode : str
+        One of FEATURE_MODES
+
+    Returns:
+    --------
+    predictions : DataFrame
+        Store, Dept, Date, predicted_sales, ci_lower and ci_upper per row
+    """
+    if feature_mode not in FEATURE_MODES:
+        raise ValueError(f"feature_mode must be one of {FEATURE_MODES}, got '{feature_mode}'")
+    frame = frame.reset_index(drop=True)
+    if feature_mode == 'auto':
+        feature_mode = 'precomputed' if set(predictor.features) <= set(frame.columns) else 'engineer'
+
+    if feature_mode == 'precomputed':
+        features = frame[predictor.features]
+    else:
+        if 'Type' not in frame.columns or 'Size' not in frame.columns:
+            store_types, sizes = predictor._store_attributes(frame['Store'].to_numpy())
+            if 'Type' not in frame.columns:
+                frame = frame.assign(Type=store_types)
+            if 'Size' not in frame.columns:
+                frame = frame.assign(Size=sizes)
+        if 'IsHoliday' not in frame.columns:
+            frame = frame.assign(IsHoliday=False)
+        features = predictor.engineer_features(frame)
+
+    predictions = predictor._model_predict(features)
+
+    mae = 106.77  # From training
+    return pd.DataFrame({
+        'Store': frame['Store'].to_numpy(),
+        'Dept': frame['Dept'].to_numpy(),
+        'Date': frame['Date'].to_numpy(),
+        'predicted_sales': predictions,
+        'ci_lower': np.maximum(0, predictions - (1.96 * mae)),
+        'ci_upper': predictions + (1.96 * mae)
+    })
+
+
+def _init_worker(predictor_kwargs):
+    """Process-pool initializer: build one SalesPredictor per worker process."""
+    global _worker_predictor
+    from deployment.predictor import SalesPredictor
+    _worker_predictor = SalesPredictor(**predictor_kwargs)
+
+
+def _init_shared_worker(spec, forest_meta, has_history, predictor_kwargs):
+    """
+    Process-pool initializer: build a SalesPredictor over shared arrays.
+
+    The forest and history are views into the segment published by
+    ``share_predictor_state``, so every worker reads the same physical
+    memory instead of unpickling its own copy.
+    """
+    global _worker_predictor, _worker_segment
+    from deployment.forest import FOREST_ARRAYS, FlatForest
+    from deployment.history_store import SNAPSHOT_ARRAYS, HistoryStore
+    from deployment.predictor import SalesPredictor
+    from deployment.shared_arrays import attach_shared_arrays
+
+    arrays, _worker_segment = attach_shared_arrays(spec)
+    forest = FlatForest(**{name: arrays[f'forest.{name}'] for name in FOREST_ARRAYS}, **forest_meta)
+    history = (HistoryStore(**{name: arrays[f'history.{name}'] for name in SNAPSHOT_ARRAYS})
+               if has_history else None)
+    _worker_predictor = SalesPredictor(**predictor_kwargs, model=forest, history_store=history)
+
+
+def _score_in_worker(frame, feature_mode):
+    return score_frame(_worker_predictor, frame, feature_mode)
+
+
+def share_predictor_state(predictor):
+    """
+    Publish a predictor's forest and history arrays in shared memory.
+
+    Parameters:
+    -----------
+    predictor : SalesPredictor
+        Loaded predictor whose model is (or flattens to) a FlatForest
+
+    Returns:
+    --------
+    shared : SharedArrays or None
+        Segment owning the arrays; None when the model cannot be flattened
+    initargs : tuple
+        Arguments for ``_init_shared_worker`` (without predictor kwargs)
+    """
+    from sklearn.ensemble import RandomForestRegressor
+
+    from deployment.forest import FOREST_ARRAYS, FlatForest
+    from deployment.history_store import SNAPSHOT_ARRAYS
+    from deployment.shared_arrays import SharedArrays
+
+    forest = predictor.flat_forest
+    if forest is None:
+        if not isinstance(predictor.model, RandomForestRegressor):
+            return None, None
+        forest = FlatForest.from_sklearn(predictor.model)
+
+    arrays = {f'forest.{name}': getattr(forest, name) for name in FOREST_ARRAYS}
+    history = predictor.history_store
+    if history is not None:
+        arrays.update({f'history.{name}': getattr(history, name) for name in SNAPSHOT_ARRAYS})
+    forest_meta = {
+        'max_depth': forest.max_depth,
+        'n_features': forest.n_features,
+        'feature_names': forest.feature_names
+    }
+    shared = SharedArrays(arrays)
+    logger.info("Published %.1f MB of model and history arrays in shared memory", shared.nbytes / 1e6)
+    return shared, (shared.spec, forest_meta, history is not None)
+
+
+def partition_by_store(frame, n_parts):
+    """
+    Split rows into at most ``n_parts`` groups of whole stores.
+
+    Stores are assigned largest first to the group with the fewest rows,
+    so groups are balanced and each store's rows stay together.
+
+    Returns:
+    --------
+    parts : list of ndarray
+        Row positions of each non-empty group, in their original order
+    """
+    stores = frame['Store'].to_numpy()
+    _, inverse, counts = np.unique(stores, return_inverse=True, return_counts=True)
+    loads = np.zeros(n_parts, dtype=np.int64)
+    assignment = np.empty(len(counts), dtype=np.int64)
+    for store in np.argsort(-counts, kind='stable'):
+        part = int(np.argmin(loads))
+        assignment[store] = part
+        loads[part] += counts[store]
+
+    part_of_row = assignment[inverse]
+    order = np.argsort(part_of_row, kind='stable')
+    bounds = np.searchsorted(part_of_row[order], np.arange(n_parts + 1))
+    return [order[bounds[k]:bounds[k + 1]] for k in range(n_parts) if bounds[k + 1] > bounds[k]]
+
+
+def _collect(futures, parts):
+    """Reassemble the scored store groups of one chunk in input row order."""
+    scored = pd.concat([future.result() for future in futures], ignore_index=True)
+    return scored.iloc[np.argsort(np.concatenate(parts), kind='stable')].reset_index(drop=True)
+
+
+def peak_memory_mb():
+    """
+    Peak resident memory of this process and of its largest finished child, in MB.
+
+    Returns (None, None) where the ``resource`` module is unavailable.
+    """
+    if resource is None:
+        return None, None
+    # ru_maxrss is in kilobytes on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return own, children
+
+
+def score_file(input_path, output_path, predictor_kwargs, chunk_size=50000, workers=0,
+               feature_mode='auto', progress=None, shared_memory=True):
+    """
+    Score every row of a CSV or Parquet file and write the predictions.
+
+    Chunks are read, scored and written in input order. With ``workers``
+    > 0 each chunk is split into store groups (see ``partition_by_store``)
+    scored in parallel by a process pool, and at most two chunks are in
+    flight, so memory stays bounded by a few chunks whatever the file size.
+
+    With ``shared_memory`` the model is loaded once in this process and its
+    flattened forest and history arrays are published in shared memory for
+    the workers (which then always use the NumPy forest engine); otherwise
+    every worker loads its own predictor.
+
+    Parameters:
+    -----------
+    input_path, output_path : str or Path
+        '.csv' or '.parquet' files
+    predictor_kwargs : dict
+        SalesPredictor arguments (e.g. model_path)
+    chunk_size : int
+        Rows per chunk
+    workers : int
+        Worker processes (0 scores in this process)
+    feature_mode : str
+        One of FEATURE_MODES
+    progress : callable, optional
+        Called with the number of rows written so far after each chunk
+    shared_memory : bool
+        Share one copy of the model and history between workers
+
+    Returns:
+    --------
+    summary : dict
+        rows, seconds, rows_per_second and peak memory (MB) of this process
+        and of the largest worker
+    """
+    if feature_mode not in FEATURE_MODES:
+        raise ValueError(f"feature_mode must be one of {FEATURE_MODES}, got '{feature_mode}'")
+    tabular_format(output_path)
+
+    start = time.perf_counter()
+    rows = 0
+    shared = None
+    writer = ChunkWriter(output_path)
+    try:
+        if workers > 0:
+            initializer, initargs = _init_worker, (predictor_kwargs,)
+            if shared_memory:
+                from deployment.predictor import SalesPredictor
+                shared, shared_args = share_predictor_state(SalesPredictor(**predictor_kwargs))
+                if shared is not None:
+                    initializer, initargs = _init_shared_worker, (*shared_args, predictor_kwargs)
+                else:
+                    logger.warning("Model cannot be flattened; each worker loads its own copy")
+
+            with ProcessPoolExecutor(max_workers=workers, initializer=initializer,
+                                     initargs=initargs) as executor:
+                pending = deque()
+                for chunk in iter_chunks(input_path, chunk_size):
+                    chunk = chunk.reset_index(drop=True)
+                    parts = partition_by_store(chunk, workers)
+                    futures = [executor.submit(_score_in_worker, chunk.iloc[part], feature_mode)
+                               for part in parts]
+                    pending.append((futures, parts))
+                    if len(pending) >= 2:
+                        rows += _write(writer, _collect(*pending.popleft()), rows, progress)
+                while pending:
+                    rows += _write(writer, _collect(*pending.popleft()), rows, progress)
+        else:
+            from deployment.predictor import SalesPredictor
+            predictor = SalesPredictor(**predictor_kwargs)
+            for chunk in iter_chunks(input_path, chunk_size):
+                rows += _write(writer, score_frame(predictor, chunk, feature_mode), rows, progress)
+    finally:
+        writer.close()
+        if shared is not None:
+            shared.close()
+
+    seconds = time.perf_counter() - start
+    own_mb, worker_mb = peak_memory_mb()
+    logger.info("Scored %s rows in %.1fs", f"{rows:,}", seconds)
+    return {
+        'rows': rows,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds > 0 else 0.0,
+        'peak_memory_mb': own_mb,
+        'worker_peak_memory_mb': worker_mb if workers > 0 else None
+    }
+
+
+def _write(writer, predictions, rows_before, progress):
+    """Write one scored chunk and report progress; returns its row count."""
+    writer.write(predictions)
+    if progress is not None:
+        progress(rows_before + len(predictions))
+    return len(predictions)
@@ -2,6 +2,8 @@
 API Configuration Settings
 """
 
+import os
+
 API_CONFIG = {
     # Server settings
     'host': '0.0.0.0',
@@ -23,13 +25,27 @@ API_CONFIG = {
     'model_reload_interval': 3600,  # seconds
     
     # Performance settings
-    'max_batch_size': 1000,
+    'max_batch_size': 1000,  # rows scored per chunk of a batch request
+    'stream_spool_max_bytes': 16 * 1024 * 1024,  # streamed uploads beyond this go to disk
     'cache_predictions': False,
     'cache_ttl': 300,  # seconds
+    'cache_max_entries': 10000,  # in-process LRU size
+    'cache_backend': 'memory',  # 'memory' is per worker; use 'redis' with several workers
+    'cache_redis_url': 'redis://localhost:6379/0',
+    'inference_threads': min(4, os.cpu_count() or 1),  # 0 runs inference on the event loop
+    'inference_queue_depth': 32,  # waiting requests before HTTP 503
+    'inference_process_workers': 0,  # >0 scores large batches in processes
+    'process_batch_min_rows': 1000,  # smallest chunk sent to a process
+    'micro_batching': False,  # coalesce concurrent /predict calls
+    'micro_batch_max_size': 64,  # rows that flush a batch immediately
+    'micro_batch_max_wait_ms': 5,  # longest wait for a batch to fill
     
     # Monitoring
     'enable_metrics': True,
     'log_predictions': True,
+    'log_request_sample_rate': 100,  # log detail of 1 in N predictions
+    'log_format': 'text',  # 'text' or 'json'
+    'log_queue_size': 10000,  # records buffered before dropping
 }
 
 # Validation thresholds
@@ -0,0 +1,365 @@
+"""
+Materialized latest lag/rolling feature table
+Keeps per-(Store, Dept) features current as weekly actuals arrive
+"""
+
+import math
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking (run a single worker)
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+from deployment.history_store import (
+    HISTORY_WINDOW, KEY_STRIDE, MIN_HISTORY, make_series_keys, window_lag_features
+)
+
+
+# Column order of the materialized feature matrix
+FEATURE_COLUMNS = [
+    'lag1', 'lag2', 'lag4', 'rolling_mean_4',
+    'rolling_mean_8', 'rolling_std_4', 'momentum'
+]
+
+
+@contextmanager
+def state_file_lock(path):
+    """
+    Hold an exclusive lock on ``<path>.lock`` (shared by every process).
+
+    Writers take it around read-modify-write of a persisted table, so
+    actuals recorded concurrently by several API workers are all kept.
+    """
+    lock_path = Path(f'{path}.lock')
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class LatestFeatureTable:
+    """
+    Latest lag/rolling features for every (Store, Dept) series.
+
+    Each series keeps its last HISTORY_WINDOW weekly actuals in a ring
+    buffer, so a new actual updates the series in O(1) and the materialized
+    features are read with a dictionary lookup. Features are recomputed from
+    the buffer with the arithmetic of ``window_lag_features``, so they match
+    the values a rebuild from history gives bit for bit (no running sums to
+    drift or cancel).
+    """
+
+    def __init__(self, capacity=4096):
+        """
+        Initialize an empty table.
+
+        Parameters:
+        -----------
+        capacity : int
+            Initial number of series slots (grows on demand)
+        """
+        self.index = {}
+        self.n_series = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        """Allocate (or grow) the per-series state arrays."""
+        old_n = self.n_series
+        state = {
+            'keys': np.zeros(capacity, dtype=np.int64),
+            'buffers': np.zeros((capacity, HISTORY_WINDOW), dtype=np.float64),
+            'positions': np.zeros(capacity, dtype=np.int64),
+            'counts': np.zeros(capacity, dtype=np.int64),
+            'last_dates': np.full(capacity, np.iinfo(np.int64).min, dtype=np.int64),
+            'features': np.full((capacity, len(FEATURE_COLUMNS)), np.nan, dtype=np.float64)
+        }
+        for name, array in state.items():
+            if old_n:
+                array[:old_n] = getattr(self, name)[:old_n]
+            setattr(self, name, array)
+
+    def _slot(self, key):
+        """Get the row for a series key, creating it if needed."""
+        row = self.index.get(key)
+        if row is None:
+            if self.n_series == len(self.keys):
+                self._allocate(2 * len(self.keys))
+            row = self.n_series
+            self.keys[row] = key
+            self.index[key] = row
+            self.n_series += 1
+        return row
+
+    def update(self, store, dept, date, weekly_sales):
+        """
+        Record one weekly actual for a series in O(1).
+
+        Parameters:
+        -----------
+        store, dept : int
+            Series identifiers
+        date : str or datetime
+            Week of the actual; must be later than the series' last actual
+        weekly_sales : float
+            Observed weekly sales
+        """
+        row = self._slot(int(store) * KEY_STRIDE + int(dept))
+        date_ns = pd.Timestamp(date).value
+        if date_ns <= self.last_dates[row]:
+            raise ValueError(
+                f"Actual for Store {store}, Dept {dept} on {pd.Timestamp(date).date()} "
+                f"is not newer than the last recorded week"
+            )
+
+        pos = self.positions[row]
+        self.buffers[row, pos] = float(weekly_sales)
+        self.positions[row] = (pos + 1) % HISTORY_WINDOW
+        self.counts[row] = min(self.counts[row] + 1, HISTORY_WINDOW)
+        self.last_dates[row] = date_ns
+
+        self._materialize(row)
+
+    def update_batch(self, records):
+        """
+        Record many weekly actuals, all or none.
+
+        The whole batch is validated first (fields, and every actual newer
+        than its series' previous one), so a bad record leaves the table
+        unchanged.
+
+        Parameters:
+        -----------
+        records : list of dict
+            Records with Store, Dept, Date and Weekly_Sales, in any order
+
+        Returns:
+        --------
+        count : int
+            Number of actuals recorded
+        """
+        parsed = []
+        for i, record in enumerate(records):
+            try:
+                parsed.append((int(record['Store']), int(record['Dept']),
+                               pd.Timestamp(record['Date']), float(record['Weekly_Sales'])))
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"Invalid actual at position {i}: {e!r}") from e
+        parsed.sort(key=lambda r: r[2])
+
+        last_dates = {}
+        for store, dept, date, _ in parsed:
+            key = store * KEY_STRIDE + dept
+            if key not in last_dates:
+                row = self.index.get(key)
+                last_dates[key] = self.last_dates[row] if row is not None else np.iinfo(np.int64).min
+            if date.value <= last_dates[key]:
+                raise ValueError(
+                    f"Actual for Store {store}, Dept {dept} on {date.date()} "
+                    f"is not newer than the last recorded week"
+                )
+            last_dates[key] = date.value
+
+        for store, dept, date, weekly_sales in parsed:
+            self.update(store, dept, date, weekly_sales)
+        return len(parsed)
+
+    def _materialize(self, row):
+        """Refresh the feature row of a series from its ring buffer."""
+        count = int(self.counts[row])
+        if count < MIN_HISTORY:
+            self.features[row] = np.nan
+            return
+
+        # Oldest first, zero before the first actual, combined in the order
+        # window_lag_features uses
+        buffer = self.buffers[row]
+        pos = int(self.positions[row])
+        first = HISTORY_WINDOW - count
+        c = [float(buffer[(pos + j) % HISTORY_WINDOW]) if j >= first else 0.0
+             for j in range(HISTORY_WINDOW)]
+
+        mean_4 = (((c[-4] + c[-3]) + c[-2]) + c[-1]) / 4
+        dev = [(value - mean_4) * (value - mean_4) for value in c[-4:]]
+        std_4 = math.sqrt((((dev[0] + dev[1]) + dev[2]) + dev[3]) / 4)
+        if count == HISTORY_WINDOW:
+            sum_8 = ((c[0] + c[1]) + (c[2] + c[3])) + ((c[4] + c[5]) + (c[6] + c[7]))
+        else:
+            sum_8 = c[0]
+            for value in c[1:]:
+                sum_8 += value
+
+        self.features[row] = (c[-1], c[-2], c[-4], mean_4, sum_8 / count, std_4, c[-1] - c[-4])
+
+    def _ordered_windows(self, rows=slice(None)):
+        """Unroll ring buffers into oldest-first windows, NaN-padded on the left."""
+        buffers = self.buffers[rows]
+        positions = self.positions[rows]
+        counts = self.counts[rows]
+        # Column j holds the value written (HISTORY_WINDOW - j) updates ago
+        order = (positions[:, None] + np.arange(HISTORY_WINDOW)) % HISTORY_WINDOW
+        windows = np.take_along_axis(buffers, order, axis=1)
+        valid = np.arange(HISTORY_WINDOW) >= (HISTORY_WINDOW - counts)[:, None]
+        return np.where(valid, windows, np.nan), counts
+
+    def _rebuild(self):
+        """Recompute every series' features from the buffers."""
+        n = self.n_series
+        windows, counts = self._ordered_windows(slice(0, n))
+        features = window_lag_features(windows, counts)
+        self.features[:n] = np.column_stack([features[name] for name in FEATURE_COLUMNS])
+
+    @classmethod
+    def from_history(cls, history_store):
+        """
+        Build the table from the latest weeks of every series in a HistoryStore.
+
+        Parameters:
+        -----------
+        history_store : HistoryStore
+
+        Returns:
+        --------
+        table : LatestFeatureTable
+        """
+        n = history_store.n_series
+        table = cls(capacity=max(n, 1))
+        if n == 0:
+            return table
+
+        ends = history_store.offsets[1:]
+        counts = np.minimum(np.diff(history_store.offsets), HISTORY_WINDOW)
+        positions = ends[:, None] - HISTORY_WINDOW + np.arange(HISTORY_WINDOW)
+        valid = positions >= (ends - counts)[:, None]
+        windows = np.where(valid, history_store.sales[np.clip(positions, 0, None)], 0.0)
+
+        # Stored oldest-first with the write position wrapped back to slot 0
+        table.keys[:n] = history_store.keys
+        table.buffers[:n] = windows
+        table.positions[:n] = 0
+        table.counts[:n] = counts
+        table.last_dates[:n] = history_store.dates[ends - 1]
+        table.n_series = n
+        table.index = {int(key): row for row, key in enumerate(history_store.keys)}
+        table._rebuild()
+        return table
+
+    def save(self, path):
+        """
+        Persist the table state to an .npz file.
+
+        The state is written to a temporary file in the same directory and
+        renamed onto ``path``, so readers (other API workers) and the next
+        start never see a partially written file.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        n = self.n_series
+        with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp',
+                                         delete=False) as f:
+            try:
+                np.savez(
+                    f,
+                    keys=self.keys[:n],
+                    buffers=self.buffers[:n],
+                    positions=self.positions[:n],
+                    counts=self.counts[:n],
+                    last_dates=self.last_dates[:n]
+                )
+                f.flush()
+                os.fsync(f.fileno())
+            except BaseException:
+                f.close()
+                os.unlink(f.name)
+                raise
+        os.replace(f.name, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load a table saved with ``save``."""
+        with np.load(path) as state:
+            n = len(state['keys'])
+            table = cls(capacity=max(n, 1))
+            for name in ('keys', 'buffers', 'positions', 'counts', 'last_dates'):
+                getattr(table, name)[:n] = state[name]
+        table.n_series = n
+        table.index = {int(key): row for row, key in enumerate(table.keys[:n])}
+        table._rebuild()
+        return table
+
+    def get_lag_features(self, store, dept):
+        """
+        Get the latest features of one series.
+
+        Returns:
+        --------
+        features : dict or None
+            Same keys as ``HistoryStore.get_lag_features``
+        """
+        row = self.index.get(int(store) * KEY_STRIDE + int(dept))
+        if row is None or self.counts[row] < MIN_HISTORY:
+            return None
+        return dict(zip(FEATURE_COLUMNS, self.features[row]))
+
+    def get_lag_features_batch(self, stores, depts, dates):
+        """
+        Vectorized lookup of the latest features for many rows.
+
+        Returns:
+        --------
+        features : dict of ndarray
+            Feature arrays aligned with the inputs, NaN for unknown series
+        is_current : ndarray of bool
+            True where the row's date is after the series' last actual, i.e.
+            where the latest state is exactly the history before that date
+        """
+        keys = make_series_keys(stores, depts)
+        rows = np.fromiter((self.index.get(key, -1) for key in keys.tolist()),
+                           dtype=np.int64, count=len(keys))
+        known = rows >= 0
+        rows_c = np.where(known, rows, 0)
+
+        matrix = np.where(known[:, None], self.features[rows_c], np.nan)
+        dates_ns = pd.to_datetime(np.asarray(dates)).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        is_current = known & (dates_ns > self.last_dates[rows_c])
+
+        features = {name: matrix[:, i] for i, name in enumerate(FEATURE_COLUMNS)}
+        return features, is_current
+
+    def get_windows_batch(self, stores, depts, dates):
+        """
+        Vectorized lookup of the latest history windows for many rows.
+
+        Returns:
+        --------
+        windows : ndarray of shape (n, HISTORY_WINDOW)
+            Most recent weekly sales, oldest first, NaN-padded on the left
+            (all NaN for unknown series)
+        counts : ndarray of shape (n,)
+            Number of valid weeks in each window
+        is_current : ndarray of bool
+            True where the row's date is after the series' last actual
+        """
+        keys = make_series_keys(stores, depts)
+        rows = np.fromiter((self.index.get(key, -1) for key in keys.tolist()),
+                           dtype=np.int64, count=len(keys))
+        known = rows >= 0
+        rows_c = np.where(known, rows, 0)
+
+        windows, counts = self._ordered_windows(rows_c)
+        windows = np.where(known[:, None], windows, np.nan)
+        counts = np.where(known, counts, 0)
+        dates_ns = pd.to_datetime(np.asarray(dates)).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        is_current = known & (dates_ns > self.last_dates[rows_c])
+        return windows, counts, is_current
@@ -0,0 +1,235 @@
+"""
+Flattened random forest representation
+Packs every tree of a fitted RandomForestRegressor into shared node arrays
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+# Arrays making up a saved forest, one .npy file each
+FOREST_ARRAYS = ('feature', 'threshold', 'left', 'missing_left', 'value', 'roots')
+
+# Rows evaluated together by FlatForest.predict
+PREDICT_CHUNK_ROWS = 2048
+
+
+def _breadth_first_order(children_left, children_right):
+    """Node ids of one sklearn tree in breadth-first order, siblings adjacent."""
+    levels = [np.array([0])]
+    level = levels[0]
+    while True:
+        internal = level[children_left[level] != -1]
+        if len(internal) == 0:
+            break
+        level = np.column_stack([children_left[internal], children_right[internal]]).ravel()
+        levels.append(level)
+    return np.concatenate(levels)
+
+
+class FlatForest:
+    """
+    Random forest stored as flat array-of-nodes columns.
+
+    Nodes of all trees are concatenated; ``roots`` holds each tree's root
+    index and child indices are global. Each tree is laid out breadth-first
+    with siblings adjacent, so a node's right child is ``left + 1`` and one
+    traversal step is ``left[node] + goes_right``. Leaves point to
+    themselves with an infinite threshold, so a fixed number of steps always
+    ends on a leaf. The arrays are plain NumPy buffers that can be
+    memory-mapped from disk and shared by every worker process through the
+    page cache, unlike sklearn trees, which copy their node arrays when
+    unpickled.
+    """
+
+    def __init__(self, feature, threshold, left, missing_left, value, roots,
+                 max_depth, n_features, feature_names=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+
+    @property
+    def n_trees(self):
+        """Number of trees in the forest."""
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        """Total number of nodes across all trees."""
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """
+        Flatten a fitted single-output RandomForestRegressor.
+
+        Parameters:
+        -----------
+        model : RandomForestRegressor
+
+        Returns:
+        --------
+        forest : FlatForest
+        """
+        features, thresholds, lefts, missing, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            nodes = tree.__getstate__()['nodes']
+            n = tree.node_count
+
+            # order[new_id] = sklearn node id
+            order = _breadth_first_order(tree.children_left, tree.children_right)
+            new_id = np.empty(n, dtype=np.int64)
+            new_id[order] = np.arange(n)
+            old_left = tree.children_left[order]
+            is_leaf = old_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature[order]).astype(np.int32))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold[order]))
+            lefts.append(np.where(is_leaf, np.arange(n), new_id[np.where(is_leaf, 0, old_left)]) + offset)
+            if 'missing_go_to_left' in nodes.dtype.names:
+                missing_go_left = nodes['missing_go_to_left'][order].astype(bool)
+            else:
+                missing_go_left = np.zeros(n, dtype=bool)
+            # Leaves send missing values "left" too, i.e. back to themselves
+            missing.append(missing_go_left | is_leaf)
+            values.append(tree.value[order, 0, 0])
+            roots.append(offset)
+
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts).astype(np.int64),
+            missing_left=np.concatenate(missing),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.int64),
+            max_depth=max_depth,
+            n_features=model.n_features_in_,
+            feature_names=getattr(model, 'feature_names_in_', None)
+        )
+
+    def save(self, path):
+        """
+        Write the forest as a directory of .npy files plus metadata.
+
+        Parameters:
+        -----------
+        path : str or Path
+            Artifact directory (created if needed)
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in FOREST_ARRAYS:
+            np.save(path / f'{name}.npy', np.ascontiguousarray(getattr(self, name)))
+
+        meta = {
+            'max_depth': self.max_depth,
+            'n_features': self.n_features,
+            'n_trees': self.n_trees,
+            'feature_names': self.feature_names
+        }
+        with open(path / 'forest.json', 'w') as f:
+            json.dump(meta, f, indent=2)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """
+        Open a forest written by ``save``.
+
+        Parameters:
+        -----------
+        path : str or Path
+            Artifact directory
+        mmap_mode : str or None
+            Passed to ``np.load``; 'r' shares node arrays between processes
+
+        Returns:
+        --------
+        forest : FlatForest
+        """
+        path = Path(path)
+        with open(path / 'forest.json') as f:
+            meta = json.load(f)
+        arrays = {name: np.load(path / f'{name}.npy', mmap_mode=mmap_mode) for name in FOREST_ARRAYS}
+        return cls(
+            **arrays,
+            max_depth=meta['max_depth'],
+            n_features=meta['n_features'],
+            feature_names=meta.get('feature_names')
+        )
+
+    def _as_matrix(self, X):
+        """Convert input to the float32 matrix sklearn trees evaluate on."""
+        if (isinstance(X, pd.DataFrame) and self.feature_names is not None
+                and list(X.columns) != self.feature_names):
+            X = X[self.feature_names]
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected input with {self.n_features} features, got shape {X.shape}")
+        return X
+
+    def predict(self, X, chunk_size=PREDICT_CHUNK_ROWS):
+        """
+        Predict with the forest (mean of tree outputs).
+
+        All trees are walked together: each step advances every (tree, row)
+        pair by one level with a few gathers, so the Python loop runs
+        ``max_depth`` times per chunk regardless of forest size. Tree outputs
+        are then summed in tree order and divided by the tree count, the
+        same arithmetic as sklearn's sequential (``n_jobs=1``) predict, so
+        results are bit-identical.
+
+        Parameters:
+        -----------
+        X : DataFrame or array-like of shape (n_samples, n_features)
+        chunk_size : int
+            Rows evaluated per step; bounds the (trees, rows) work arrays
+
+        Returns:
+        --------
+        predictions : ndarray of shape (n_samples,)
+        """
+        X = self._as_matrix(X)
+        out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), chunk_size):
+            stop = min(start + chunk_size, len(X))
+            out[start:stop] = self._predict_chunk(X[start:stop])
+        return out
+
+    def _predict_chunk(self, X):
+        """Evaluate all trees on one chunk of rows."""
+        n = len(X)
+        flat_X = np.ascontiguousarray(X).ravel()
+        row_offsets = np.arange(n, dtype=np.int64) * self.n_features
+        has_missing = bool(np.isnan(flat_X).any())
+
+        # node[t, i] is the current node of row i in tree t
+        node = np.repeat(self.roots[:, None], n, axis=1)
+        for _ in range(self.max_depth):
+            x = flat_X[row_offsets + self.feature[node]]
+            go_right = ~(x <= self.threshold[node])
+            if has_missing:
+                is_nan = np.isnan(x)
+                go_right[is_nan] = ~self.missing_left[node[is_nan]]
+            node = self.left[node] + go_right
+
+        # Accumulate tree by tree, starting from zero like sklearn
+        total = np.zeros(n, dtype=np.float64)
+        for tree_values in self.value[node]:
+            total += tree_values
+        return total / self.n_trees
@@ -0,0 +1,302 @@
+"""
+Indexed sales history for lag feature lookups
+Stores per-(Store, Dept) weekly sales in a CSR layout for fast binary search
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+# Multiplier used to pack (Store, Dept) into a single sortable int64 key
+KEY_STRIDE = 100_000
+
+# Number of most recent weeks used for lag/rolling features
+HISTORY_WINDOW = 8
+
+# Minimum number of weeks required before lag features are reported
+MIN_HISTORY = 4
+
+# Arrays making up a saved snapshot, one .npy file each
+SNAPSHOT_ARRAYS = ('keys', 'offsets', 'dates', 'sales')
+
+
+def make_series_keys(stores, depts):
+    """Pack Store and Dept arrays into int64 series keys."""
+    return np.asarray(stores, dtype=np.int64) * KEY_STRIDE + np.asarray(depts, dtype=np.int64)
+
+
+def window_lag_features(windows, counts):
+    """
+    Compute lag/rolling features for many history windows at once.
+
+    Sums are accumulated column by column in the same order NumPy uses for
+    short 1-D reductions (sequential below eight values, pairwise at
+    eight), so results are bit-identical to ``HistoryStore.get_lag_features``.
+
+    Parameters:
+    -----------
+    windows : ndarray of shape (n, HISTORY_WINDOW)
+        Most recent weekly sales per row, oldest first, NaN-padded on the left
+    counts : ndarray of shape (n,)
+        Number of valid weeks in each window
+
+    Returns:
+    --------
+    features : dict of ndarray
+        Same keys as ``get_lag_features``; rows with fewer than
+        MIN_HISTORY weeks are NaN
+    """
+    values = np.nan_to_num(windows, nan=0.0)
+    c = [values[:, i] for i in range(HISTORY_WINDOW)]
+
+    sum_4 = ((c[-4] + c[-3]) + c[-2]) + c[-1]
+    mean_4 = sum_4 / 4
+    dev = [(col - mean_4) * (col - mean_4) for col in c[-4:]]
+    std_4 = np.sqrt((((dev[0] + dev[1]) + dev[2]) + dev[3]) / 4)
+
+    # Left padding is zero, so the running sum equals a sequential sum of the valid weeks
+    sequential = c[0]
+    for col in c[1:]:
+        sequential = sequential + col
+    pairwise = ((c[0] + c[1]) + (c[2] + c[3])) + ((c[4] + c[5]) + (c[6] + c[7]))
+    sum_8 = np.where(counts == HISTORY_WINDOW, pairwise, sequential)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_8 = sum_8 / counts
+
+    features = {
+        'lag1': c[-1],
+        'lag2': c[-2],
+        'lag4': c[-4],
+        'rolling_mean_4': mean_4,
+        'rolling_mean_8': mean_8,
+        'rolling_std_4': std_4,
+        'momentum': c[-1] - c[-4]
+    }
+    missing = counts < MIN_HISTORY
+    return {name: np.where(missing, np.nan, col) for name, col in features.items()}
+
+
+class HistoryStore:
+    """
+    Read-only weekly sales history indexed by (Store, Dept).
+
+    All series are held in three contiguous arrays sorted by series key and
+    date (``dates`` and ``sales``), with ``offsets`` marking where each
+    series starts (CSR layout). A lookup is a binary search on the series
+    key followed by a binary search on date inside that series, so cost is
+    O(log n) and no DataFrame is touched on the request path.
+    """
+
+    def __init__(self, keys, offsets, dates, sales):
+        """
+        Initialize store from prebuilt CSR arrays.
+
+        Parameters:
+        -----------
+        keys : ndarray of int64
+            Sorted unique series keys (see ``make_series_keys``)
+        offsets : ndarray of int64
+            Series boundaries, ``len(keys) + 1`` entries
+        dates : ndarray of int64
+            Week dates as nanoseconds since epoch, sorted within each series
+        sales : ndarray of float64
+            Weekly sales aligned with ``dates``
+        """
+        self.keys = keys
+        self.offsets = offsets
+        self.dates = dates
+        self.sales = sales
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Build the store from a DataFrame with Store, Dept, Date and Weekly_Sales.
+
+        Parameters:
+        -----------
+        df : DataFrame
+            Historical sales records
+
+        Returns:
+        --------
+        store : HistoryStore
+        """
+        series_keys = make_series_keys(df['Store'].to_numpy(), df['Dept'].to_numpy())
+        dates = pd.to_datetime(df['Date']).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        sales = df['Weekly_Sales'].to_numpy(dtype=np.float64)
+
+        # Sort once by series then date; everything after this is slicing
+        order = np.lexsort((dates, series_keys))
+        series_keys = series_keys[order]
+        dates = np.ascontiguousarray(dates[order])
+        sales = np.ascontiguousarray(sales[order])
+
+        keys, starts = np.unique(series_keys, return_index=True)
+        offsets = np.append(starts, len(series_keys)).astype(np.int64)
+
+        return cls(keys, offsets, dates, sales)
+
+    def save(self, path):
+        """
+        Write the store as a directory of .npy files that ``load`` can memory-map.
+
+        Parameters:
+        -----------
+        path : str or Path
+            Snapshot directory (created if needed)
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in SNAPSHOT_ARRAYS:
+            np.save(path / f'{name}.npy', np.ascontiguousarray(getattr(self, name)))
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """
+        Open a snapshot written by ``save``.
+
+        With ``mmap_mode='r'`` the arrays are mapped rather than read, so
+        opening is near-instant and pages are shared between processes
+        through the OS page cache.
+
+        Parameters:
+        -----------
+        path : str or Path
+            Snapshot directory
+        mmap_mode : str or None
+            Passed to ``np.load``; None reads the arrays into memory
+
+        Returns:
+        --------
+        store : HistoryStore
+        """
+        path = Path(path)
+        arrays = {name: np.load(path / f'{name}.npy', mmap_mode=mmap_mode) for name in SNAPSHOT_ARRAYS}
+        return cls(**arrays)
+
+    @staticmethod
+    def snapshot_exists(path):
+        """Check whether a complete snapshot exists at ``path``."""
+        path = Path(path)
+        return all((path / f'{name}.npy').exists() for name in SNAPSHOT_ARRAYS)
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def n_series(self):
+        """Number of (Store, Dept) series held."""
+        return len(self.keys)
+
+    def _series_bounds(self, store, dept):
+        """Return (start, end) row bounds of a series, or None if unknown."""
+        key = int(store) * KEY_STRIDE + int(dept)
+        idx = np.searchsorted(self.keys, key)
+        if idx == len(self.keys) or self.keys[idx] != key:
+            return None
+        return self.offsets[idx], self.offsets[idx + 1]
+
+    def recent_sales(self, store, dept, date, window=HISTORY_WINDOW):
+        """
+        Get up to ``window`` most recent weekly sales strictly before ``date``.
+
+        Returns:
+        --------
+        sales : ndarray view, oldest first (may be empty)
+        """
+        bounds = self._series_bounds(store, dept)
+        if bounds is None:
+            return self.sales[:0]
+
+        start, end = bounds
+        cutoff = pd.Timestamp(date).value
+        end = start + np.searchsorted(self.dates[start:end], cutoff, side='left')
+        return self.sales[max(start, end - window):end]
+
+    def recent_sales_batch(self, stores, depts, dates, window=HISTORY_WINDOW):
+        """
+        Vectorized ``recent_sales`` for many (Store, Dept, Date) rows.
+
+        Each row is located with a binary search on its series key followed by
+        a lock-step binary search on date within its own series, so the whole
+        batch costs O(n log m) array operations with no per-row Python work.
+
+        Returns:
+        --------
+        windows : ndarray of shape (n, window)
+            Most recent weekly sales, oldest first, NaN-padded on the left
+        counts : ndarray of shape (n,)
+            Number of valid weeks in each window
+        """
+        keys = make_series_keys(stores, depts)
+        cutoffs = pd.to_datetime(np.asarray(dates)).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        n = len(keys)
+
+        if len(self.keys) == 0 or len(self.dates) == 0:
+            return np.full((n, window), np.nan), np.zeros(n, dtype=np.int64)
+
+        slot = np.searchsorted(self.keys, keys)
+        slot_c = np.minimum(slot, len(self.keys) - 1)
+        known = (slot < len(self.keys)) & (self.keys[slot_c] == keys)
+        start = np.where(known, self.offsets[slot_c], 0)
+        lo = start.copy()
+        hi = np.where(known, self.offsets[slot_c + 1], 0)
+
+        # bisect_left of each cutoff inside its own [start, end) range
+        last = len(self.dates) - 1
+        while True:
+            active = lo < hi
+            if not active.any():
+                break
+            mid = (lo + hi) // 2
+            go_right = active & (self.dates[np.minimum(mid, last)] < cutoffs)
+            lo = np.where(go_right, mid + 1, lo)
+            hi = np.where(active & ~go_right, mid, hi)
+
+        end = lo
+        counts = np.minimum(end - start, window)
+        positions = end[:, None] - window + np.arange(window)
+        valid = positions >= (end - counts)[:, None]
+        windows = np.where(valid, self.sales[np.clip(positions, 0, last)], np.nan)
+        return windows, counts
+
+    def get_lag_features_batch(self, stores, depts, dates):
+        """
+        Vectorized ``get_lag_features``.
+
+        Returns:
+        --------
+        features : dict of ndarray
+            Feature arrays aligned with the inputs, NaN where fewer than
+            four prior weeks exist
+        """
+        windows, counts = self.recent_sales_batch(stores, depts, dates)
+        return window_lag_features(windows, counts)
+
+    def get_lag_features(self, store, dept, date):
+        """
+        Compute lag/rolling features from history before ``date``.
+
+        Returns:
+        --------
+        features : dict or None
+            lag1, lag2, lag4, rolling_mean_4, rolling_mean_8, rolling_std_4 and
+            momentum, or None when fewer than four prior weeks exist
+        """
+        recent_sales = self.recent_sales(store, dept, date)
+
+        if len(recent_sales) < MIN_HISTORY:
+            return None
+
+        last_4 = recent_sales[-4:]
+        return {
+            'lag1': recent_sales[-1],
+            'lag2': recent_sales[-2],
+            'lag4': recent_sales[-4],
+            'rolling_mean_4': last_4.mean(),
+            'rolling_mean_8': recent_sales.mean(),
+            'rolling_std_4': last_4.std(),
+            'momentum': recent_sales[-1] - recent_sales[-4]
+        }
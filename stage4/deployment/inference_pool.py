@@ -0,0 +1,158 @@
+"""
+Bounded executor for model inference
+Keeps CPU-bound predictions off the asyncio event loop with backpressure
+"""
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from deployment.logging_setup import LOGGER_NAME
+
+
+logger = logging.getLogger(f'{LOGGER_NAME}.inference_pool')
+
+# Predictor owned by each process-pool worker (see _init_process_worker)
+_process_predictor = None
+
+
+class PoolSaturatedError(RuntimeError):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+def _init_process_worker(predictor_kwargs):
+    """Process-pool initializer: build one SalesPredictor per worker process."""
+    global _process_predictor
+    from deployment.predictor import SalesPredictor
+    _process_predictor = SalesPredictor(**predictor_kwargs)
+
+
+def _process_predict_batch(records):
+    """Run predict_batch on the worker's own predictor."""
+    return _process_predictor.predict_batch(records)
+
+
+class InferencePool:
+    """
+    Runs blocking predictor calls in worker threads (and optionally large
+    batches in worker processes) so the event loop keeps serving requests.
+
+    At most ``threads`` calls run at once and at most ``queue_depth`` more
+    wait for a thread; beyond that ``run`` raises PoolSaturatedError, which
+    the API turns into HTTP 503, instead of letting latency grow without
+    bound. With ``threads=0`` calls run inline on the event loop (the
+    behaviour before the pool existed).
+
+    Process workers load their own predictor at start-up from the model
+    and lag state on disk; call ``recycle_processes`` after reloading the
+    model or recording actuals so they load them again.
+    """
+
+    def __init__(self, threads=4, queue_depth=32, process_workers=0,
+                 process_min_rows=5000, predictor_kwargs=None):
+        """
+        Initialize the pool.
+
+        Parameters:
+        -----------
+        threads : int
+            Concurrent inference threads (0 runs calls inline)
+        queue_depth : int
+            Calls allowed to wait for a worker before rejecting
+        process_workers : int
+            Worker processes for large batches (0 disables the process pool)
+        process_min_rows : int
+            Smallest batch sent to the process pool
+        predictor_kwargs : dict, optional
+            SalesPredictor arguments used by each process worker
+        """
+        self.threads = int(threads)
+        self.process_workers = int(process_workers)
+        self.queue_depth = int(queue_depth)
+        self.process_min_rows = int(process_min_rows)
+        self.capacity = self.threads + self.queue_depth
+        self.in_flight = 0
+        self.rejected = 0
+
+        self._thread_executor = (
+            ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='inference')
+            if self.threads > 0 else None
+        )
+        self._predictor_kwargs = predictor_kwargs or {}
+        self._process_executor = self._start_processes() if self.process_workers > 0 else None
+        logger.info("Inference pool: %d threads, queue depth %d, %d process workers",
+                    self.threads, self.queue_depth, self.process_workers)
+
+    def _start_processes(self):
+        return ProcessPoolExecutor(
+            max_workers=self.process_workers,
+            initializer=_init_process_worker,
+            initargs=(self._predictor_kwargs,)
+        )
+
+    def recycle_processes(self):
+        """
+        Replace the process workers with fresh ones, which load the model and
+        lag state from disk again. Calls already running finish on the old
+        workers.
+        """
+        if self._process_executor is None:
+            return
+        old, self._process_executor = self._process_executor, self._start_processes()
+        old.shutdown(wait=False)
+        logger.info("Recycled %d inference process workers", self.process_workers)
+
+    async def _submit(self, executor, func, *args):
+        """Submit to an executor, enforcing the in-flight limit."""
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise PoolSaturatedError(
+                f"Inference queue full ({self.in_flight} requests in flight)"
+            )
+
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        future = executor.submit(func, *args)
+        # Release the slot when the work finishes, even if the caller is cancelled
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+        return await asyncio.wrap_future(future)
+
+    def _release(self):
+        self.in_flight -= 1
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run ``func(*args, **kwargs)`` in the thread pool.
+
+        Raises:
+        -------
+        PoolSaturatedError
+            If ``threads + queue_depth`` calls are already in flight
+        """
+        if self._thread_executor is None:
+            return func(*args, **kwargs)
+        return await self._submit(self._thread_executor, functools.partial(func, *args, **kwargs))
+
+    async def predict_batch(self, predictor, records):
+        """Score a batch, sending large ones to the process pool when enabled."""
+        if self._process_executor is not None and len(records) >= self.process_min_rows:
+            return await self._submit(self._process_executor, _process_predict_batch, records)
+        return await self.run(predictor.predict_batch, records)
+
+    def stats(self):
+        """Current load of the pool."""
+        return {
+            'threads': self.threads,
+            'queue_depth': self.queue_depth,
+            'in_flight': self.in_flight,
+            'rejected': self.rejected,
+            'process_workers': self.process_workers
+        }
+
+    def shutdown(self):
+        """Stop the executors (waits for running calls)."""
+        if self._thread_executor is not None:
+            self._thread_executor.shutdown(wait=True)
+        if self._process_executor is not None:
+            self._process_executor.shutdown(wait=True)
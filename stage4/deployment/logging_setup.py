@@ -0,0 +1,170 @@
+"""
+Logging setup for the deployment service
+Queue-based non-blocking handlers, structured formatting and request sampling
+"""
+
+import atexit
+import itertools
+import json
+import logging
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+
+# Root logger of the deployment package; module loggers are its children
+LOGGER_NAME = 'deployment'
+
+TEXT_FORMAT = '%(asctime)s %(levelname)-7s %(name)s: %(message)s'
+
+_listener = None
+_handler = None
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks the caller.
+
+    Records are put on a bounded queue without waiting; when the queue is
+    full (the writer thread is behind) the record is dropped and counted
+    instead of stalling the request path. The API reports the count in
+    /stats/inference, and ``shutdown_logging`` logs it.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(QueueListener):
+    """QueueListener whose stop waits for room in a full queue."""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Render the message followed by ``key=value`` pairs from ``extra={'fields': {...}}``.
+
+    With ``json_output=True`` each record becomes one JSON object instead.
+    """
+
+    def __init__(self, json_output=False):
+        super().__init__(TEXT_FORMAT)
+        self.json_output = json_output
+
+    def format(self, record):
+        fields = getattr(record, 'fields', None) or {}
+        if self.json_output:
+            payload = {
+                'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+                'level': record.levelname,
+                'logger': record.name,
+                'message': record.getMessage(),
+                **fields
+            }
+            if record.exc_info:
+                payload['exception'] = self.formatException(record.exc_info)
+            return json.dumps(payload, default=str)
+
+        message = super().format(record)
+        if fields:
+            message += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        return message
+
+
+class RequestSampler:
+    """
+    Select 1 in ``rate`` requests for detailed logging.
+
+    A rate of 1 samples every request and 0 disables sampling. The counter
+    is an ``itertools.count``, whose ``next`` is atomic under the GIL, so
+    the sampler is safe to share between threads.
+    """
+
+    def __init__(self, rate):
+        self.rate = int(rate)
+        self._counter = itertools.count()
+
+    def sample(self):
+        """Return True when the current request should be logged in detail."""
+        if self.rate <= 0:
+            return False
+        return next(self._counter) % self.rate == 0
+
+
+def setup_logging(level='info', json_output=False, queue_size=10000, stream=None):
+    """
+    Route ``deployment`` loggers through a background writer thread.
+
+    Log calls only enqueue the record; a QueueListener thread does the
+    formatting and I/O. Calling this again replaces the previous setup.
+
+    Parameters:
+    -----------
+    level : str or int
+        Level of the ``deployment`` logger (e.g. 'info', 'debug', 'warning')
+    json_output : bool
+        Emit one JSON object per record instead of text
+    queue_size : int
+        Maximum queued records before new ones are dropped
+    stream : file-like, optional
+        Destination of the log output (default: stderr)
+
+    Returns:
+    --------
+    handler : DroppingQueueHandler
+        The installed handler (exposes the ``dropped`` counter)
+    """
+    global _listener, _handler
+
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+
+    logger = logging.getLogger(LOGGER_NAME)
+    shutdown_logging()
+    for old in [h for h in logger.handlers if isinstance(h, DroppingQueueHandler)]:
+        logger.removeHandler(old)
+
+    output = logging.StreamHandler(stream if stream is not None else sys.stderr)
+    output.setFormatter(StructuredFormatter(json_output=json_output))
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    handler = DroppingQueueHandler(log_queue)
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+
+    _listener = _Listener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    _handler = handler
+    return handler
+
+
+def shutdown_logging():
+    """Flush queued records, stop the writer thread and report dropped records."""
+    global _listener, _handler
+    if _listener is not None:
+        _listener.stop()
+        if _handler is not None and _handler.dropped:
+            # Written directly: the queue is no longer drained
+            record = logging.getLogger(LOGGER_NAME).makeRecord(
+                LOGGER_NAME, logging.WARNING, __file__, 0,
+                "%d log records were dropped because the log queue was full",
+                (_handler.dropped,), None
+            )
+            for output in _listener.handlers:
+                output.handle(record)
+        _listener = None
+        _handler = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,131 @@
+"""
+Model artifact formats
+Saves and loads the forest as pickle, uncompressed joblib or a flattened forest
+"""
+
+import hashlib
+import pickle
+from pathlib import Path
+
+import joblib
+
+from deployment.forest import FlatForest
+
+
+# Artifact format selected by path suffix
+ARTIFACT_FORMATS = {
+    '.pkl': 'pickle',
+    '.pickle': 'pickle',
+    '.joblib': 'joblib',
+    '.forest': 'forest'
+}
+
+
+def artifact_format(path):
+    """Get the artifact format of a model path from its suffix."""
+    suffix = Path(path).suffix.lower()
+    if suffix not in ARTIFACT_FORMATS:
+        raise ValueError(
+            f"Unknown model artifact '{path}'; expected one of {', '.join(ARTIFACT_FORMATS)}"
+        )
+    return ARTIFACT_FORMATS[suffix]
+
+
+def save_model_artifact(model, path):
+    """
+    Save a fitted model in the format implied by ``path``.
+
+    Parameters:
+    -----------
+    model : RandomForestRegressor
+        Fitted model (must be a forest for the '.forest' format)
+    path : str or Path
+        Destination; '.pkl', '.joblib' or '.forest' (a directory)
+    """
+    path = Path(path)
+    fmt = artifact_format(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if fmt == 'pickle':
+        with open(path, 'wb') as f:
+            pickle.dump(model, f)
+    elif fmt == 'joblib':
+        # Uncompressed, so every large array can be memory-mapped on load
+        joblib.dump(model, path, compress=0)
+    else:
+        forest = model if isinstance(model, FlatForest) else FlatForest.from_sklearn(model)
+        forest.save(path)
+
+
+def load_model_artifact(path, mmap_mode='r'):
+    """
+    Load a model saved with ``save_model_artifact``.
+
+    Parameters:
+    -----------
+    path : str or Path
+        Model artifact
+    mmap_mode : str or None
+        Memory-map mode for the joblib and forest formats
+
+    Returns:
+    --------
+    model : object with a ``predict`` method
+    """
+    fmt = artifact_format(path)
+    if fmt == 'pickle':
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    if fmt == 'joblib':
+        return joblib.load(path, mmap_mode=mmap_mode)
+    return FlatForest.load(path, mmap_mode=mmap_mode)
+
+
+def artifact_version(path):
+    """
+    Identify the artifact currently on disk at ``path``.
+
+    The version is derived from the size and modification time of the file
+    (or of every file in a '.forest' directory), so it changes whenever the
+    artifact is rewritten and is the same in every process that loads it.
+
+    Returns:
+    --------
+    version : str
+        Short hex digest, or 'missing' when nothing exists at ``path``
+    """
+    path = Path(path)
+    if not path.exists():
+        return 'missing'
+    files = sorted(p for p in path.rglob('*') if p.is_file()) if path.is_dir() else [path]
+    digest = hashlib.blake2b(digest_size=8)
+    for file in files:
+        stat = file.stat()
+        digest.update(f'{file.name}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+    return digest.hexdigest()
+
+
+def export_model_artifacts(model, pickle_path):
+    """
+    Write the joblib and flattened-forest variants next to a pickled model.
+
+    Parameters:
+    -----------
+    model : RandomForestRegressor
+        Fitted model
+    pickle_path : str or Path
+        Path of the pickle artifact; siblings share its stem
+
+    Returns:
+    --------
+    paths : dict
+        Format name to written path
+    """
+    pickle_path = Path(pickle_path)
+    paths = {
+        'joblib': pickle_path.with_suffix('.joblib'),
+        'forest': pickle_path.with_suffix('.forest')
+    }
+    for path in paths.values():
+        save_model_artifact(model, path)
+    return paths
@@ -0,0 +1,349 @@
+"""
+Prediction cache for the API
+In-process LRU with a TTL, optionally shared between workers through Redis
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+
+from deployment.logging_setup import LOGGER_NAME
+
+
+logger = logging.getLogger(f'{LOGGER_NAME}.prediction_cache')
+
+# Supported shared cache backends ('memory' keeps the cache in-process only)
+CACHE_BACKENDS = ('memory', 'redis')
+
+
+def cache_key(kind, payload, model_version):
+    """
+    Canonical cache key of a request.
+
+    Parameters:
+    -----------
+    kind : str
+        Request type ('row', 'store', 'week'); rows from /predict and
+        /predict/batch share entries
+    payload : dict
+        Validated request fields. Keys are sorted and values are the types
+        pydantic coerced them to, so identical requests map to the same key
+        whatever the field order or number formatting of the JSON body
+    model_version : str
+        Version of the loaded model; a reloaded model never sees entries
+        computed by its predecessor
+
+    Returns:
+    --------
+    key : str
+    """
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    digest = hashlib.blake2b(f'{model_version}|{canonical}'.encode(), digest_size=16)
+    return f'{kind}:{digest.hexdigest()}'
+
+
+class RedisCacheBackend:
+    """
+    Cache entries shared by every API worker through Redis.
+
+    Values are stored as JSON with the cache TTL as the key expiry. A
+    counter under ``<prefix>generation`` is incremented by every ``clear``,
+    so workers notice that another worker invalidated the cache. Needs the
+    optional ``redis`` package.
+    """
+
+    GENERATION_KEY = 'generation'
+
+    def __init__(self, url, prefix='sales-forecast:'):
+        """
+        Connect to Redis.
+
+        Parameters:
+        -----------
+        url : str
+            Redis URL, e.g. 'redis://localhost:6379/0'
+        prefix : str
+            Namespace of the cache keys
+        """
+        try:
+            import redis.asyncio as aioredis
+        except ImportError as e:
+            raise ImportError("cache_backend 'redis' requires the redis package (pip install redis)") from e
+        self.url = url
+        self.prefix = prefix
+        self._client = aioredis.from_url(url)
+        self._generation_name = prefix + self.GENERATION_KEY
+
+    async def generation(self):
+        """Number of clears so far (0 if the cache was never cleared)."""
+        return int(await self._client.get(self._generation_name) or 0)
+
+    async def get_many(self, keys):
+        """Return (value, remaining seconds) per key, or None where missing."""
+        names = [self.prefix + key for key in keys]
+        pipe = self._client.pipeline(transaction=False)
+        for name in names:
+            pipe.get(name)
+            pipe.pttl(name)
+        replies = await pipe.execute()
+
+        entries = []
+        for raw, ttl_ms in zip(replies[0::2], replies[1::2]):
+            if raw is None or ttl_ms is None or ttl_ms <= 0:
+                entries.append(None)
+            else:
+                entries.append((json.loads(raw), ttl_ms / 1000.0))
+        return entries
+
+    async def set_many(self, items, ttl):
+        """Store (key, value) pairs expiring after ``ttl`` seconds."""
+        pipe = self._client.pipeline(transaction=False)
+        for key, value in items:
+            pipe.set(self.prefix + key, json.dumps(value), px=max(1, int(ttl * 1000)))
+        await pipe.execute()
+
+    async def clear(self):
+        """Delete every entry under the prefix; returns the new generation."""
+        generation = await self._client.incr(self._generation_name)
+        names = [name async for name in self._client.scan_iter(match=self.prefix + '*', count=1000)
+                 if name != self._generation_name.encode()]
+        for start in range(0, len(names), 1000):
+            await self._client.delete(*names[start:start + 1000])
+        return generation
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class PredictionCache:
+    """
+    LRU cache of predictions with a time-to-live.
+
+    Entries live in an ``OrderedDict`` in recency order; reading an entry
+    moves it to the end and inserting beyond ``max_entries`` evicts from
+    the front. Expired entries are dropped when they are read. With a
+    ``shared`` backend, local misses are looked up there (keeping their
+    remaining TTL) and new predictions are written to both, so workers
+    reuse each other's results.
+
+    Recorded actuals change lag features, so the API clears the cache after
+    /actuals as well as /reload. A prediction computed while the cache was
+    being cleared is not stored, so it cannot resurrect pre-clear state.
+
+    With several API workers, a clear only reaches the other workers through
+    the shared backend: every lookup reads its generation, and when another
+    worker has cleared since, the local entries are dropped and
+    ``on_invalidate`` is awaited (the API reloads the model and lag state
+    from disk there) before the lookup proceeds. Without a shared backend
+    the cache, like the lag state, is per process, so run a single worker.
+
+    All methods are called from the event loop thread, so no locking is
+    needed.
+    """
+
+    def __init__(self, max_entries=10000, ttl=300, shared=None, on_invalidate=None):
+        """
+        Initialize the cache.
+
+        Parameters:
+        -----------
+        max_entries : int
+            Entries kept in process before the least recently used is evicted
+        ttl : float
+            Seconds an entry stays valid
+        shared : RedisCacheBackend, optional
+            Cache shared between workers, consulted on local misses
+        on_invalidate : coroutine function, optional
+            Awaited when another worker cleared the shared cache
+        """
+        self.max_entries = int(max_entries)
+        self.ttl = float(ttl)
+        self.shared = shared
+        self.on_invalidate = on_invalidate
+        self.generation = 0
+        self.shared_generation = None
+        self._syncing = None
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.shared_errors = 0
+        self.invalidations = 0
+        self.remote_invalidations = 0
+
+    def _store(self, key, value, ttl):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _drop_local(self):
+        self.generation += 1
+        self._entries.clear()
+
+    async def _check_generation(self):
+        """Catch up with clears made by other workers (see the class docstring)."""
+        if self._syncing is None:
+            try:
+                generation = await self.shared.generation()
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning("Shared cache generation lookup failed: %s", e)
+                return
+            if self._syncing is None:
+                if self.shared_generation is None:
+                    self.shared_generation = generation
+                if generation == self.shared_generation:
+                    return
+                self.shared_generation = generation
+                self.remote_invalidations += 1
+                self._drop_local()
+                logger.info("Prediction cache cleared by another worker (generation %d)", generation)
+                if self.on_invalidate is None:
+                    return
+                self._syncing = asyncio.ensure_future(self._run_on_invalidate())
+        # Lookups arriving meanwhile wait for the state to be reloaded too
+        await asyncio.shield(self._syncing)
+
+    async def _run_on_invalidate(self):
+        try:
+            await self.on_invalidate()
+        except Exception as e:
+            logger.error("Reloading state after a remote cache clear failed: %s", e)
+        finally:
+            self._syncing = None
+            # Anything computed while the state was reloading is not stored
+            self._drop_local()
+
+    async def get_many(self, keys):
+        """
+        Look up several keys.
+
+        Returns:
+        --------
+        values : list
+            Cached value per key, or None on a miss
+        """
+        if self.shared is not None:
+            await self._check_generation()
+
+        now = time.monotonic()
+        values = []
+        missing = []
+        for i, key in enumerate(keys):
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                values.append(None)
+                missing.append(i)
+            else:
+                self._entries.move_to_end(key)
+                values.append(entry[1])
+                self.hits += 1
+
+        if missing and self.shared is not None:
+            try:
+                entries = await self.shared.get_many([keys[i] for i in missing])
+            except Exception as e:
+                # The shared cache is an optimization; never fail a request on it
+                self.shared_errors += 1
+                logger.warning("Shared cache lookup failed: %s", e)
+                entries = [None] * len(missing)
+            still_missing = []
+            for i, entry in zip(missing, entries):
+                if entry is None:
+                    still_missing.append(i)
+                    continue
+                value, remaining = entry
+                self._store(keys[i], value, min(remaining, self.ttl))
+                values[i] = value
+                self.shared_hits += 1
+            missing = still_missing
+
+        self.misses += len(missing)
+        return values
+
+    async def set_many(self, items, generation=None):
+        """
+        Store (key, value) pairs.
+
+        Parameters:
+        -----------
+        items : list of (str, object)
+            Keys and JSON-serializable values
+        generation : int, optional
+            ``self.generation`` when the values started being computed;
+            values computed before the last ``clear`` are discarded
+        """
+        if generation is not None and generation != self.generation:
+            return
+        for key, value in items:
+            self._store(key, value, self.ttl)
+
+        if self.shared is not None and items:
+            try:
+                await self.shared.set_many(items, self.ttl)
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning("Shared cache write failed: %s", e)
+
+    async def get(self, key):
+        """Cached value of one key, or None."""
+        return (await self.get_many([key]))[0]
+
+    async def get_or_compute(self, key, compute):
+        """
+        Return the cached value of ``key`` or await ``compute()`` and cache it.
+
+        Errors raised by ``compute`` propagate and nothing is cached.
+        """
+        value = await self.get(key)
+        if value is None:
+            generation = self.generation
+            value = await compute()
+            await self.set_many([(key, value)], generation)
+        return value
+
+    async def clear(self):
+        """Drop every entry (locally and in the shared backend)."""
+        self.invalidations += 1
+        self._drop_local()
+        if self.shared is not None:
+            try:
+                self.shared_generation = await self.shared.clear()
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning("Shared cache clear failed: %s", e)
+
+    def stats(self):
+        """Hit, miss and eviction counters."""
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            'backend': 'redis' if self.shared is not None else 'memory',
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+            'remote_invalidations': self.remote_invalidations,
+            'shared_errors': self.shared_errors
+        }
+
+    async def close(self):
+        """Close the shared backend connection."""
+        if self.shared is not None:
+            await self.shared.close()
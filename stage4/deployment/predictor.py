@@ -5,19 +5,149 @@ Loads model and performs inference with feature engineering
 
 import pandas as pd
 import numpy as np
-import pickle
-from datetime import datetime, timedelta
+from sklearn.ensemble import RandomForestRegressor
+from functools import lru_cache
 from pathlib import Path
 import sys
 import os
+import logging
+import threading
 
-# Add stage3 to path for imports using absolute path
+# Add stage1, stage3 and stage4 to path for imports using absolute path
 PROJECT_ROOT = Path(__file__).parent.parent.parent
+stage1_path = str(PROJECT_ROOT / 'stage1')
+if stage1_path not in sys.path:
+    sys.path.insert(0, stage1_path)
 stage3_path = str(PROJECT_ROOT / 'stage3' / 'ML_models')
 if stage3_path not in sys.path:
     sys.path.insert(0, stage3_path)
+stage4_path = str(PROJECT_ROOT / 'stage4')
+if stage4_path not in sys.path:
+    sys.path.insert(0, stage4_path)
 
+from data_io import find_dataset, read_dataset  # type: ignore
 from Feature_Engineering import FeatureSelector  # type: ignore
+from Feature_Pipeline import MARKDOWN_COLUMNS, FeaturePipeline, load_stage1_pipeline, pipeline_path  # type: ignore
+from deployment.history_store import HISTORY_WINDOW, KEY_STRIDE, HistoryStore, window_lag_features
+from deployment.feature_state import LatestFeatureTable, state_file_lock
+from deployment.forest import FlatForest
+from deployment.model_artifacts import artifact_version, load_model_artifact, save_model_artifact
+from deployment.logging_setup import LOGGER_NAME, RequestSampler, setup_logging
+
+logger = logging.getLogger(f'{LOGGER_NAME}.predictor')
+
+# Columns of the training data the lag history uses
+HISTORY_COLUMNS = ['Store', 'Dept', 'Date', 'Weekly_Sales']
+
+
+# Stage 1 final outputs (training data and the fitted feature pipeline)
+STAGE1_FINAL_DIR = PROJECT_ROOT / 'stage1' / 'processed_data' / 'Stage1.3.4_Final'
+
+
+# Training data the lag history is taken from: the newer of train_final.parquet
+# and .csv (the Parquet path if neither exists)
+TRAIN_DATA_PATH = Path(find_dataset(STAGE1_FINAL_DIR / 'train_final', required=False))
+
+# Most recent training rows kept as lag history
+HISTORY_TAIL_ROWS = 50000
+
+# Store metadata (Type, Size) of the 45 stores
+STORES_DATA_PATH = PROJECT_ROOT / 'stage1' / 'datasets' / 'walmart-recruiting-store-sales-forecasting' / 'stores.csv'
+
+# Materialized latest-feature table written by build_feature_state.py
+DEFAULT_FEATURE_STATE_PATH = PROJECT_ROOT / 'stage4' / 'models' / 'feature_state.npz'
+
+# Memory-mappable history snapshot written by build_history_snapshot.py
+DEFAULT_HISTORY_SNAPSHOT_PATH = PROJECT_ROOT / 'stage4' / 'models' / 'history_snapshot'
+
+# Supported model evaluation engines
+INFERENCE_ENGINES = ('flat', 'sklearn')
+
+# Largest batch evaluated with the flattened engine when sklearn is loaded too
+FLAT_ENGINE_MAX_ROWS = 1000
+
+# Default 1-in-N sampling of detailed request logs
+DEFAULT_REQUEST_LOG_RATE = 100
+
+# Departments forecast for a store when no sales history is loaded
+DEFAULT_STORE_DEPARTMENTS = [1, 2, 3, 7, 8, 14, 16, 38, 72, 92]
+
+# Store type and size assumed when stores.csv is unavailable
+DEFAULT_STORE_TYPE = 'A'
+DEFAULT_STORE_SIZE = 150000
+
+# Multi-week forecasting strategies (see SalesPredictor.forecast_horizon)
+FORECAST_STRATEGIES = ('recursive', 'direct')
+
+# Longest gap, in weeks, between the end of history and a recursive
+# forecast's start that is bridged by forecasting the weeks in between
+MAX_WARMUP_WEEKS = 52
+
+
+# Lag feature columns and the history feature each one is filled from
+LAG_FEATURE_MAP = {
+    'Sales_Lag1': 'lag1',
+    'Sales_Lag2': 'lag2',
+    'Sales_Lag4': 'lag4',
+    'Sales_Rolling_Mean_4': 'rolling_mean_4',
+    'Sales_Rolling_Mean_8': 'rolling_mean_8',
+    'Sales_Rolling_Std_4': 'rolling_std_4',
+    'Sales_Momentum': 'momentum'
+}
+
+# Lag estimates (as a fraction of base sales) used when a series has no history
+FALLBACK_LAG_FACTORS = {
+    'Sales_Lag1': 1.0,
+    'Sales_Lag2': 0.95,
+    'Sales_Lag4': 0.92,
+    'Sales_Rolling_Mean_4': 0.98,
+    'Sales_Rolling_Mean_8': 0.97,
+    'Sales_Rolling_Std_4': 0.15,
+    'Sales_Momentum': 0.03
+}
+
+
+def _numeric_column(df, column, default):
+    """Get a column as float64, filling missing values (or a missing column) with default."""
+    if column not in df.columns:
+        return np.full(len(df), default, dtype=np.float64)
+    return pd.to_numeric(df[column], errors='coerce').fillna(default).to_numpy(dtype=np.float64)
+
+
+@lru_cache(maxsize=65536)
+def _seeded_variation(seed):
+    """Deterministic per-record variation factor in [0.8, 1.2)."""
+    return np.random.RandomState(seed).uniform(0.8, 1.2)
+
+
+def _fallback_base_sales(stores, depts, sizes, store_types, months, days, holidays):
+    """Estimate a base weekly sales level for series without history."""
+    # Scale by store size and type
+    base_sales = np.asarray(sizes, dtype=np.float64) * 0.03
+    base_sales = base_sales * np.where(store_types == 'A', 1.3, np.where(store_types == 'B', 1.0, 0.7))
+    
+    # Adjust by department
+    base_sales = base_sales * (1.0 + (depts % 10) * 0.1)
+    
+    # Add seasonal variation and holiday boost
+    base_sales = base_sales * (1.0 + 0.3 * np.sin(2 * np.pi * months / 12))
+    base_sales = base_sales * np.where(holidays == 1, 1.5, 1.0)
+    
+    # Add variation based on store/dept/date
+    seeds = stores * 1000 + depts * 100 + months * 10 + days
+    unique_seeds, inverse = np.unique(seeds, return_inverse=True)
+    variation = np.array([_seeded_variation(int(seed)) for seed in unique_seeds])
+    return base_sales * variation[inverse]
+
+
+def load_history_frame(data_path=TRAIN_DATA_PATH, tail_rows=HISTORY_TAIL_ROWS):
+    """Read the recent Store/Dept/Date/Weekly_Sales history used for lag features (all of it if tail_rows is None)."""
+    # Load only necessary columns to save memory, with the data_schema dtypes
+    history = read_dataset(data_path, columns=HISTORY_COLUMNS)
+    if tail_rows is None:
+        return history
+    # Keep only recent data (last 3 months of training data)
+    return history.sort_values('Date').tail(tail_rows)
 
 
 class SalesPredictor:
@@ -25,7 +155,9 @@ class SalesPredictor:
     Handles loading model and making predictions with proper feature engineering.
     """
     
-    def __init__(self, model_path='../models/best_model.pkl'):
+    def __init__(self, model_path='../models/best_model.pkl', feature_state_path=None,
+                 history_snapshot_path=None, inference_engine='flat',
+                 request_log_rate=DEFAULT_REQUEST_LOG_RATE, model=None, history_store=None):
         """
         Initialize predictor and load model.
         
@@ -33,18 +165,67 @@ class SalesPredictor:
         -----------
         model_path : str
             Path to saved model file
+        feature_state_path : str, optional
+            Path to a persisted latest-feature table; when it exists the
+            training CSV is parsed only for rows dated on or before a
+            series' latest actual
+        history_snapshot_path : str, optional
+            Path to a history snapshot directory; when it exists it is
+            memory-mapped instead of parsing the training CSV
+        inference_engine : str
+            'flat' evaluates random forests of up to FLAT_ENGINE_MAX_ROWS
+            rows with the NumPy FlatForest engine; 'sklearn' always uses
+            the estimator's own predict
+        request_log_rate : int
+            Log the feature detail of 1 in N predictions at INFO level
+            (1 logs every request, 0 disables request logging)
+        model : object, optional
+            Already loaded model (e.g. a FlatForest over shared memory);
+            ``model_path`` is then only used to identify its version
+        history_store : HistoryStore, optional
+            Already loaded history used instead of the snapshot or CSV
         """
+        if inference_engine not in INFERENCE_ENGINES:
+            raise ValueError(f"inference_engine must be one of {INFERENCE_ENGINES}, got '{inference_engine}'")
+        
         self.model = None
+        self.model_version = None
+        self.flat_forest = None
+        self.inference_engine = inference_engine
+        self.request_sampler = RequestSampler(request_log_rate)
         self.feature_selector = FeatureSelector()
         self.features = self.feature_selector.get_features_by_stage('full')
+        self.feature_pipeline = None
         self.model_path = model_path
+        self.feature_state_path = Path(feature_state_path or DEFAULT_FEATURE_STATE_PATH)
+        self.history_snapshot_path = Path(history_snapshot_path or DEFAULT_HISTORY_SNAPSHOT_PATH)
         self.historical_data = None
+        self.history_store = None
+        self.feature_table = None
+        self.store_metadata = self._load_store_metadata()
+        # Guards the feature table between recorded actuals and lookups on
+        # inference threads
+        self._state_lock = threading.Lock()
+        self._history_lock = threading.Lock()
         
-        # Load historical data for lag features
-        self._load_historical_data()
+        # Load lag feature state and history. With a feature table and no
+        # snapshot the CSV is parsed only when a row dated before a series'
+        # latest actual needs it (see _history_backstop)
+        has_feature_state = self._load_feature_state()
+        self._history_loaded = True
+        if history_store is not None:
+            self.history_store = history_store
+        elif not self._load_history_snapshot():
+            if has_feature_state:
+                self._history_loaded = False
+            else:
+                self._load_historical_data()
         
-        # Load model
-        self.load_model()
+        # Load model and the feature pipeline it was trained with
+        if model is not None:
+            self._install_model(model, self._read_feature_pipeline())
+        else:
+            self.load_model()
         
         # Store metadata
         self.model_info = {
@@ -60,33 +241,108 @@ class SalesPredictor:
         }
     
     def load_model(self):
-        """Load the trained model from disk."""
+        """
+        Load the trained model from disk together with its feature pipeline.
+        
+        Both are read before either replaces the current ones, then swapped
+        in together under the state lock, so a reloaded model is never
+        served with the previous model's normalization statistics.
+        """
+        model = self._read_model()
+        self._install_model(model, self._read_feature_pipeline())
+    
+    def refresh(self):
+        """
+        Pick up a model and latest-feature table written by another process
+        (another API worker after /reload or /actuals).
+        """
+        if artifact_version(self.model_path) != self.model_version:
+            self.load_model()
+        # A failed read keeps the current table
+        table = self._read_feature_state()
+        if table is not None:
+            with self._state_lock:
+                self.feature_table = table
+    
+    def _read_model(self):
+        """Read the model artifact (training, or mocking, one when it cannot be loaded)."""
         try:
             model_file = Path(self.model_path)
             
             # Check if model exists
             if not model_file.exists():
-                print(f"⚠ Model file not found at {model_file}")
-                print("  Attempting to train model...")
+                logger.warning("Model file not found at %s; attempting to train model", model_file)
                 self._train_and_save_model()
-                
-                # Try loading again
-                if model_file.exists():
-                    with open(model_file, 'rb') as f:
-                        self.model = pickle.load(f)
-                    print(f"✓ Model loaded from {model_file}")
-                else:
-                    print("⚠ Using mock model for demonstration")
-            else:
-                # Load model
-                with open(model_file, 'rb') as f:
-                    self.model = pickle.load(f)
-                print(f"✓ Model loaded from {model_file}")
+                if not model_file.exists():
+                    logger.warning("Using mock model for demonstration")
+                    return self._create_mock_model()
             
+            # Load model (pickle, memory-mapped joblib or flattened forest)
+            model = load_model_artifact(model_file)
+            logger.info("Model loaded from %s", model_file)
+            return model
         except Exception as e:
-            print(f"✗ Error loading model: {e}")
-            print("⚠ Using mock model for demonstration")
-            self._create_mock_model()
+            logger.error("Error loading model: %s; using mock model for demonstration", e)
+            return self._create_mock_model()
+    
+    def _install_model(self, model, feature_pipeline):
+        """Swap in a model, its inference engine and its feature pipeline in one step."""
+        flat_forest = self._flat_engine(model)
+        # Changes whenever the artifact on disk changes (keys the prediction cache)
+        model_version = artifact_version(self.model_path)
+        with self._state_lock:
+            self.model = model
+            self.flat_forest = flat_forest
+            self.model_version = model_version
+            self.feature_pipeline = feature_pipeline
+            self.features = feature_pipeline.features
+    
+    def _read_feature_pipeline(self):
+        """
+        Read the feature pipeline the model was trained with.
+        
+        Prefers the pipeline saved next to the model; models saved before
+        it existed use the one Stage 1 fitted (its training data). Without
+        either, features are left unnormalized.
+        """
+        model_pipeline = pipeline_path(self.model_path)
+        try:
+            if model_pipeline.exists():
+                feature_pipeline = FeaturePipeline.load(model_pipeline)
+                logger.info("Feature pipeline loaded from %s", model_pipeline)
+            else:
+                feature_pipeline = load_stage1_pipeline(STAGE1_FINAL_DIR, self.features)
+                logger.info("Feature pipeline not found at %s; using the Stage 1 pipeline from %s",
+                            model_pipeline, STAGE1_FINAL_DIR)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Could not load a feature pipeline (%s); features will not be normalized", e)
+            feature_pipeline = FeaturePipeline(features=self.features)
+        return feature_pipeline
+    
+    def _flat_engine(self, model):
+        """The model flattened for low-overhead NumPy inference (None when it is not a random forest)."""
+        if isinstance(model, FlatForest):
+            return model
+        if self.inference_engine == 'flat' and isinstance(model, RandomForestRegressor):
+            flat_forest = FlatForest.from_sklearn(model)
+            logger.info("Flattened forest engine (%d trees, %s nodes)",
+                        flat_forest.n_trees, f"{flat_forest.n_nodes:,}")
+            return flat_forest
+        return None
+    
+    def _model_predict(self, features):
+        """
+        Run the model on engineered features.
+
+        Request-sized batches go through the flattened NumPy engine, which
+        avoids sklearn's per-call validation and per-tree dispatch; larger
+        batches use sklearn's compiled (and threaded) predict when the
+        estimator is available.
+        """
+        if self.flat_forest is not None and (
+                len(features) <= FLAT_ENGINE_MAX_ROWS or self.model is self.flat_forest):
+            return self.flat_forest.predict(features)
+        return self.model.predict(features)
     
     def _train_and_save_model(self):
         """Train and save model if it doesn't exist."""
@@ -101,231 +357,302 @@ class SalesPredictor:
             
             from Best_model import train_best_random_forest, data  # type: ignore
             
-            print("Training best model...")
+            logger.info("Training best model...")
             model, metrics = train_best_random_forest(data, 'Weekly_Sales', None)
             
             # Save model
             model_dir = Path(self.model_path).parent
             model_dir.mkdir(parents=True, exist_ok=True)
             
-            with open(self.model_path, 'wb') as f:
-                pickle.dump(model, f)
+            save_model_artifact(model, self.model_path)
+            load_stage1_pipeline(STAGE1_FINAL_DIR, self.features).save(pipeline_path(self.model_path))
             
-            print(f"✓ Model saved to {self.model_path}")
+            logger.info("Model saved to %s", self.model_path)
         except Exception as e:
-            print(f"⚠ Could not train model: {e}")
-            print("  Creating a mock model for demonstration...")
+            logger.warning("Could not train model: %s; creating a mock model for demonstration", e)
             self._create_mock_model()
     
     def _create_mock_model(self):
-        """Create a simple mock model for demonstration when real model can't be loaded."""
+        """Create (and save) a simple mock model for demonstration when real model can't be loaded; returns it."""
         from sklearn.ensemble import RandomForestRegressor
         from sklearn.datasets import make_regression
         
-        print("Creating mock model for demonstration...")
+        logger.info("Creating mock model for demonstration...")
         
         # Create simple mock data
         X, y = make_regression(n_samples=100, n_features=44, noise=0.1, random_state=42)
         
         # Train simple model
-        self.model = RandomForestRegressor(n_estimators=10, max_depth=5, random_state=42)
-        self.model.fit(X, y * 15000)  # Scale to typical sales values
+        model = RandomForestRegressor(n_estimators=10, max_depth=5, random_state=42)
+        model.fit(X, y * 15000)  # Scale to typical sales values
         
         # Save mock model
         model_dir = Path(self.model_path).parent
         model_dir.mkdir(parents=True, exist_ok=True)
         
-        with open(self.model_path, 'wb') as f:
-            pickle.dump(self.model, f)
+        save_model_artifact(model, self.model_path)
         
-        print(f"✓ Mock model created and saved to {self.model_path}")
-        print("⚠ Note: This is a demonstration model with simulated predictions")
+        logger.info("Mock model created and saved to %s", self.model_path)
+        logger.warning("This is a demonstration model with simulated predictions")
+        return model
+    
+    def _load_history_snapshot(self):
+        """Memory-map the prebuilt history snapshot if available."""
+        if not HistoryStore.snapshot_exists(self.history_snapshot_path):
+            return False
+        try:
+            self.history_store = HistoryStore.load(self.history_snapshot_path)
+            logger.info("Mapped %s historical records for lag features from %s",
+                        f"{len(self.history_store):,}", self.history_snapshot_path)
+            return True
+        except Exception as e:
+            logger.warning("Could not load history snapshot: %s", e)
+            self.history_store = None
+            return False
     
     def _load_historical_data(self):
         """Load historical sales data for calculating lag features."""
         try:
-            data_path = Path(__file__).parent.parent.parent / 'stage1' / 'processed_data' / 'Stage1.3.4_Final' / 'train_final.csv'
+            data_path = TRAIN_DATA_PATH
             if data_path.exists():
-                # Load only necessary columns to save memory
-                self.historical_data = pd.read_csv(
-                    data_path, 
-                    usecols=['Store', 'Dept', 'Date', 'Weekly_Sales'],
-                    parse_dates=['Date']
-                )
-                # Keep only recent data (last 3 months of training data)
-                self.historical_data = self.historical_data.sort_values('Date').tail(50000)
-                print(f"✓ Loaded {len(self.historical_data):,} historical records for lag features")
+                self.historical_data = load_history_frame(data_path)
+                # Index once so per-request lookups are binary searches
+                self.history_store = HistoryStore.from_frame(self.historical_data)
+                logger.info("Loaded %s historical records for lag features (%s store/dept series)",
+                            f"{len(self.historical_data):,}", f"{self.history_store.n_series:,}")
             else:
-                print(f"⚠ Historical data not found at {data_path}")
+                logger.warning("Historical data not found at %s", data_path)
                 self.historical_data = None
         except Exception as e:
-            print(f"⚠ Could not load historical data: {e}")
+            logger.warning("Could not load historical data: %s", e)
             self.historical_data = None
+            self.history_store = None
     
-    def _get_historical_sales(self, store, dept, date):
-        """Get historical sales for a specific store/dept to calculate lag features."""
-        if self.historical_data is None:
+    def _load_store_metadata(self):
+        """Load store Type and Size from stores.csv, indexed by Store."""
+        try:
+            return pd.read_csv(STORES_DATA_PATH, usecols=['Store', 'Type', 'Size']).set_index('Store')
+        except Exception as e:
+            logger.warning("Could not load store metadata from %s: %s", STORES_DATA_PATH, e)
+            return None
+    
+    def _load_feature_state(self):
+        """Load the persisted latest-feature table if available."""
+        table = self._read_feature_state()
+        if table is None:
+            return False
+        self.feature_table = table
+        return True
+    
+    def _read_feature_state(self):
+        """The persisted latest-feature table, or None if missing or unreadable."""
+        if not self.feature_state_path.exists():
             return None
-        
         try:
-            # Convert date to datetime if it's a string
-            if isinstance(date, str):
-                pred_date = pd.to_datetime(date)
+            table = LatestFeatureTable.load(self.feature_state_path)
+            logger.info("Loaded latest features for %s store/dept series from %s",
+                        f"{table.n_series:,}", self.feature_state_path)
+            return table
+        except Exception as e:
+            logger.warning("Could not load feature state: %s", e)
+            return None
+    
+    def _history_backstop(self):
+        """
+        History store for rows dated on or before a series' latest actual.
+        
+        Parses the training data on first use when only the feature table
+        was loaded at start-up; None if there is no history.
+        """
+        if not self._history_loaded:
+            with self._history_lock:
+                if not self._history_loaded:
+                    self._load_historical_data()
+                    self._history_loaded = True
+        return self.history_store
+    
+    def _lookup_lag_features(self, stores, depts, dates):
+        """
+        Resolve lag/rolling features for many rows.
+        
+        The latest-feature table answers rows dated after a series' last
+        actual, the history store older dates. The latest state is never
+        used for an older date (it would hold actuals from after it): such
+        rows get NaN when there is no history.
+        
+        Returns:
+        --------
+        features : dict of ndarray or None
+            Feature arrays, NaN where a series has too little history
+        """
+        if self.feature_table is None:
+            if self.history_store is None:
+                return None
+            return self.history_store.get_lag_features_batch(stores, depts, dates)
+        
+        with self._state_lock:
+            features, is_current = self.feature_table.get_lag_features_batch(stores, depts, dates)
+        if not is_current.all():
+            history_store = self._history_backstop()
+            if history_store is None:
+                features = {name: np.where(is_current, values, np.nan) for name, values in features.items()}
             else:
-                pred_date = pd.to_datetime(date)
-            
-            # Filter for this store and department, AND before prediction date
-            store_dept_data = self.historical_data[
-                (self.historical_data['Store'] == store) & 
-                (self.historical_data['Dept'] == dept) &
-                (self.historical_data['Date'] < pred_date)
-            ].sort_values('Date')
-            
-            if len(store_dept_data) == 0:
+                history = history_store.get_lag_features_batch(stores, depts, dates)
+                features = {name: np.where(is_current, values, history[name])
+                            for name, values in features.items()}
+        return features
+    
+    def _get_historical_sales(self, store, dept, date):
+        """Get historical sales for a specific store/dept to calculate lag features."""
+        try:
+            features = self._lookup_lag_features([store], [dept], [pd.Timestamp(date)])
+            if features is None or np.isnan(features['lag1'][0]):
                 return None
-            
-            # Get sales from most recent weeks BEFORE the prediction date
-            recent_sales = store_dept_data['Weekly_Sales'].tail(8).values
-            
-            if len(recent_sales) >= 4:
-                return {
-                    'lag1': recent_sales[-1] if len(recent_sales) >= 1 else None,
-                    'lag2': recent_sales[-2] if len(recent_sales) >= 2 else None,
-                    'lag4': recent_sales[-4] if len(recent_sales) >= 4 else None,
-                    'rolling_mean_4': recent_sales[-4:].mean() if len(recent_sales) >= 4 else None,
-                    'rolling_mean_8': recent_sales.mean() if len(recent_sales) >= 8 else recent_sales.mean(),
-                    'rolling_std_4': recent_sales[-4:].std() if len(recent_sales) >= 4 else None,
-                    'momentum': (recent_sales[-1] - recent_sales[-4]) if len(recent_sales) >= 4 else 0
-                }
-            
-            return None
+            return {name: values[0] for name, values in features.items()}
         except Exception as e:
-            print(f"Error getting historical sales: {e}")
+            logger.warning("Error getting historical sales: %s", e)
             return None
     
+    def record_actuals(self, records, persist=True):
+        """
+        Fold newly observed weekly sales into the latest-feature table.
+        
+        When persisting, the update is applied to the table on disk under a
+        file lock (re-read first, so actuals other API workers recorded
+        meanwhile are kept) and the result becomes this predictor's table.
+        
+        Parameters:
+        -----------
+        records : list of dict
+            Records with Store, Dept, Date and Weekly_Sales; if any is invalid
+            (or not newer than its series' last actual) none are recorded
+        persist : bool
+            Write the updated table to ``feature_state_path``
+        
+        Returns:
+        --------
+        count : int
+            Number of actuals recorded
+        """
+        if not persist:
+            with self._state_lock:
+                # Validated as a whole first: a bad record changes nothing
+                return self._current_feature_table().update_batch(records)
+        
+        with state_file_lock(self.feature_state_path):
+            table = self._read_feature_state()
+            with self._state_lock:
+                if table is None:
+                    table = self._current_feature_table()
+                count = table.update_batch(records)
+                table.save(self.feature_state_path)
+                self.feature_table = table
+        return count
+    
+    def _current_feature_table(self):
+        """The in-memory table, built from the history first if there is none (state lock held)."""
+        if self.feature_table is None:
+            self.feature_table = (LatestFeatureTable.from_history(self.history_store)
+                                  if self.history_store is not None else LatestFeatureTable())
+        return self.feature_table
+    
     def engineer_features(self, input_data):
         """
         Create all required features from input data.
         
+        All rows are handled in one columnar pass: lag features come from a
+        single batched history lookup, and the model's FeaturePipeline (the
+        one Stage 1 built the training data with) derives calendar, holiday,
+        markdown and store type features and applies the training
+        normalization, so a batch costs the same number of NumPy calls as a
+        single record.
+        
         Parameters:
         -----------
-        input_data : dict or DataFrame
-            Raw input data
+        input_data : dict, list of dict or DataFrame
+            Raw input data. Missing markdowns count as not recorded
+            (Has_MarkDown* = 0), as in the training data.
         
         Returns:
         --------
         features_df : DataFrame
             Engineered features ready for prediction
         """
+        return self.feature_pipeline.transform(self.raw_features(input_data))
+    
+    def raw_features(self, input_data):
+        """
+        Raw inputs and looked-up lag features, before the FeaturePipeline.
+        
+        Parameters:
+        -----------
+        input_data : dict, list of dict or DataFrame
+            As for ``engineer_features``
+        
+        Returns:
+        --------
+        raw_df : DataFrame
+            Date, Type, IsHoliday, Size, economic indicators, markdowns
+            and the Sales_* lag features, unnormalized
+        """
         # Convert to DataFrame if dict
         if isinstance(input_data, dict):
             df = pd.DataFrame([input_data])
+        elif isinstance(input_data, pd.DataFrame):
+            df = input_data.reset_index(drop=True)
         else:
-            df = input_data.copy()
-        
-        # Convert Date to datetime
-        df['Date'] = pd.to_datetime(df['Date'])
-        
-        # Extract time features
-        df['Year'] = df['Date'].dt.year
-        df['Month'] = df['Date'].dt.month
-        df['Day'] = df['Date'].dt.day
-        df['DayOfWeek'] = df['Date'].dt.dayofweek
-        df['WeekOfYear'] = df['Date'].dt.isocalendar().week
-        df['Quarter'] = df['Date'].dt.quarter
-        
-        # Cyclical encoding
-        df['Month_Sin'] = np.sin(2 * np.pi * df['Month'] / 12)
-        df['Month_Cos'] = np.cos(2 * np.pi * df['Month'] / 12)
-        df['Week_Sin'] = np.sin(2 * np.pi * df['WeekOfYear'] / 52)
-        df['Week_Cos'] = np.cos(2 * np.pi * df['WeekOfYear'] / 52)
-        df['DayOfWeek_Sin'] = np.sin(2 * np.pi * df['DayOfWeek'] / 7)
-        df['DayOfWeek_Cos'] = np.cos(2 * np.pi * df['DayOfWeek'] / 7)
-        
-        # Boolean time features
-        df['Is_Weekend'] = (df['DayOfWeek'] >= 5).astype(int)
-        df['Is_Month_Start'] = (df['Date'].dt.is_month_start).astype(int)
-        df['Is_Month_End'] = (df['Date'].dt.is_month_end).astype(int)
-        df['Is_Quarter_Start'] = (df['Date'].dt.is_quarter_start).astype(int)
-        df['Is_Quarter_End'] = (df['Date'].dt.is_quarter_end).astype(int)
-        df['Is_Year_Start'] = (df['Date'].dt.is_year_start).astype(int)
-        df['Is_Year_End'] = (df['Date'].dt.is_year_end).astype(int)
-        
-        # Encode store type
-        df['Type_A'] = (df['Type'] == 'A').astype(int)
-        df['Type_B'] = (df['Type'] == 'B').astype(int)
-        df['Type_C'] = (df['Type'] == 'C').astype(int)
-        
-        # Handle markdown features (set to 0 if not provided)
-        for i in range(1, 6):
-            markdown_col = f'MarkDown{i}'
-            if markdown_col not in df.columns:
-                df[markdown_col] = 0
-            df[f'Has_MarkDown{i}'] = (df[markdown_col] > 0).astype(int)
-        
-        # Lag features - Try to get from historical data first
-        store = df['Store'].values[0]
-        dept = df['Dept'].values[0]
-        historical_sales = self._get_historical_sales(store, dept, df['Date'].values[0])
-        
-        if historical_sales is not None:
-            # Use real historical data
-            df['Sales_Lag1'] = df.get('Sales_Lag1', historical_sales['lag1'])
-            df['Sales_Lag2'] = df.get('Sales_Lag2', historical_sales['lag2'])
-            df['Sales_Lag4'] = df.get('Sales_Lag4', historical_sales['lag4'])
-            df['Sales_Rolling_Mean_4'] = df.get('Sales_Rolling_Mean_4', historical_sales['rolling_mean_4'])
-            df['Sales_Rolling_Mean_8'] = df.get('Sales_Rolling_Mean_8', historical_sales['rolling_mean_8'])
-            df['Sales_Rolling_Std_4'] = df.get('Sales_Rolling_Std_4', historical_sales['rolling_std_4'])
-            df['Sales_Momentum'] = df.get('Sales_Momentum', historical_sales['momentum'])
-        else:
-            # Fallback: Calculate based on store/dept characteristics
-            base_sales = df['Size'].values[0] * 0.03
-            
-            # Adjust by store type
-            if df['Type_A'].values[0] == 1:
-                base_sales *= 1.3
-            elif df['Type_B'].values[0] == 1:
-                base_sales *= 1.0
-            else:  # Type C
-                base_sales *= 0.7
-            
-            # Adjust by department
-            dept_factor = 1.0 + (dept % 10) * 0.1
-            base_sales *= dept_factor
-            
-            # Add seasonal variation
-            month_factor = 1.0 + 0.3 * np.sin(2 * np.pi * df['Month'].values[0] / 12)
-            base_sales *= month_factor
-            
-            # Holiday boost
-            if df['IsHoliday'].values[0] == 1:
-                base_sales *= 1.5
-            
-            # Add variation based on store/dept/date
-            seed_val = int(store * 1000 + dept * 100 + df['Month'].values[0] * 10 + df['Day'].values[0])
-            np.random.seed(seed_val)
-            variation = np.random.uniform(0.8, 1.2)
-            base_sales *= variation
-            
-            df['Sales_Lag1'] = df.get('Sales_Lag1', base_sales)
-            df['Sales_Lag2'] = df.get('Sales_Lag2', base_sales * 0.95)
-            df['Sales_Lag4'] = df.get('Sales_Lag4', base_sales * 0.92)
-            df['Sales_Rolling_Mean_4'] = df.get('Sales_Rolling_Mean_4', base_sales * 0.98)
-            df['Sales_Rolling_Mean_8'] = df.get('Sales_Rolling_Mean_8', base_sales * 0.97)
-            df['Sales_Rolling_Std_4'] = df.get('Sales_Rolling_Std_4', base_sales * 0.15)
-            df['Sales_Momentum'] = df.get('Sales_Momentum', base_sales * 0.03)
+            df = pd.DataFrame(input_data)
         
-        # Fill missing economic indicators with provided values or defaults
-        df['CPI'] = df.get('CPI', df.get('CPI', 211.0))
-        df['Unemployment'] = df.get('Unemployment', df.get('Unemployment', 7.5))
+        dates = pd.DatetimeIndex(pd.to_datetime(df['Date']))
+        stores = df['Store'].to_numpy(dtype=np.int64)
+        depts = df['Dept'].to_numpy(dtype=np.int64)
+        store_types = df['Type'].to_numpy(dtype=object)
         
-        # Convert IsHoliday to int
-        df['IsHoliday'] = df['IsHoliday'].astype(int)
+        # Raw inputs, with defaults for missing economic indicators
+        raw = {
+            'Date': dates,
+            'Type': store_types,
+            'IsHoliday': df['IsHoliday'].to_numpy().astype(bool),
+            'Size': df['Size'].to_numpy(),
+            'Temperature': _numeric_column(df, 'Temperature', np.nan),
+            'Fuel_Price': _numeric_column(df, 'Fuel_Price', np.nan),
+            'CPI': _numeric_column(df, 'CPI', 211.0),
+            'Unemployment': _numeric_column(df, 'Unemployment', 7.5),
+        }
+        for column in MARKDOWN_COLUMNS:
+            if column in df.columns:
+                raw[column] = df[column].to_numpy()
         
-        # Select only required features
-        feature_df = df[self.features]
+        # Lag features - real history where available, estimates elsewhere
+        history = self._lookup_lag_features(stores, depts, dates)
+        if history is not None:
+            has_history = ~np.isnan(history['lag1'])
+        else:
+            has_history = np.zeros(len(df), dtype=bool)
         
-        return feature_df
+        base_sales = None
+        if not has_history.all():
+            base_sales = _fallback_base_sales(
+                stores, depts, raw['Size'], store_types,
+                dates.month.to_numpy(), dates.day.to_numpy(), raw['IsHoliday']
+            )
+        
+        for feature, history_key in LAG_FEATURE_MAP.items():
+            if base_sales is None:
+                values = history[history_key]
+            elif history is None:
+                values = base_sales * FALLBACK_LAG_FACTORS[feature]
+            else:
+                values = np.where(has_history, history[history_key],
+                                  base_sales * FALLBACK_LAG_FACTORS[feature])
+            
+            # Caller-supplied lag values take precedence
+            if feature in df.columns:
+                supplied = _numeric_column(df, feature, np.nan)
+                values = np.where(np.isnan(supplied), values, supplied)
+            raw[feature] = values
+        
+        return pd.DataFrame(raw)
     
     def predict_single(self, input_data):
         """
@@ -341,21 +668,28 @@ class SalesPredictor:
         prediction : dict
             Prediction with confidence interval
         """
-        # Engineer features
-        features = self.engineer_features(input_data)
-        
-        # Debug: Print key feature values to verify they're different
-        print(f"\n🔍 Prediction Debug for Store {input_data['Store']}, Dept {input_data['Dept']}:")
-        print(f"   Lag Features: Lag1={features['Sales_Lag1'].values[0]:.2f}, "
-              f"Lag2={features['Sales_Lag2'].values[0]:.2f}, "
-              f"Lag4={features['Sales_Lag4'].values[0]:.2f}")
-        print(f"   Rolling Mean: {features['Sales_Rolling_Mean_4'].values[0]:.2f}")
-        print(f"   Size: {features['Size'].values[0]}, IsHoliday: {features['IsHoliday'].values[0]}")
+        # Engineer features (the raw values are kept for the request log)
+        raw = self.raw_features(input_data)
+        features = self.feature_pipeline.transform(raw)
         
         # Make prediction using the trained model
-        prediction_value = self.model.predict(features)[0]
+        prediction_value = self._model_predict(features)[0]
         
-        print(f"   ✅ Model Output: ${prediction_value:,.2f}")
+        # Detailed request log for 1 in N requests; nothing is formatted otherwise
+        if self.request_sampler.sample() and logger.isEnabledFor(logging.INFO):
+            row = raw.iloc[0]
+            logger.info("prediction", extra={'fields': {
+                'store': input_data['Store'],
+                'dept': input_data['Dept'],
+                'date': input_data.get('Date'),
+                'lag1': round(float(row['Sales_Lag1']), 2),
+                'lag2': round(float(row['Sales_Lag2']), 2),
+                'lag4': round(float(row['Sales_Lag4']), 2),
+                'rolling_mean_4': round(float(row['Sales_Rolling_Mean_4']), 2),
+                'size': int(row['Size']),
+                'is_holiday': bool(row['IsHoliday']),
+                'predicted_sales': round(float(prediction_value), 2)
+            }})
         
         # Calculate confidence interval (rough estimate)
         mae = 106.77  # From training
@@ -375,10 +709,13 @@ class SalesPredictor:
         """
         Make batch predictions.
         
+        Features for every record are built in one vectorized pass and
+        scored with a single model call.
+        
         Parameters:
         -----------
-        input_data_list : list of dict
-            List of input records
+        input_data_list : list of dict or DataFrame
+            Input records
         
         Returns:
         --------
@@ -386,74 +723,313 @@ class SalesPredictor:
             Predictions for all records
         """
         # Convert to DataFrame
-        df = pd.DataFrame(input_data_list)
+        if isinstance(input_data_list, pd.DataFrame):
+            df = input_data_list.reset_index(drop=True)
+        else:
+            df = pd.DataFrame(input_data_list)
+        
+        if len(df) == 0:
+            return []
         
         # Engineer features
         features = self.engineer_features(df)
         
         # Make predictions
-        predictions = self.model.predict(features)
+        predictions = self._model_predict(features)
+        
+        if self.request_sampler.sample() and logger.isEnabledFor(logging.INFO):
+            logger.info("batch prediction", extra={'fields': {
+                'rows': len(df),
+                'mean_predicted_sales': round(float(predictions.mean()), 2)
+            }})
         
         # Format results
-        results = []
         mae = 106.77
+        ci_lower = np.maximum(0, predictions - (1.96 * mae))
+        ci_upper = predictions + (1.96 * mae)
         
-        for i, pred in enumerate(predictions):
-            results.append({
-                'predicted_sales': float(pred),
-                'ci_lower': float(max(0, pred - (1.96 * mae))),
-                'ci_upper': float(pred + (1.96 * mae)),
-                'Store': input_data_list[i]['Store'],
-                'Dept': input_data_list[i]['Dept'],
-                'Date': input_data_list[i]['Date']
-            })
+        return [
+            {
+                'predicted_sales': pred,
+                'ci_lower': lower,
+                'ci_upper': upper,
+                'Store': store,
+                'Dept': dept,
+                'Date': date
+            }
+            for pred, lower, upper, store, dept, date in zip(
+                predictions.tolist(), ci_lower.tolist(), ci_upper.tolist(),
+                df['Store'].tolist(), df['Dept'].tolist(), df['Date'].tolist()
+            )
+        ]
+    
+    def _series_keys(self):
+        """Sorted unique keys of every series with history, or None without history."""
+        keys = []
+        if self.history_store is not None:
+            keys.append(np.asarray(self.history_store.keys))
+        if self.feature_table is not None:
+            with self._state_lock:
+                keys.append(self.feature_table.keys[:self.feature_table.n_series].copy())
+        if not keys:
+            return None
+        return np.unique(np.concatenate(keys))
+    
+    def store_departments(self, store_id):
+        """
+        Get the departments with sales history in a store.
+        
+        Departments are read from the series keys of the history store and
+        the latest-feature table, so departments that only appeared through
+        recorded actuals are included.
         
-        return results
+        Returns:
+        --------
+        depts : list of int
+            Sorted department numbers (DEFAULT_STORE_DEPARTMENTS when no
+            history is loaded)
+        """
+        keys = self._series_keys()
+        if keys is None:
+            return list(DEFAULT_STORE_DEPARTMENTS)
+        return (keys[keys // KEY_STRIDE == store_id] % KEY_STRIDE).tolist()
     
-    def predict_store_forecast(self, store_id, date, top_n=10):
-        """Predict for top departments in a store."""
-        # Example implementation - would need historical data
-        predictions = []
-        top_depts = [1, 2, 3, 7, 8, 14, 16, 38, 72, 92][:top_n]
+    def all_series(self):
+        """
+        Get every (Store, Dept) series with sales history.
         
-        for dept in top_depts:
-            input_data = {
-                'Store': store_id,
-                'Dept': dept,
-                'Date': date,
-                'IsHoliday': False,
-                'Temperature': 60.0,
-                'Fuel_Price': 3.5,
-                'Type': 'A',
-                'Size': 150000
-            }
-            pred = self.predict_single(input_data)
-            predictions.append(pred)
+        Returns:
+        --------
+        stores, depts : ndarray of int64
+            Series identifiers sorted by store then department
+        """
+        keys = self._series_keys()
+        if keys is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return keys // KEY_STRIDE, keys % KEY_STRIDE
+    
+    def _store_attributes(self, stores):
+        """Type and Size arrays for store numbers (defaults without stores.csv)."""
+        stores = np.asarray(stores, dtype=np.int64)
+        if self.store_metadata is None:
+            return (np.full(len(stores), DEFAULT_STORE_TYPE, dtype=object),
+                    np.full(len(stores), DEFAULT_STORE_SIZE, dtype=np.int64))
         
-        return predictions
+        metadata = self.store_metadata.reindex(stores)
+        unknown = metadata['Type'].isna().to_numpy()
+        if unknown.any():
+            raise ValueError(f"Unknown store {stores[unknown][0]}")
+        return metadata['Type'].to_numpy(dtype=object), metadata['Size'].to_numpy(dtype=np.int64)
     
-    def predict_multi_week(self, store_id, dept_id, start_date, weeks=4):
-        """Predict for multiple weeks ahead."""
-        predictions = []
-        start = datetime.strptime(start_date, '%Y-%m-%d')
+    def _history_windows(self, stores, depts, dates):
+        """
+        Get the most recent weekly sales before each row's date.
         
-        for week in range(weeks):
-            pred_date = start + timedelta(weeks=week)
-            
-            input_data = {
+        Follows ``_lookup_lag_features``: the latest-feature table answers
+        rows dated after a series' last actual, the history store the rest
+        (empty windows when there is no history).
+        
+        Returns:
+        --------
+        windows : ndarray of shape (n, HISTORY_WINDOW)
+            Oldest first, NaN-padded on the left
+        counts : ndarray of shape (n,)
+            Number of valid weeks in each window
+        """
+        if self.feature_table is None:
+            if self.history_store is None:
+                return np.full((len(stores), HISTORY_WINDOW), np.nan), np.zeros(len(stores), dtype=np.int64)
+            return self.history_store.recent_sales_batch(stores, depts, dates)
+        
+        with self._state_lock:
+            windows, counts, is_current = self.feature_table.get_windows_batch(stores, depts, dates)
+        if not is_current.all():
+            history_store = self._history_backstop()
+            if history_store is None:
+                history_windows = np.full_like(windows, np.nan)
+                history_counts = np.zeros_like(counts)
+            else:
+                history_windows, history_counts = history_store.recent_sales_batch(stores, depts, dates)
+            windows = np.where(is_current[:, None], windows, history_windows)
+            counts = np.where(is_current, counts, history_counts)
+        return windows, counts
+    
+    def _history_end(self):
+        """Date of the latest actual loaded, or None without history."""
+        ends = []
+        if self.history_store is not None and len(self.history_store):
+            ends.append(int(self.history_store.dates.max()))
+        if self.feature_table is not None and self.feature_table.n_series:
+            with self._state_lock:
+                ends.append(int(self.feature_table.last_dates[:self.feature_table.n_series].max()))
+        return pd.Timestamp(max(ends)) if ends else None
+    
+    def predict_store_forecast(self, store_id, date, top_n=None, is_holiday=False,
+                               temperature=60.0, fuel_price=3.5):
+        """
+        Forecast every department of a store, ranked by predicted sales.
+        
+        All departments are scored in one ``predict_batch`` call using the
+        store's Type and Size from stores.csv.
+        
+        Parameters:
+        -----------
+        store_id : int
+            Store number
+        date : str
+            Week to forecast (YYYY-MM-DD)
+        top_n : int, optional
+            Return only the best ``top_n`` departments (default: all)
+        is_holiday : bool
+            Whether the week is a holiday week
+        temperature, fuel_price : float
+            Conditions assumed for the week
+        
+        Returns:
+        --------
+        predictions : list of dict
+            ``predict_batch`` rows with a 1-based ``rank``, highest sales first
+        """
+        store_types, sizes = self._store_attributes([store_id])
+        
+        depts = self.store_departments(store_id)
+        if not depts:
+            return []
+        
+        predictions = self.predict_batch(pd.DataFrame({
+            'Store': store_id,
+            'Dept': depts,
+            'Date': date,
+            'IsHoliday': bool(is_holiday),
+            'Temperature': float(temperature),
+            'Fuel_Price': float(fuel_price),
+            'Type': store_types[0],
+            'Size': int(sizes[0])
+        }))
+        
+        predictions.sort(key=lambda pred: pred['predicted_sales'], reverse=True)
+        for rank, pred in enumerate(predictions, start=1):
+            pred['rank'] = rank
+        return predictions[:top_n] if top_n else predictions
+    
+    def forecast_horizon(self, stores, depts, start_date, weeks=4, strategy='recursive',
+                         holiday_dates=None, temperature=60.0, fuel_price=3.5):
+        """
+        Forecast several consecutive weeks for many series at once.
+        
+        'recursive' rolls the forecast forward one week at a time: each week
+        is scored for every series in one model call and the predictions are
+        appended to the series' history windows, so the lag and rolling
+        features of week h+1 are computed from the prediction for week h.
+        A start date after the end of the loaded history is reached by first
+        forecasting the weeks in between (at most MAX_WARMUP_WEEKS).
+        
+        'direct' conditions every week on the observed history only (the
+        lag features at the start date) and scores the whole series x week
+        grid in a single model call. The model is not horizon-specific, so
+        this is the cheaper, feedback-free baseline.
+        
+        Parameters:
+        -----------
+        stores, depts : array-like of int
+            Series to forecast
+        start_date : str or datetime
+            First week to forecast
+        weeks : int
+            Number of weeks
+        strategy : str
+            'recursive' or 'direct'
+        holiday_dates : iterable of dates, optional
+            Weeks flagged as holiday weeks
+        temperature, fuel_price : float
+            Conditions assumed for every week
+        
+        Returns:
+        --------
+        forecast : DataFrame
+            Predicted weekly sales indexed by (Store, Dept), one column per week
+        """
+        if strategy not in FORECAST_STRATEGIES:
+            raise ValueError(f"strategy must be one of {FORECAST_STRATEGIES}, got '{strategy}'")
+        
+        stores = np.asarray(stores, dtype=np.int64)
+        depts = np.asarray(depts, dtype=np.int64)
+        n = len(stores)
+        start = pd.Timestamp(start_date).normalize()
+        week_dates = pd.date_range(start, periods=weeks, freq='7D')
+        index = pd.MultiIndex.from_arrays([stores, depts], names=['Store', 'Dept'])
+        if n == 0 or weeks <= 0:
+            return pd.DataFrame(np.zeros((n, max(weeks, 0))), index=index, columns=week_dates[:max(weeks, 0)])
+        
+        warmup = 0
+        history_end = self._history_end()
+        if strategy == 'recursive' and history_end is not None and start > history_end:
+            gap_weeks = int(np.ceil((start - history_end) / pd.Timedelta(weeks=1)))
+            warmup = min(gap_weeks - 1, MAX_WARMUP_WEEKS)
+        rollout_dates = pd.date_range(start - pd.Timedelta(weeks=warmup), periods=warmup + weeks, freq='7D')
+        
+        store_types, sizes = self._store_attributes(stores)
+        holidays = pd.DatetimeIndex(pd.to_datetime(list(holiday_dates or []))).normalize()
+        windows, counts = self._history_windows(stores, depts, np.full(n, rollout_dates[0].to_datetime64()))
+        
+        def score(rows, dates, windows, counts):
+            """Score one row per (series, date) with lag features from the given windows."""
+            lags = window_lag_features(windows, counts)
+            frame = pd.DataFrame({
+                'Store': stores[rows],
+                'Dept': depts[rows],
+                'Date': dates,
+                'IsHoliday': dates.isin(holidays),
+                'Temperature': float(temperature),
+                'Fuel_Price': float(fuel_price),
+                'Type': store_types[rows],
+                'Size': sizes[rows],
+                **{feature: lags[key] for feature, key in LAG_FEATURE_MAP.items()}
+            })
+            return self._model_predict(self.engineer_features(frame))
+        
+        if strategy == 'direct':
+            rows = np.repeat(np.arange(n), weeks)
+            dates = pd.DatetimeIndex(np.tile(week_dates.to_numpy(), n))
+            values = score(rows, dates, windows[rows], counts[rows]).reshape(n, weeks)
+        else:
+            rows = np.arange(n)
+            values = np.empty((n, len(rollout_dates)))
+            for step, date in enumerate(rollout_dates):
+                values[:, step] = score(rows, pd.DatetimeIndex(np.full(n, date.to_datetime64())), windows, counts)
+                # Feed this week's prediction back as the newest actual
+                windows = np.concatenate([windows[:, 1:], values[:, step:step + 1]], axis=1)
+                counts = np.minimum(counts + 1, HISTORY_WINDOW)
+            values = values[:, warmup:]
+        
+        return pd.DataFrame(values, index=index, columns=week_dates)
+    
+    def predict_multi_week(self, store_id, dept_id, start_date, weeks=4, strategy='recursive'):
+        """
+        Predict consecutive weeks for one store/department.
+        
+        See ``forecast_horizon`` for the strategies.
+        
+        Returns:
+        --------
+        predictions : list of dict
+            One prediction per week with confidence interval and 1-based ``week``
+        """
+        forecast = self.forecast_horizon([store_id], [dept_id], start_date, weeks, strategy)
+        
+        mae = 106.77  # From training
+        return [
+            {
+                'predicted_sales': float(value),
+                'ci_lower': float(max(0, value - (1.96 * mae))),
+                'ci_upper': float(value + (1.96 * mae)),
                 'Store': store_id,
                 'Dept': dept_id,
-                'Date': pred_date.strftime('%Y-%m-%d'),
-                'IsHoliday': False,
-                'Temperature': 60.0,
-                'Fuel_Price': 3.5,
-                'Type': 'A',
-                'Size': 150000
+                'Date': date.strftime('%Y-%m-%d'),
+                'week': week
             }
-            pred = self.predict_single(input_data)
-            predictions.append(pred)
-        
-        return predictions
+            for week, (date, value) in enumerate(forecast.iloc[0].items(), start=1)
+        ]
     
     def get_model_info(self):
         """Get model information."""
@@ -466,7 +1042,8 @@ class SalesPredictor:
 
 if __name__ == "__main__":
     # Test predictor
-    predictor = SalesPredictor()
+    setup_logging('info')
+    predictor = SalesPredictor(request_log_rate=1)
     
     # Test prediction
     test_input = {
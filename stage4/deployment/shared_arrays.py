@@ -0,0 +1,88 @@
+"""
+Shared-memory NumPy arrays
+Publishes read-only arrays once so worker processes use them without copies
+"""
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+# Byte alignment of each array inside a segment
+ARRAY_ALIGNMENT = 64
+
+
+class SharedArrays:
+    """
+    NumPy arrays copied once into a single shared-memory segment.
+
+    The creating process owns the segment and must ``close`` it (also via
+    ``with``), which unlinks it. ``spec`` is a small picklable description
+    that worker processes pass to ``attach_shared_arrays`` to get
+    zero-copy, read-only views of the same memory.
+
+    Segments live in /dev/shm on Linux; containers may need a larger
+    ``shm_size`` than Docker's 64 MB default for big models.
+    """
+
+    def __init__(self, arrays):
+        """
+        Copy arrays into a new segment.
+
+        Parameters:
+        -----------
+        arrays : dict of str to ndarray
+            Arrays to publish (any non-object dtype)
+        """
+        layout = {}
+        offset = 0
+        for name, array in arrays.items():
+            array = np.asarray(array)
+            offset = -(-offset // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+            layout[name] = (offset, array.dtype.str, array.shape)
+            offset += array.nbytes
+
+        self.nbytes = offset
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for name, array in arrays.items():
+            start, dtype, shape = layout[name]
+            np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=start)[...] = array
+        self.spec = {'name': self._shm.name, 'layout': layout}
+
+    def close(self):
+        """Release and unlink the segment."""
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach_shared_arrays(spec):
+    """
+    Map the arrays of a segment published with ``SharedArrays``.
+
+    Parameters:
+    -----------
+    spec : dict
+        ``SharedArrays.spec``
+
+    Returns:
+    --------
+    arrays : dict of str to ndarray
+        Read-only views into the segment
+    segment : SharedMemory
+        The mapping; keep a reference for as long as the views are used
+    """
+    segment = shared_memory.SharedMemory(name=spec['name'])
+    arrays = {}
+    for name, (offset, dtype, shape) in spec['layout'].items():
+        view = np.ndarray(shape, dtype=dtype, buffer=segment.buf, offset=offset)
+        view.flags.writeable = False
+        arrays[name] = view
+    return arrays, segment
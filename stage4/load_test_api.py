@@ -0,0 +1,151 @@
+"""
+Load test: /predict latency under concurrent clients, inference on the event
+loop (before) vs the bounded inference pool (after).
+Each configuration runs a real uvicorn server in a subprocess; clients send
+single predictions mixed with occasional large batches (backing off on 503)
+while a probe polls /health to show how responsive the event loop stays.
+Usage: python load_test_api.py [--clients 16] [--duration 15] [--model PATH]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+STAGE4_DIR = Path(__file__).parent
+sys.path.insert(0, str(STAGE4_DIR))
+
+from benchmark_batch_predict import make_requests
+
+DEFAULT_MODEL = STAGE4_DIR / 'models' / 'best_model.pkl'
+
+SERVER_SCRIPT = """
+import json, sys, warnings
+warnings.filterwarnings('ignore')
+sys.path.insert(0, {stage4!r})
+from deployment.config import API_CONFIG
+API_CONFIG.update(json.loads({overrides!r}))
+import uvicorn
+from deployment.api import app
+uvicorn.run(app, host='127.0.0.1', port={port}, log_level='warning', timeout_keep_alive=60)
+"""
+
+# (label, API_CONFIG overrides); the pool run uses the configured defaults
+CONFIGS = [
+    ('event loop (before)', {'inference_threads': 0}),
+    ('inference pool (after)', {}),
+]
+
+
+def start_server(overrides, port):
+    """Launch the API in a subprocess and wait until /health answers."""
+    code = SERVER_SCRIPT.format(stage4=str(STAGE4_DIR), overrides=json.dumps(overrides), port=port)
+    server = subprocess.Popen([sys.executable, '-c', code],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("API server exited during start-up")
+        try:
+            if httpx.get(f'http://127.0.0.1:{port}/health', timeout=1).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    server.kill()
+    raise RuntimeError("API server did not start")
+
+
+async def client_loop(client, singles, batch, batch_share, deadline, results, seed):
+    """Send requests back to back until the deadline, recording (kind, status, seconds)."""
+    rng = random.Random(seed)
+    while time.perf_counter() < deadline:
+        if rng.random() < batch_share:
+            kind, url, body = 'batch', '/predict/batch', {'predictions': batch}
+        else:
+            kind, url, body = 'single', '/predict', rng.choice(singles)
+        start = time.perf_counter()
+        response = await client.post(url, json=body)
+        results.append((kind, response.status_code, time.perf_counter() - start))
+        if response.status_code == 503:
+            # Back off as the server asks
+            await asyncio.sleep(float(response.headers.get('Retry-After', 1)))
+
+
+async def health_probe(client, deadline, results, interval=0.05):
+    """Poll /health to measure how responsive the event loop stays."""
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get('/health')
+        results.append(('health', response.status_code, time.perf_counter() - start))
+        await asyncio.sleep(interval)
+
+
+async def run_load(port, clients, duration, batch_rows, batch_share):
+    """Run concurrent clients against one server."""
+    singles = make_requests(500, seed=1)
+    batch = make_requests(batch_rows, seed=2)
+    results = []
+    limits = httpx.Limits(max_connections=clients + 1)
+    async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(
+            health_probe(client, deadline, results),
+            *[client_loop(client, singles, batch, batch_share, deadline, results, seed)
+              for seed in range(clients)]
+        )
+    return results
+
+
+def summarize(results, kind):
+    """Return (count ok, p50 ms, p99 ms, count 503) for one request kind."""
+    ok = np.array([t for k, status, t in results if k == kind and status == 200])
+    rejected = sum(1 for k, status, _ in results if k == kind and status == 503)
+    if len(ok) == 0:
+        return 0, float('nan'), float('nan'), rejected
+    return len(ok), np.percentile(ok, 50) * 1000, np.percentile(ok, 99) * 1000, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=16, help='concurrent clients')
+    parser.add_argument('--duration', type=float, default=15, help='seconds of load per configuration')
+    parser.add_argument('--batch-rows', type=int, default=1000, help='rows per batch request')
+    parser.add_argument('--batch-share', type=float, default=0.05, help='fraction of requests that are batches')
+    parser.add_argument('--model', default=str(DEFAULT_MODEL), help='model artifact for the server')
+    parser.add_argument('--port', type=int, default=8765, help='port for the test server')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("LOAD TEST: INFERENCE OFF THE EVENT LOOP")
+    print("=" * 70)
+    print(f"{args.clients} clients for {args.duration:.0f}s per configuration; "
+          f"{args.batch_share:.0%} of requests are {args.batch_rows:,}-row batches")
+
+    print(f"\n{'Configuration':<24}{'kind':<8}{'ok':>7}{'p50 (ms)':>10}{'p99 (ms)':>10}{'503s':>7}")
+    print("-" * 66)
+    for label, overrides in CONFIGS:
+        server = start_server({'model_path': args.model, **overrides}, args.port)
+        try:
+            results = asyncio.run(run_load(args.port, args.clients, args.duration,
+                                           args.batch_rows, args.batch_share))
+        finally:
+            server.terminate()
+            server.wait()
+
+        for kind in ('single', 'batch', 'health'):
+            ok, p50, p99, rejected = summarize(results, kind)
+            print(f"{label if kind == 'single' else '':<24}{kind:<8}{ok:>7,}{p50:>10.1f}{p99:>10.1f}{rejected:>7,}")
+
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
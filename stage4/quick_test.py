@@ -6,8 +6,11 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from deployment.predictor import SalesPredictor
+from deployment.logging_setup import setup_logging
 
-predictor = SalesPredictor()
+# Log the feature detail of every prediction
+setup_logging('info')
+predictor = SalesPredictor(request_log_rate=1)
 
 # Same store/dept but different dates
 test_cases = [
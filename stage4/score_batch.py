@@ -0,0 +1,75 @@
+"""
+Command-line bulk scorer: predictions for a whole CSV or Parquet file.
+Reads the input in chunks, runs SalesPredictor feature engineering and the
+model on each chunk (optionally in worker processes, split by store, sharing
+one copy of the model and history) and writes Store, Dept, Date and
+predicted sales to CSV or Parquet.
+Usage: python score_batch.py INPUT OUTPUT [--model PATH] [--chunk-size 50000] [--workers 0] [--no-shared-memory]
+       e.g. python score_batch.py ../stage1/processed_data/Stage1.3.4_Final/test_final.parquet predictions.parquet
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add stage4 to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from deployment.bulk_scoring import FEATURE_MODES, score_file
+from deployment.logging_setup import setup_logging
+
+DEFAULT_MODEL = Path(__file__).parent / 'models' / 'best_model.pkl'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help='CSV or Parquet file to score')
+    parser.add_argument('output', help='CSV or Parquet file to write')
+    parser.add_argument('--model', default=str(DEFAULT_MODEL), help='model artifact to load')
+    parser.add_argument('--chunk-size', type=int, default=50000, help='rows read and scored at a time')
+    parser.add_argument('--workers', type=int, default=0, help='worker processes (0 scores in-process)')
+    parser.add_argument('--features', choices=FEATURE_MODES, default='auto',
+                        help="'precomputed' for engineered files like test_final.parquet, "
+                             "'engineer' for raw records, 'auto' to detect")
+    parser.add_argument('--no-shared-memory', action='store_true',
+                        help='load a private model and history in every worker')
+    args = parser.parse_args()
+
+    if not Path(args.input).exists():
+        print(f"❌ Input not found: {args.input}")
+        sys.exit(1)
+
+    setup_logging('warning')
+
+    print("=" * 70)
+    print("BULK SCORING")
+    print("=" * 70)
+    print(f"Input:  {args.input}")
+    print(f"Output: {args.output}")
+    print(f"Model:  {args.model}")
+    print(f"Chunks of {args.chunk_size:,} rows, "
+          f"{f'{args.workers} worker processes' if args.workers else 'in-process'}, features: {args.features}\n")
+
+    summary = score_file(
+        args.input, args.output,
+        predictor_kwargs={'model_path': args.model, 'request_log_rate': 0},
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        feature_mode=args.features,
+        shared_memory=not args.no_shared_memory,
+        progress=lambda rows: print(f"  {rows:>12,} rows scored", flush=True)
+    )
+
+    print(f"\n✓ {summary['rows']:,} rows in {summary['seconds']:.1f}s "
+          f"({summary['rows_per_second']:,.0f} rows/s)")
+    if summary['peak_memory_mb'] is not None:
+        print(f"✓ Peak memory: {summary['peak_memory_mb']:,.0f} MB", end='')
+        if summary['worker_peak_memory_mb'] is not None:
+            print(f" (largest worker {summary['worker_peak_memory_mb']:,.0f} MB)", end='')
+        print()
+    print(f"✓ Predictions written to {args.output}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
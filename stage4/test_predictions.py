@@ -9,13 +9,16 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from deployment.predictor import SalesPredictor
+from deployment.logging_setup import setup_logging
 
 print("="*70)
 print("TESTING MODEL PREDICTIONS")
 print("="*70)
 
 # Initialize predictor
-predictor = SalesPredictor()
+# Log the feature detail of every prediction
+setup_logging('info')
+predictor = SalesPredictor(request_log_rate=1)
 
 # Test case 1: Small Type C store, regular day
 test1 = {
@@ -0,0 +1,99 @@
+"""
+Test script for the Redis prediction cache backend
+Checks entries, TTLs and clears against a running Redis server, and that a
+clear by one API worker reaches the local cache of another.
+Usage: python test_redis_cache.py [--url redis://localhost:6379/15]
+Uses a throwaway key prefix; the database's other keys are not touched.
+"""
+
+import argparse
+import asyncio
+import sys
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from deployment.prediction_cache import PredictionCache, RedisCacheBackend
+
+
+def check(label, condition):
+    print(f"{'✓' if condition else '✗'} {label}")
+    return bool(condition)
+
+
+async def run_checks(url):
+    prefix = f'sales-forecast-test-{uuid.uuid4().hex[:8]}:'
+    backend = RedisCacheBackend(url, prefix=prefix)
+    other_backend = RedisCacheBackend(url, prefix=prefix)
+    refreshed = []
+
+    async def on_invalidate():
+        refreshed.append(True)
+
+    results = []
+    try:
+        # Backend: entries round-trip as JSON with their remaining TTL
+        await backend.set_many([('row:a', {'predicted_sales': 1.5}), ('row:b', [1, 2])], ttl=30)
+        entries = await backend.get_many(['row:a', 'row:b', 'row:missing'])
+        results.append(check("values round-trip", [e and e[0] for e in entries]
+                             == [{'predicted_sales': 1.5}, [1, 2], None]))
+        results.append(check("remaining TTL is reported", 0 < entries[0][1] <= 30))
+
+        await backend.set_many([('row:short', 1)], ttl=0.2)
+        await asyncio.sleep(0.4)
+        results.append(check("entries expire after their TTL", (await backend.get_many(['row:short']))[0] is None))
+
+        generation = await backend.generation()
+        new_generation = await backend.clear()
+        results.append(check("clear deletes the entries", await backend.get_many(['row:a', 'row:b']) == [None, None]))
+        results.append(check("clear increments the generation (and keeps it)",
+                             new_generation == generation + 1 == await backend.generation()))
+
+        # Two workers: a clear by one drops the other's local entries
+        worker_1 = PredictionCache(ttl=30, shared=backend, on_invalidate=on_invalidate)
+        worker_2 = PredictionCache(ttl=30, shared=other_backend, on_invalidate=on_invalidate)
+        await worker_1.set_many([('row:c', 3)])
+        results.append(check("a worker reads another worker's entry", await worker_2.get('row:c') == 3))
+        results.append(check("and then serves it locally", worker_2.stats()['hits'] == 0
+                             and await worker_2.get('row:c') == 3 and worker_2.stats()['hits'] == 1))
+
+        await worker_1.clear()
+        results.append(check("a clear reaches the other worker's local cache", await worker_2.get('row:c') is None))
+        results.append(check("the other worker reloads its state once", len(refreshed) == 1
+                             and worker_2.stats()['remote_invalidations'] == 1))
+        results.append(check("the clearing worker does not reload", await worker_1.get('row:c') is None
+                             and worker_1.stats()['remote_invalidations'] == 0))
+    finally:
+        await backend.clear()
+        await backend._client.delete(backend._generation_name)
+        await backend.close()
+        await other_backend.close()
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', default='redis://localhost:6379/15', help='Redis server to test against')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("TESTING REDIS PREDICTION CACHE")
+    print("=" * 70)
+    try:
+        from redis.exceptions import ConnectionError as RedisConnectionError
+    except ImportError:
+        print("Skipped: the redis package is not installed (pip install redis)")
+        return 0
+    try:
+        passed = asyncio.run(run_checks(args.url))
+    except (RedisConnectionError, OSError) as e:
+        print(f"Skipped: no Redis server at {args.url} ({e})")
+        return 0
+    print("=" * 70)
+    print("All checks passed" if passed else "Some checks FAILED")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
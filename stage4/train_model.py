@@ -6,20 +6,23 @@ This script properly handles paths and trains the model from stage3.
 import sys
 from pathlib import Path
 
-# Add stage3/ML_models to path
+# Add stage3/ML_models and stage4 to path
+sys.path.insert(0, str(Path(__file__).parent))
 stage3_path = Path(__file__).parent.parent / 'stage3' / 'ML_models'
 sys.path.insert(0, str(stage3_path))
 
-# Check if training data exists
-data_path = Path(__file__).parent.parent / 'stage1' / 'processed_data' / 'Stage1.3.4_Final' / 'train_final.csv'
+sys.path.insert(0, str(Path(__file__).parent.parent / 'stage1'))
+from data_io import dataset_exists
 
-if not data_path.exists():
+# Check if training data exists (Parquet or CSV)
+data_path = Path(__file__).parent.parent / 'stage1' / 'processed_data' / 'Stage1.3.4_Final' / 'train_final'
+
+if not dataset_exists(data_path):
     print("❌ Training data not found!")
-    print(f"   Expected location: {data_path}")
-    print("\n📋 To create the training data, run:")
-    print("   cd stage1")
-    print("   python Stage1_pipline_runner.py")
-    print("\nThis will process the raw data and create train_final.csv")
+    print(f"   Expected location: {data_path}.parquet (or .csv)")
+    print("\n📋 To create the training data, run from the project root:")
+    print("   python stage1/Stage1_pipline_runner.py")
+    print("\nThis will process the raw data and create train_final.parquet")
     sys.exit(1)
 
 print("="*70)
@@ -28,6 +31,7 @@ print("="*70)
 
 # Import and run training
 from Best_model import Best_model_results  # type: ignore
+from Feature_Pipeline import pipeline_path  # type: ignore
 
 # Train and save the model
 model_save_path = Path(__file__).parent / 'models' / 'best_model.pkl'
@@ -37,6 +41,11 @@ print(f"\n📁 Saving model to: {model_save_path}")
 
 model, metrics = Best_model_results(save_model=True, save_path=str(model_save_path))
 
+# Alternative artifacts: memory-mappable joblib and flattened forest
+from deployment.model_artifacts import export_model_artifacts
+
+artifact_paths = export_model_artifacts(model, model_save_path)
+
 print("\n" + "="*70)
 print("✅ MODEL TRAINING COMPLETE!")
 print("="*70)
@@ -45,6 +54,9 @@ print(f"   MAE:  ${metrics['MAE']:,.2f}")
 print(f"   RMSE: ${metrics['RMSE']:,.2f}")
 print(f"   R²:   {metrics['R2']:.4f} ({metrics['R2']*100:.2f}%)")
 print(f"\n💾 Model saved to: {model_save_path}")
+for fmt, path in artifact_paths.items():
+    print(f"   {fmt + ':':<8}{path}")
+print(f"   Feature pipeline: {pipeline_path(model_save_path)}")
 print("\n🚀 You can now use this model in:")
 print("   • FastAPI (run_api.py)")
 print("   • Streamlit Dashboard (run_dashboard.py)")